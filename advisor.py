@@ -0,0 +1,242 @@
+# advisor.py — time-budgeted Monte Carlo Tree Search hints for the /hint route
+# - Searches from the current Game within a wall-clock budget and ranks the
+#   decisions open now by visits, with estimated win rates
+# - Works on solver.py's flat state tuples: a "clone" is just the immutable tuple,
+#   and transitions are the compiled rules shared with the exact solver
+# - UCB1 at decision nodes; end-of-turn events are sampled with their exact
+#   probabilities; leaves are scored by a uniformly random playout
+# - Searches run in a small process pool so request threads only wait, never
+#   burn CPU under the GIL; HINT_WORKERS=0 searches inline (serverless)
+#
+# Usage:
+#   result = recommend(game, budget_ms=50)
+#   python advisor.py --difficulty hard --budget-ms 50
+
+from __future__ import annotations
+import argparse
+import bisect
+import concurrent.futures
+import itertools
+import json
+import logging
+import math
+import multiprocessing
+import random
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from game_logic import DIFFICULTY_SETTINGS, Game, new_game
+from solver import (
+    EVENT_OUTCOMES, HARVESTED, NO_CHOICE, PAID, PENDING, end_turn_child, harvest, legal_actions, outcome,
+    resolve_choice, state_of,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUDGET_MS = 50
+MAX_BUDGET_MS = 500
+EXPLORATION = math.sqrt(2)
+# Extra time a request waits for a pooled search past its budget before giving up
+POOL_GRACE_MS = 100
+
+_EVENT_CUMULATIVE: List[float] = list(itertools.accumulate(p for p, _, _ in EVENT_OUTCOMES[0]))
+
+State = Tuple[int, ...]
+
+
+class AdvisorBusy(RuntimeError):
+    """Raised when every search slot is taken or a pooled search overran its deadline"""
+
+
+# ------------------------
+# Rules on state tuples
+# ------------------------
+def moves(state: State) -> List[Tuple[str, State]]:
+    """Decisions open in state → state right after each (before any end-of-turn event)"""
+    if state[PENDING] != NO_CHOICE:
+        return [(f"choice:{pick}", child) for pick in ("a", "b")
+                if (child := resolve_choice(state, pick)) is not None]
+    if not state[HARVESTED]:
+        state = harvest(state)
+        if outcome(state) is not None:
+            return [("harvest", state)]
+    if state[PAID]:
+        return [("end_turn", state)]
+    return list(legal_actions(state))
+
+
+def _sample_event(state: State, rng: random.Random) -> State:
+    index = min(bisect.bisect_right(_EVENT_CUMULATIVE, rng.random()), len(_EVENT_CUMULATIVE) - 1)
+    return end_turn_child(state, index)
+
+
+def _advance(state: State, rng: random.Random) -> State:
+    """After a decision: roll the end-of-turn events once the turn is complete"""
+    if state[HARVESTED] and state[PAID] and state[PENDING] == NO_CHOICE and outcome(state) is None:
+        return _sample_event(state, rng)
+    return state
+
+
+def playout(state: State, rng: random.Random) -> float:
+    """Random legal play to the end of the game: 1.0 win, 0.0 loss (or stuck)"""
+    while True:
+        result = outcome(state)
+        if result is not None:
+            return result
+        options = moves(state)
+        if not options:
+            return 0.0
+        state = _advance(rng.choice(options)[1], rng)
+
+
+# ------------------------
+# Search
+# ------------------------
+class _Node:
+    __slots__ = ("visits", "wins", "edges")
+
+    def __init__(self) -> None:
+        self.visits = 0
+        self.wins = 0.0
+        self.edges: Optional[List[_Edge]] = None
+
+
+class _Edge:
+    """One decision: its statistics and the nodes reached from it (one per sampled event)"""
+    __slots__ = ("name", "state", "visits", "wins", "children")
+
+    def __init__(self, name: str, state: State):
+        self.name = name
+        self.state = state
+        self.visits = 0
+        self.wins = 0.0
+        self.children: Dict[State, _Node] = {}
+
+
+def _select(node: _Node) -> _Edge:
+    log_n = math.log(node.visits + 1)
+    best, best_score = node.edges[0], -1.0
+    for edge in node.edges:
+        if edge.visits == 0:
+            return edge
+        score = edge.wins / edge.visits + EXPLORATION * math.sqrt(log_n / edge.visits)
+        if score > best_score:
+            best, best_score = edge, score
+    return best
+
+
+def _iterate(node: _Node, state: State, rng: random.Random) -> float:
+    result = outcome(state)
+    if result is None:
+        if node.edges is None:
+            node.edges = [_Edge(name, child) for name, child in moves(state)]
+        if not node.edges:
+            result = 0.0  # stuck
+        elif node.visits == 0:
+            result = playout(state, rng)
+        else:
+            edge = _select(node)
+            nxt = _advance(edge.state, rng)
+            child = edge.children.get(nxt)
+            if child is None:
+                child = edge.children[nxt] = _Node()
+            result = _iterate(child, nxt, rng)
+            edge.visits += 1
+            edge.wins += result
+    node.visits += 1
+    node.wins += result
+    return result
+
+
+def search(state: State, budget_ms: float = DEFAULT_BUDGET_MS, seed: Optional[int] = None) -> Dict[str, Any]:
+    """
+    MCTS from state until the budget runs out. Returns
+    {"recommendations": [{"action", "win_rate", "visits"}, ...] (most visited first), "iterations", "elapsed_ms"}
+    """
+    started = time.perf_counter()
+    deadline = started + budget_ms / 1000.0
+    rng = random.Random(seed)
+    root = _Node()
+    iterations = 0
+    if outcome(state) is None:
+        # Always expand every root decision once, even on a tiny budget
+        root.edges = [_Edge(name, child) for name, child in moves(state)]
+        while root.edges:
+            _iterate(root, state, rng)
+            iterations += 1
+            if iterations >= len(root.edges) + 1 and time.perf_counter() >= deadline:
+                break
+    ranked = sorted(root.edges or (), key=lambda e: (-e.visits, -e.wins))
+    return {
+        "recommendations": [
+            {"action": e.name, "win_rate": round(e.wins / e.visits, 4) if e.visits else 0.0, "visits": e.visits}
+            for e in ranked
+        ],
+        "iterations": iterations,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000.0, 1),
+    }
+
+
+# ------------------------
+# Worker pool
+# ------------------------
+_pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_slots: Optional[threading.BoundedSemaphore] = None
+
+
+def configure(workers: int) -> None:
+    """Size the search pool (0 = search inline in the calling thread); call before the first recommend()"""
+    global _pool, _slots
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+        # Spawned workers re-import the server's main module (python app.py); they must not start pools
+        if workers > 0 and multiprocessing.parent_process() is None:
+            # spawn: forking a threaded web server can copy held locks into the children
+            _pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _slots = threading.BoundedSemaphore(2 * workers)
+            _pool.submit(int)  # start the workers now rather than on the first hint
+        else:
+            _slots = None
+
+
+def recommend(game: Game, budget_ms: float = DEFAULT_BUDGET_MS, seed: Optional[int] = None) -> Dict[str, Any]:
+    """Ranked hints for game within budget_ms (capped at MAX_BUDGET_MS); raises AdvisorBusy under overload"""
+    budget_ms = max(1.0, min(float(budget_ms), MAX_BUDGET_MS))
+    state = state_of(game)
+    pool, slots = _pool, _slots
+    if pool is None:
+        result = search(state, budget_ms, seed)
+    else:
+        if not slots.acquire(blocking=False):
+            raise AdvisorBusy("All advisor workers are busy")
+        try:
+            future = pool.submit(search, state, budget_ms, seed)
+            result = future.result(timeout=(budget_ms + POOL_GRACE_MS) / 1000.0)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise AdvisorBusy("Advisor search did not finish in time")
+        finally:
+            slots.release()
+    result.update(turn=game.turn, budget_ms=budget_ms)
+    return result
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="MCTS hints for a fresh BRONZE: 1177 BC game")
+    parser.add_argument("--difficulty", default="normal", choices=list(DIFFICULTY_SETTINGS))
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+    logging.getLogger("game_logic").setLevel(logging.WARNING)
+    print(json.dumps(recommend(new_game(args.difficulty, seed=0), args.budget_ms, args.seed), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,82 +1,282 @@
 # app.py — Flask wiring (v4.1 parity patch)
+# create_app() builds a configured app; the module-level `app` (used by Vercel,
+# gunicorn and the tests) is create_app() with the environment's settings.
+# Cold starts matter on serverless, so the advisor (MCTS search, process pool)
+# is imported on the first /hint unless HINT_WORKERS opts in to a warm pool, and
+# the deploy's build step (precompile.py, see vercel.json) prebuilds the bytecode
+# this module and the templates load. Session backends import sqlite3 / redis
+# only when SESSION_BACKEND selects them.
 from __future__ import annotations
-from flask import Flask, render_template, request, redirect, url_for, session
-from game_logic import Game
+from flask import Flask, Response, current_app, jsonify, make_response, render_template, request, redirect, url_for, session
+from game_logic import Game, DIFFICULTY_SETTINGS
+import metrics
+import render_cache
+import replay
+import session_store
+import state_diff
+import hashlib
 import os
 import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = Flask(__name__)
-app.secret_key = os.environ.get("SECRET_KEY", "dev-key")
+# Views, registered on each app by create_app (endpoint = function name, as with @app.route)
+_routes: List[Tuple[str, Callable, Dict[str, Any]]] = []
 
-# Use Flask session storage for game state (works with serverless/Vercel)
+
+def route(rule: str, **options: Any) -> Callable:
+    def register(view: Callable) -> Callable:
+        _routes.append((rule, view, options))
+        return view
+    return register
+
+
+def create_app(config: Optional[Dict[str, Any]] = None) -> Flask:
+    """App configured from the environment, then from config (e.g. {"TESTING": True})"""
+    app = Flask(__name__)
+    app.secret_key = os.environ.get("SECRET_KEY", "dev-key")
+    app.config["SESSION_BACKEND"] = os.environ.get("SESSION_BACKEND", "cookie")
+    # Per-request phase histograms at /metrics (METRICS_SAMPLE_RATE: 0 = off, 1 = every request)
+    app.config["METRICS_SAMPLE_RATE"] = os.environ.get("METRICS_SAMPLE_RATE", "0")
+    # Cached action / summary panels and on-disk template bytecode (FRAGMENT_CACHE_SIZE=0 disables the former)
+    app.config["FRAGMENT_CACHE_SIZE"] = int(os.environ.get("FRAGMENT_CACHE_SIZE", render_cache.FRAGMENT_CACHE_SIZE))
+    app.config["JINJA_CACHE_DIR"] = os.environ.get("JINJA_CACHE_DIR")
+    app.config["HINT_BUDGET_MS"] = float(os.environ["HINT_BUDGET_MS"]) if "HINT_BUDGET_MS" in os.environ else None
+    # /hint searches run in the request thread by default; HINT_WORKERS=N opts in to a warm N-process pool
+    app.config["HINT_WORKERS"] = os.environ.get("HINT_WORKERS", "0")
+    if config:
+        app.config.update(config)
+
+    session_store.init_app(app)
+    metrics.init_app(app)
+    render_cache.init_app(app)
+    for rule, view, options in _routes:
+        app.add_url_rule(rule, view_func=view, **options)
+    if str(app.config["HINT_WORKERS"]) != "0":
+        _advisor(app)  # start the pool now rather than on the first hint
+    return app
+
+
+_advisor_module = None
+_advisor_lock = threading.Lock()
+
+
+def _advisor(app: Flask):
+    """The advisor module, imported and configured (HINT_WORKERS) on first use"""
+    global _advisor_module
+    with _advisor_lock:
+        if _advisor_module is None:
+            import advisor
+            try:
+                advisor.configure(int(app.config["HINT_WORKERS"]))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Advisor pool unavailable, searching inline: {e}")
+                advisor.configure(0)
+            _advisor_module = advisor
+        return _advisor_module
+
+
+# Use Flask session storage for game state (works with serverless/Vercel).
+# With SESSION_BACKEND set (see session_store.py) the session lives server-side
+# and the cookie carries only an opaque session id.
+# The session holds only a sealed game record (see replay.py): an opaque game id
+# (the seed is HMAC(SECRET_KEY, id), so a readable cookie predicts nothing) +
+# difficulty + command log; every state change goes through replay.execute()
+# so it lands in the log.
+# Rejected commands are not logged; their messages are shown once as notices.
 
 def _game() -> Game:
     """Get or create game from session storage"""
     try:
-        if "game" not in session:
+        record = session.get("game")
+        if not record:
             logger.info("Creating new game")
-            game = Game()
-            session["game"] = game.to_dict()
-            return game
-        else:
-            # Reconstruct game from session
-            game = Game.from_dict(session["game"])
+            return _new_game("normal")
+        if "log" not in record or "id" not in record:
+            # Full to_dict() payload from before event-sourced sessions, or a record from
+            # before sealed ones: its seed was in the cookie, so the game goes on from
+            # its current state with a new, sealed random stream
+            logger.info("Migrating legacy session payload")
+            with metrics.phase("load"):
+                game = Game.from_dict(record) if "log" not in record else replay.rebuild(record)
+            game.command_log = []
+            game_id = replay.reseed(game, current_app.secret_key)
+            session["game"] = replay.to_record(game, base=game.to_dict(), game_id=game_id)
             return game
+        # Rebuild game from its command log
+        with metrics.phase("load"):
+            return replay.rebuild(record, current_app.secret_key)
     except Exception as e:
         logger.error(f"Error in _game: {e}", exc_info=True)
         # Create new game as fallback
-        game = Game()
-        session["game"] = game.to_dict()
-        return game
+        return _new_game("normal")
 
-def _save_game(game: Game) -> None:
-    """Save game state to session"""
+
+def _new_game(difficulty: str) -> Game:
+    """Start a game with a sealed record and save it to the session"""
+    game, game_id = replay.new_sealed_game(difficulty, current_app.secret_key)
+    _save_game(game, game_id)
+    session.pop("victory", None)  # the last game's result
+    return game
+
+
+def _save_game(game: Game, game_id: Optional[str] = None) -> None:
+    """Save game record to session; game_id seals a new game's first record (see _new_game)"""
     try:
-        session["game"] = game.to_dict()
+        record = session.get("game") or {}
+        same_game = "log" in record and replay.record_seed(record, current_app.secret_key) == game.rng.seed
+        if game_id is None and same_game:
+            game_id = record.get("id")
+        # Keep the migrated base state only while it is still the same game
+        base = record.get("base") if same_game and game_id == record.get("id") else None
+        with metrics.phase("encode"):
+            session["game"] = replay.to_record(game, base, game_id)
         session.modified = True
     except Exception as e:
         logger.error(f"Error saving game: {e}", exc_info=True)
 
 
-@app.route("/")
+def _victory(game: Game, result: dict) -> None:
+    """Record the game result; the final state is rebuilt from the game record on /victory,
+    which ignores a result whose revision is not the session game's"""
+    session["victory"] = {"type": result["type"], "reason": result.get("reason"), "revision": _revision(game)}
+    _save_game(game)
+
+
+# ------------------------
+# Concurrent requests on one game (double clicks, several tabs): a command is
+# applied to the game as loaded and saved with a compare-and-swap
+# (session_store.commit); if another request saved first, the session is
+# reloaded and the command applied again on top, so no command is lost.
+# The client's idempotency key (Idempotency-Key header / idempotency_key field)
+# is saved with the game, so a repeated submit is answered from the current
+# state instead of running twice. Cookie sessions have no shared copy to race
+# on: there a repeated submit rebuilds the same record from the same cookie.
+# ------------------------
+CAS_ATTEMPTS = 5
+
+
+class ConcurrentUpdate(RuntimeError):
+    """The game kept changing under a request for CAS_ATTEMPTS tries"""
+
+
+# Messages that are not part of the game record (a rejected command's reason,
+# route errors) are shown once: kept in the session until the next /game render
+NOTICES_KEPT = 8
+
+
+def _notify(messages: List[Dict[str, str]]) -> None:
+    if messages:
+        session["notices"] = (session.get("notices", []) + messages)[-NOTICES_KEPT:]
+
+
+def _take_notices() -> List[Dict[str, str]]:
+    notices = session.pop("notices", None) or []
+    if notices and not session_store.commit(session):
+        session_store.reload(session)  # changed meanwhile: keep the other request's save, show these anyway
+    return notices
+
+
+def _request_key() -> Optional[str]:
+    key = request.headers.get("Idempotency-Key") or request.form.get("idempotency_key")
+    return key[:64] if key else None
+
+
+def _run(apply: Callable[[Game], Tuple[bool, Optional[dict]]],
+         notify: bool = True) -> Tuple[Game, bool, Optional[dict], Optional[dict], List[Dict[str, str]]]:
+    """Apply a command (apply(g) → (ok, game_result)) once per idempotency key and save it;
+    returns (g, ok, game_result, before, notices), with before as from _api_before and notices
+    the messages of a rejected command (also kept for the next page with notify, as the form routes need)"""
+    key = _request_key()
+    for _ in range(CAS_ATTEMPTS):
+        g = _game()
+        before = _api_before(g)
+        seen = session.get("request")
+        if key and seen and seen[0] == key:
+            logger.info(f"Duplicate request {key[:8]}… answered from the current state")
+            return g, seen[1], g._check_game_end(), before, []
+        log, version = g.message_log.copy(), g.version
+        ok, game_result = apply(g)
+        # Nothing recorded (a rejected command): its message is not part of the game
+        notices = replay.take_unrecorded_messages(g, log) if g.version == version else []
+        if notify:
+            _notify(notices)
+        if game_result is None:
+            # Same check the /game view runs on load
+            game_result = g._check_game_end()
+        if game_result:
+            _victory(g, game_result)
+        else:
+            _save_game(g)
+        if key:
+            session["request"] = [key, ok]
+        if session_store.commit(session):
+            return g, ok, game_result, before, notices
+        logger.info("Game changed by a concurrent request, applying the command again")
+        session_store.reload(session)
+    raise ConcurrentUpdate(f"Game still changing after {CAS_ATTEMPTS} attempts")
+
+
+# ------------------------
+# Conditional GET: /game and /victory carry a strong ETag derived from the game
+# record's revision (seed + state version), so a matching If-None-Match is
+# answered 304 straight from the session, without a rebuild or a render.
+# ------------------------
+def _page_etag(page: str, revision: str, *extra: Any) -> str:
+    parts = [page, revision, render_cache.template_version(current_app), request.script_root, *map(str, extra)]
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def _revision(g: Game) -> str:
+    return replay.revision(g, current_app.secret_key)
+
+
+def _record_revision() -> Optional[str]:
+    """Revision of the session's game record, if it is an event-sourced one"""
+    record = session.get("game")
+    if not record or "log" not in record or not ("seed" in record or "id" in record):
+        return None
+    return replay.record_revision(record, current_app.secret_key)
+
+
+def _revalidate(response: Response, etag: str) -> Response:
+    """Let the browser keep the page but check it with If-None-Match before each use"""
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    response.vary.add("Cookie")
+    return response
+
+
+def _not_modified(etag: Optional[str]) -> Optional[Response]:
+    if etag is None or etag not in request.if_none_match:
+        return None
+    return _revalidate(Response(status=304), etag)
+
+
+@route("/")
 def index():
-    return render_template("index.html")
+    with metrics.phase("render"):
+        return render_template("index.html")
 
 
-@app.route("/new_game/<difficulty>")
+@route("/new_game/<difficulty>")
 def new_game(difficulty):
     """Initialize a new game with selected difficulty"""
     try:
         logger.info(f"Starting new game with difficulty: {difficulty}")
         
         # Validate difficulty
-        if difficulty not in ["easy", "normal", "hard"]:
+        if difficulty not in DIFFICULTY_SETTINGS:
             logger.warning(f"Invalid difficulty: {difficulty}, defaulting to normal")
             difficulty = "normal"
         
-        # Create new game
-        g = Game()
-        g.difficulty = difficulty  # Set difficulty
-        
-        # Apply difficulty settings
-        if difficulty == "easy":
-            g.max_turns = 30
-            g.stability = 70
-            logger.info("Applied easy difficulty settings")
-        elif difficulty == "hard":
-            g.max_turns = 16
-            g.stability = 60
-            g.collapse = 50
-            logger.info("Applied hard difficulty settings")
-        else:
-            logger.info("Using normal difficulty settings")
-
-        # Store game in session
-        _save_game(g)
+        # Create new game with difficulty settings applied and store it in the session
+        _new_game(difficulty)
+        logger.info(f"Applied {difficulty} difficulty settings")
         logger.info(f"Game initialized with difficulty: {difficulty}")
         
         return redirect(url_for("game"))
@@ -86,10 +286,16 @@ def new_game(difficulty):
         return redirect(url_for("index"))
 
 
-@app.route("/game")
+@route("/game")
 def game():
     """Main game view"""
     try:
+        revision = _record_revision()
+        # Pending notices change the page (once), so they skip the 304
+        cached = None if session.get("notices") else _not_modified(revision and _page_etag("game", revision))
+        if cached is not None:
+            return cached
+
         g = _game()
         logger.info(f"Rendering game view for turn {g.turn}")
         
@@ -97,9 +303,8 @@ def game():
         if not hasattr(g, 'turn') or not hasattr(g, 'to_dict'):
             logger.error("Invalid game state detected - missing required attributes")
             # Create new game as fallback
-            g = Game()
-            g._log("Game state was invalid - created new game.", "warning")
-            _save_game(g)
+            g = _new_game("normal")
+            _notify([{"type": "warning", "text": "Game state was invalid - created new game."}])
         
         # Additional validation checks
         if g.turn < 1:
@@ -114,18 +319,24 @@ def game():
         game_result = g._check_game_end()
         if game_result:
             logger.info(f"Game ended on view load: {game_result}")
-            session["victory"] = {"type": game_result["type"], "reason": game_result.get("reason"), "final": g.to_dict()}
-            _save_game(g)
+            _victory(g, game_result)
             return redirect(url_for("victory"))
         
         # Pass game state to template
-        return render_template("game.html", game=g.to_dict())
+        with metrics.phase("to_dict"):
+            state = g.to_dict()
+        revision = _revision(g)
+        notices = _take_notices()
+        with metrics.phase("render"):
+            page = render_template("game.html", game=state, revision=revision, notices=notices)
+        # A page with notices gets its own ETag, so revalidating it later renders it again without them
+        etag = _page_etag("game", revision, *(n["text"] for n in notices))
+        return _revalidate(make_response(page), etag)
     except Exception as e:
         logger.error(f"Error in game route: {e}", exc_info=True)
         # Try to create a fresh game
         try:
-            g = Game()
-            _save_game(g)
+            g = _new_game("normal")
             logger.info("Created new game after error")
             return redirect(url_for("game"))
         except Exception as recovery_error:
@@ -134,191 +345,259 @@ def game():
             return redirect(url_for("index"))
 
 
-@app.post("/action")
-def action():
-    """Handle player actions"""
+def _perform_action(g: Game, form) -> bool:
+    """Run the action named in form (type, target) through the command log; never advances the turn"""
+    a = form.get("type", "")
+    logger.info(f"Processing action: {a} for turn {g.turn}")
+
+    # NOTE: every action returns True/False to indicate success;
+    # we DO NOT advance the turn here.
+    command = a
+    if a == "send_tribute":
+        command = f"send_tribute:{form.get('target', 'egypt')}"
+    if command not in replay.ACTION_COMMANDS:
+        logger.warning(f"Unknown or cancelled action: {a}")
+        command = "cancel"  # never advance on cancel
+    with metrics.phase("action"):
+        success = replay.execute(g, command)
+
+    logger.info(f"Action {a} result: {success}")
+
+    if not success:
+        logger.warning(f"Action {a} failed - check game state or resources")
+    return success
+
+
+def _make_choice(g: Game, choice_value: str) -> Tuple[bool, Optional[dict]]:
+    """Resolve the pending choice, auto-advancing a complete turn; returns (resolved, game_result)"""
+    logger.info(f"Processing choice: {choice_value} for turn {g.turn}")
+    if choice_value not in ["a", "b"]:
+        logger.warning(f"Invalid choice value: {choice_value}")
+        replay.execute(g, "invalid_choice")
+        return False, None
+
+    # Attempt to resolve the choice
+    with metrics.phase("action"):
+        resolved = replay.execute(g, f"choice:{choice_value}")
+    if not resolved:
+        logger.warning(f"Choice {choice_value} resolution failed - likely insufficient resources")
+        # Message already added by resolve_choice
+        return False, None
+
+    logger.info(f"Choice {choice_value} resolved successfully")
+
+    # Auto-advance turn if both actions are complete
+    if g.free_harvest_used and g.paid_action_used:
+        logger.info("Both actions complete after choice - auto-advancing turn")
+        with metrics.phase("end_turn"):
+            advanced = replay.execute(g, "end_turn")
+        if advanced:
+            logger.info(f"Turn auto-advanced to {g.turn}")
+            # Check for victory/defeat conditions after auto-advance using centralized function
+            game_result = g._check_game_end()
+            if game_result:
+                logger.info(f"Game ended after choice: {game_result}")
+            return True, game_result
+        logger.warning("Failed to auto-advance turn after choice")
+    return True, None
+
+
+def _advance_turn(g: Game) -> Tuple[bool, Optional[dict]]:
+    """End the turn if both action flags are used; returns (advanced, game_result)"""
+    logger.info(f"Attempting to end turn {g.turn}")
+
+    # End turn ONLY if both action flags used; otherwise stay on same turn.
+    with metrics.phase("end_turn"):
+        advanced = replay.execute(g, "end_turn")
+    if not advanced:
+        # messages already added by can_end_turn()
+        logger.info(f"Cannot end turn {g.turn} - conditions not met")
+        return False, None
+
+    logger.info(f"Turn {g.turn - 1} ended successfully, now on turn {g.turn}")
+
+    # Check victory/defeat conditions using centralized function
     try:
-        g = _game()
-        a = request.form.get("type", "")
-        logger.info(f"Processing action: {a} for turn {g.turn}")
-
-        # NOTE: every action returns True/False to indicate success;
-        # we DO NOT advance the turn here.
-        success = False
-
-        # Basic actions
-        if a == "harvest":
-            success = g.harvest_free()
-        elif a == "gather_timber":
-            success = g.gather_timber()
-        elif a == "fortify":
-            success = g.fortify()
-        elif a == "withdraw":
-            success = g.withdraw_support()
-        # Research
-        elif a == "research_ib":
-            success = g.research_imperial_bureaucracy()
-        elif a == "research_tin_trade":
-            success = g.research_tin_trade_routes()
-        elif a == "research_phalanx":
-            success = g.research_phalanx_formation()
-        elif a == "research_marriage":
-            success = g.research_diplomatic_marriage()
-        # Buildings
-        elif a == "build_mine":
-            success = g.build_bronze_mine()
-        elif a == "build_granary":
-            success = g.build_granary()
-        elif a == "build_barracks":
-            success = g.build_barracks()
-        elif a == "build_palace":
-            success = g.build_palace()
-        elif a == "build_lighthouse":
-            success = g.build_lighthouse()
-        elif a == "build_watchtower":
-            success = g.build_watchtower()
-        # Diplomacy
-        elif a == "send_tribute":
-            target = request.form.get("target", "egypt")
-            success = g.send_tribute(target)
-        elif a == "form_alliance":
-            success = g.form_alliance()
-        elif a == "host_festival":
-            success = g.host_festival()
-        else:
-            logger.warning(f"Unknown or cancelled action: {a}")
-            g._log("Action cancelled.", "secondary")
-            success = False  # never advance on cancel
-        
-        logger.info(f"Action {a} result: {success}")
+        game_result = g._check_game_end()
+        if game_result:
+            logger.info(f"Game ended: {game_result}")
+        return True, game_result
+    except Exception as victory_check_error:
+        logger.error(f"Error checking victory conditions: {victory_check_error}", exc_info=True)
+        # Continue to game even if victory check failed
+        return True, None
 
-        if not success:
-            logger.warning(f"Action {a} failed - check game state or resources")
 
-        # Save game state after action
-        _save_game(g)
-        return redirect(url_for("game"))
+def _log_route_error(message: str) -> None:
+    """Show an error message on the next game page if possible"""
+    try:
+        _notify([{"type": "danger", "text": message}])
+    except Exception as log_error:
+        logger.error(f"Could not add error message to game log: {log_error}")
+
+
+@route("/action", methods=["POST"])
+def action():
+    """Handle player actions"""
+    try:
+        _, _, game_result, _, _ = _run(lambda g: (_perform_action(g, request.form), None))
+        return redirect(url_for("victory" if game_result else "game"))
     except Exception as e:
         logger.error(f"Error in action route: {e}", exc_info=True)
-        # Add error message to game log if possible
-        try:
-            g = _game()
-            g._log("An error occurred processing your action. Please try again.", "danger")
-            _save_game(g)
-        except Exception as log_error:
-            logger.error(f"Could not add error message to game log: {log_error}")
+        _log_route_error("An error occurred processing your action. Please try again.")
         return redirect(url_for("game"))
 
 
-@app.post("/choice")
+@route("/choice", methods=["POST"])
 def choice():
     """Handle player choice events"""
     try:
-        g = _game()
-        choice_value = request.form.get("choice", "")
-        logger.info(f"Processing choice: {choice_value} for turn {g.turn}")
-
-        if choice_value in ["a", "b"]:
-            # Attempt to resolve the choice
-            if not g.resolve_choice(choice_value):
-                logger.warning(f"Choice {choice_value} resolution failed - likely insufficient resources")
-                # Message already added by resolve_choice
-                _save_game(g)
-                return redirect(url_for("game"))
-            
-            logger.info(f"Choice {choice_value} resolved successfully")
-            
-            # Auto-advance turn if both actions are complete
-            if g.free_harvest_used and g.paid_action_used:
-                logger.info("Both actions complete after choice - auto-advancing turn")
-                if g.end_turn():
-                    logger.info(f"Turn auto-advanced to {g.turn}")
-                    
-                    # Check for victory/defeat conditions after auto-advance using centralized function
-                    game_result = g._check_game_end()
-                    if game_result:
-                        logger.info(f"Game ended after choice: {game_result}")
-                        session["victory"] = {"type": game_result["type"], "reason": game_result.get("reason"), "final": g.to_dict()}
-                        _save_game(g)
-                        return redirect(url_for("victory"))
-                else:
-                    logger.warning("Failed to auto-advance turn after choice")
-        else:
-            logger.warning(f"Invalid choice value: {choice_value}")
-            g._log("Invalid choice selected.", "danger")
-
-        # Save game state after choice
-        _save_game(g)
-        return redirect(url_for("game"))
+        _, _, game_result, _, _ = _run(lambda g: _make_choice(g, request.form.get("choice", "")))
+        return redirect(url_for("victory" if game_result else "game"))
     except Exception as e:
         logger.error(f"Error in choice route: {e}", exc_info=True)
-        # Try to add error message to game
-        try:
-            g = _game()
-            g._log("An error occurred processing your choice. Please try again.", "danger")
-            _save_game(g)
-        except Exception as log_error:
-            logger.error(f"Could not add error message to game log: {log_error}")
+        _log_route_error("An error occurred processing your choice. Please try again.")
         return redirect(url_for("game"))
 
 
-@app.post("/end_turn")
+@route("/end_turn", methods=["POST"])
 def end_turn():
     """Handle end turn and check for victory/defeat conditions"""
     try:
-        g = _game()
-        logger.info(f"Attempting to end turn {g.turn}")
-        
-        # End turn ONLY if both action flags used; otherwise stay on same turn.
-        if not g.end_turn():
-            # messages already added by can_end_turn(); just re-render
-            logger.info(f"Cannot end turn {g.turn} - conditions not met")
-            _save_game(g)
-            return redirect(url_for("game"))
+        _, _, game_result, _, _ = _run(_advance_turn)
+        return redirect(url_for("victory" if game_result else "game"))
+    except Exception as e:
+        logger.error(f"Error in end_turn route: {e}", exc_info=True)
+        _log_route_error("An error occurred ending the turn. Please try again.")
+        return redirect(url_for("game"))
 
-        logger.info(f"Turn {g.turn - 1} ended successfully, now on turn {g.turn}")
 
-        # Check victory/defeat conditions using centralized function
-        try:
-            game_result = g._check_game_end()
-            if game_result:
-                logger.info(f"Game ended: {game_result}")
-                session["victory"] = {"type": game_result["type"], "reason": game_result.get("reason"), "final": g.to_dict()}
-                _save_game(g)
-                return redirect(url_for("victory"))
-        except Exception as victory_check_error:
-            logger.error(f"Error checking victory conditions: {victory_check_error}", exc_info=True)
-            # Continue to game even if victory check failed
-
-        # Save game state after turn advancement
-        _save_game(g)
-        return redirect(url_for("game"))
+# ------------------------
+# JSON API: one round trip per click (the AJAX path in static/js/game.js)
+# A client that sends the revision of the state it holds (X-Game-Revision) gets
+# a state_diff patch against it; otherwise, or once it is stale, the full state.
+# ------------------------
+def _api_before(g: Game) -> Optional[dict]:
+    """The state before this request, if the client holds exactly that state"""
+    if request.headers.get("X-Game-Revision") != _revision(g):
+        return None
+    with metrics.phase("to_dict"):
+        # to_dict shares the live action / summary lists; a clone keeps them from changing under us
+        return g.clone().to_dict()
+
+
+def _api_state(g: Game, ok: bool, game_result: Optional[dict], before: Optional[dict],
+               notices: List[Dict[str, str]]):
+    """Answer with the saved game's state (patch or full) and any notices to show once,
+    or with game_over + the result page once it has ended"""
+    if game_result:
+        return jsonify({"ok": ok, "game_over": game_result, "redirect": url_for("victory")})
+    body = {"ok": ok, "game_over": None, "revision": _revision(g)}
+    if notices:
+        body["notices"] = notices
+    with metrics.phase("to_dict"):
+        state = g.to_dict()
+        if before is None:
+            body["game"] = state
+        else:
+            body["patch"] = state_diff.diff(before, state)
+    return jsonify(body)
+
+
+def _api_error(route: str, e: Exception):
+    if isinstance(e, ConcurrentUpdate):
+        logger.warning(f"Conflict in {route} API route: {e}")
+        return jsonify({"error": "The game is being changed by another request; try again"}), 409
+    logger.error(f"Error in {route} API route: {e}", exc_info=True)
+    return jsonify({"error": "Could not process the request; reload the game"}), 500
+
+
+@route("/api/v1/action", methods=["POST"])
+def api_action():
+    """JSON variant of /action: form or JSON body {type, target} → {ok, game_over, revision, game | patch}"""
+    try:
+        data = request.get_json(silent=True) or request.form
+        return _api_state(*_run(lambda g: (_perform_action(g, data), None), notify=False))
     except Exception as e:
-        logger.error(f"Error in end_turn route: {e}", exc_info=True)
-        # Try to add error message
+        return _api_error("action", e)
+
+
+@route("/api/v1/choice", methods=["POST"])
+def api_choice():
+    """JSON variant of /choice: {choice: "a" | "b"} → {ok, game_over, revision, game | patch}"""
+    try:
+        data = request.get_json(silent=True) or request.form
+        return _api_state(*_run(lambda g: _make_choice(g, data.get("choice", "")), notify=False))
+    except Exception as e:
+        return _api_error("choice", e)
+
+
+@route("/api/v1/end_turn", methods=["POST"])
+def api_end_turn():
+    """JSON variant of /end_turn → {ok, game_over, revision, game | patch}"""
+    try:
+        return _api_state(*_run(_advance_turn, notify=False))
+    except Exception as e:
+        return _api_error("end_turn", e)
+
+
+@route("/hint")
+def hint():
+    """Ranked action recommendations from a time-budgeted MCTS search (JSON)"""
+    try:
+        advisor = _advisor(current_app)
+        g = _game()
+        budget = request.args.get("budget_ms", current_app.config["HINT_BUDGET_MS"] or advisor.DEFAULT_BUDGET_MS,
+                                  type=float)
         try:
-            g = _game()
-            g._log("An error occurred ending the turn. Please try again.", "danger")
-            _save_game(g)
-        except Exception as log_error:
-            logger.error(f"Could not add error message: {log_error}")
-        return redirect(url_for("game"))
+            with metrics.phase("search"):
+                result = advisor.recommend(g, budget)
+        except advisor.AdvisorBusy as e:
+            logger.warning(f"Hint unavailable: {e}")
+            return jsonify({"error": str(e)}), 503
+        logger.info(f"Hint for turn {g.turn}: {result['iterations']} iterations in {result['elapsed_ms']} ms")
+        return jsonify(result)
+    except Exception as e:
+        logger.error(f"Error in hint route: {e}", exc_info=True)
+        return jsonify({"error": "Could not compute a hint"}), 500
 
 
-@app.get("/victory")
+@route("/victory")
 def victory():
     """Display victory/defeat screen"""
     try:
         data = session.get("victory")
+        if data and "final" in data:
+            # Result stored with its final state (older sessions): nothing to revalidate against
+            with metrics.phase("render"):
+                return render_template("victory.html", result=data)
+        revision = _record_revision()
+        if data and (revision is None or data.get("revision") != revision):
+            logger.warning("Victory data belongs to another game state; dropping it")
+            session.pop("victory")
+            data = None
         if not data:
             logger.warning("Victory route accessed without victory data")
             return redirect(url_for("game"))
+
+        cached = _not_modified(revision and _page_etag("victory", revision, data.get("type"), data.get("reason")))
+        if cached is not None:
+            return cached
         logger.info(f"Displaying victory screen: {data.get('type')}")
-        return render_template("victory.html", result=data)
+        final = _game()
+        with metrics.phase("to_dict"):
+            data = dict(data, final=final.to_dict())
+        with metrics.phase("render"):
+            page = render_template("victory.html", result=data)
+        etag = _page_etag("victory", _revision(final), data.get("type"), data.get("reason"))
+        return _revalidate(make_response(page), etag)
     except Exception as e:
         logger.error(f"Error in victory route: {e}", exc_info=True)
         return redirect(url_for("index"))
 
 
+app = create_app()
+
+
 if __name__ == "__main__":
     app.run(debug=True)
@@ -0,0 +1,209 @@
+# asgi.py — ASGI entry point (FastAPI under uvicorn) for many concurrent players per node
+# - Signed-in players get a native async JSON API under /api/v1/me: the player
+#   is the JWT subject (autogpt_libs.auth.get_user_id) and their game record
+#   lives in a server-side SessionStore keyed by that id (PLAYER_STORE, same
+#   URLs as SESSION_BACKEND). Commands take well under a millisecond and run on
+#   the event loop; /hint searches and blocking store backends (sqlite, redis)
+#   go to the threadpool
+# - Every other route (pages, the cookie-session /api/v1 routes the browser
+#   client uses, /metrics) is the Flask app behind the WSGI bridge. Idle
+#   keep-alive connections cost the event loop nothing; a worker thread is only
+#   held while a request is being served, not for the life of a connection
+# - Request and response bodies match the Flask API: {ok, game_over, revision,
+#   game | patch, notices}, with a patch when X-Game-Revision names the current state.
+#   Commands are saved with a compare-and-swap and run once per Idempotency-Key,
+#   as in app._run
+# - RATE_LIMIT=1 adds autogpt_libs' rate-limit middleware (needs Redis) to /api
+#   requests that carry a bearer token: one process-wide limiter per worker, one
+#   pooled round trip per check (see bench_rate_limit.py)
+#
+# Usage:
+#   pip install -r requirements-asgi.txt
+#   JWT_VERIFY_KEY=... uvicorn asgi:app --workers 4
+#   python bench_asgi.py                 # against gunicorn + Flask at the same concurrency
+
+from __future__ import annotations
+import contextlib
+import logging
+import os
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from a2wsgi import WSGIMiddleware
+from autogpt_libs.auth import get_user_id, verify_settings
+from autogpt_libs.rate_limit.limiter import close_rate_limiter
+from autogpt_libs.rate_limit.middleware import rate_limit_middleware
+from fastapi import Depends, FastAPI, Header, HTTPException
+from flask import Flask
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+import app as flask_views
+import replay
+import session_store
+import state_diff
+from game_logic import DIFFICULTY_SETTINGS, Game, new_game as new_game_state
+
+logger = logging.getLogger(__name__)
+
+
+class ActionRequest(BaseModel):
+    type: str = ""
+    target: str = "egypt"
+
+
+class ChoiceRequest(BaseModel):
+    choice: str = ""
+
+
+class PlayerStore:
+    """Game record + result per player id on a SessionStore; blocking backends are called from the threadpool"""
+
+    def __init__(self, store: session_store.SessionStore):
+        self.store = store
+        self._inline = isinstance(store.backend, session_store.MemoryBackend)
+
+    @staticmethod
+    def _key(user_id: str) -> str:
+        return f"player:{user_id}"
+
+    async def _call(self, fn, *args):
+        return fn(*args) if self._inline else await run_in_threadpool(fn, *args)
+
+    async def load(self, user_id: str) -> Tuple[Dict[str, Any], Optional[bytes]]:
+        """The player's data and the stored bytes for compare_and_set"""
+        data, raw = await self._call(self.store.load, self._key(user_id))
+        return data or {}, raw
+
+    async def set(self, user_id: str, data: Dict[str, Any]) -> None:
+        await self._call(self.store.set, self._key(user_id), data)
+
+    async def compare_and_set(self, user_id: str, expected: Optional[bytes], data: Dict[str, Any]) -> bool:
+        return await self._call(self.store.compare_and_set, self._key(user_id), expected, data) is not None
+
+
+def _player_store(flask_app: Flask) -> PlayerStore:
+    url = os.environ.get("PLAYER_STORE") or flask_app.config.get("SESSION_BACKEND", "cookie")
+    store = session_store.store_from_url("memory" if url == "cookie" else url)
+    return PlayerStore(store)
+
+
+def create_asgi_app(flask_app: Optional[Flask] = None, players: Optional[PlayerStore] = None) -> FastAPI:
+    """FastAPI app serving /api/v1/me natively and flask_app (default: app.app) for everything else"""
+    flask_app = flask_app or flask_views.app
+    players = players or _player_store(flask_app)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(_: FastAPI):
+        verify_settings()  # fail at boot, not on the first request, if JWT_VERIFY_KEY is missing
+        yield
+        await close_rate_limiter()  # the worker's shared Redis pool, if rate limiting used it
+
+    api = FastAPI(title="Bronze Age Collapse", docs_url=None, redoc_url=None, lifespan=lifespan)
+    if os.environ.get("RATE_LIMIT", "0") != "0":
+        api.middleware("http")(rate_limit_middleware)
+
+    def revision_of(g: Game) -> str:
+        return replay.revision(g, flask_app.secret_key)
+
+    async def load(user_id: str) -> Tuple[Dict[str, Any], Optional[bytes], Game]:
+        data, raw = await players.load(user_id)
+        record = data.get("game")
+        if not record:
+            raise HTTPException(status_code=404, detail="No game yet: POST /api/v1/me/new_game/<difficulty>")
+        return data, raw, replay.rebuild(record)
+
+    async def run(user_id: str, key: Optional[str], revision: Optional[str],
+                  apply: Callable[[Game], Tuple[bool, Optional[dict]]]) -> Dict[str, Any]:
+        """app._run for player records: apply once per key, save by compare-and-swap, answer like app._api_state"""
+        key = key[:64] if key else None
+        for _ in range(flask_views.CAS_ATTEMPTS):
+            data, raw, g = await load(user_id)
+            # Same contract as app._api_before: patch only against exactly the state the client holds
+            prior = g.clone().to_dict() if revision == revision_of(g) else None
+            seen = data.get("request")
+            if key and seen and seen[0] == key:
+                ok, game_result, notices = seen[1], g._check_game_end(), []
+                break
+            log, version = g.message_log.copy(), g.version
+            with flask_app.app_context():  # metrics.phase() inside the shared helpers
+                ok, game_result = apply(g)
+            # A rejected command is not recorded: its message goes out as a notice
+            notices = replay.take_unrecorded_messages(g, log) if g.version == version else []
+            if game_result is None:
+                game_result = g._check_game_end()
+            data["game"] = replay.to_record(g, data["game"].get("base"))
+            if game_result:
+                data["victory"] = {"type": game_result["type"], "reason": game_result.get("reason")}
+            if key:
+                data["request"] = [key, ok]
+            if await players.compare_and_set(user_id, raw, data):
+                break
+        else:
+            raise HTTPException(status_code=409, detail="The game is being changed by another request; try again")
+        body: Dict[str, Any] = {"ok": ok, "game_over": game_result or None, "revision": revision_of(g)}
+        if notices:
+            body["notices"] = notices
+        state = g.to_dict()
+        if prior is None or game_result:
+            body["game"] = state  # the final state instead of a redirect once the game is over
+        else:
+            body["patch"] = state_diff.diff(prior, state)
+        return body
+
+    @api.get("/api/v1/me/game")
+    async def my_game(user_id: str = Depends(get_user_id)):
+        """Current state of the player's game → {ok, game_over, revision, game}"""
+        data, _, g = await load(user_id)
+        return {"ok": True, "game_over": data.get("victory"), "revision": revision_of(g), "game": g.to_dict()}
+
+    @api.post("/api/v1/me/new_game/{difficulty}")
+    async def my_new_game(difficulty: str, user_id: str = Depends(get_user_id)):
+        """Start over at difficulty (unknown values fall back to normal, as in /new_game)"""
+        if difficulty not in DIFFICULTY_SETTINGS:
+            difficulty = "normal"
+        g = new_game_state(difficulty)
+        await players.set(user_id, {"game": replay.to_record(g)})
+        return {"ok": True, "game_over": None, "revision": revision_of(g), "game": g.to_dict()}
+
+    @api.post("/api/v1/me/action")
+    async def my_action(body: ActionRequest, user_id: str = Depends(get_user_id),
+                        x_game_revision: Optional[str] = Header(None), idempotency_key: Optional[str] = Header(None)):
+        """Native /api/v1/action: {type, target} → {ok, game_over, revision, game | patch}"""
+        form = body.model_dump()
+        return await run(user_id, idempotency_key, x_game_revision,
+                         lambda g: (flask_views._perform_action(g, form), None))
+
+    @api.post("/api/v1/me/choice")
+    async def my_choice(body: ChoiceRequest, user_id: str = Depends(get_user_id),
+                        x_game_revision: Optional[str] = Header(None), idempotency_key: Optional[str] = Header(None)):
+        """Native /api/v1/choice: {choice: "a" | "b"} → {ok, game_over, revision, game | patch}"""
+        return await run(user_id, idempotency_key, x_game_revision,
+                         lambda g: flask_views._make_choice(g, body.choice))
+
+    @api.post("/api/v1/me/end_turn")
+    async def my_end_turn(user_id: str = Depends(get_user_id), x_game_revision: Optional[str] = Header(None),
+                          idempotency_key: Optional[str] = Header(None)):
+        """Native /api/v1/end_turn → {ok, game_over, revision, game | patch}"""
+        return await run(user_id, idempotency_key, x_game_revision, flask_views._advance_turn)
+
+    @api.get("/api/v1/me/hint")
+    async def my_hint(budget_ms: Optional[float] = None, user_id: str = Depends(get_user_id)):
+        """Native /hint: the search blocks for its budget, so it runs off the event loop"""
+        _, _, g = await load(user_id)
+        advisor = await run_in_threadpool(flask_views._advisor, flask_app)
+        budget = budget_ms or flask_app.config["HINT_BUDGET_MS"] or advisor.DEFAULT_BUDGET_MS
+        try:
+            return await run_in_threadpool(advisor.recommend, g, budget)
+        except advisor.AdvisorBusy as e:
+            raise HTTPException(status_code=503, detail=str(e))
+
+    api.mount("/", WSGIMiddleware(flask_app))
+    return api
+
+
+app = create_asgi_app()
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run("asgi:app", host="0.0.0.0", port=int(os.environ.get("PORT", "8000")))
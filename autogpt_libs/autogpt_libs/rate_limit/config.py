@@ -21,6 +21,12 @@ class RateLimitSettings(BaseSettings):
         validation_alias="REDIS_PASSWORD",
     )
 
+    redis_max_connections: int = Field(
+        default=50,
+        description="Size of the rate limiter's Redis connection pool (per process)",
+        validation_alias="RATE_LIMIT_REDIS_MAX_CONNECTIONS",
+    )
+
     requests_per_minute: int = Field(
         default=60,
         description="Maximum number of requests allowed per minute per API key",
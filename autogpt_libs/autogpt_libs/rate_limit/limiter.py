@@ -1,10 +1,45 @@
 import time
-from typing import Tuple
+import uuid
+from typing import Optional, Tuple
 
-from redis import Redis
+from redis.asyncio import ConnectionPool, Redis
 
 from .config import RATE_LIMIT_SETTINGS
 
+# Sliding one-minute window in a single atomic round trip: drop requests that left
+# the window, record this one, count what is left and refresh the key's expiry.
+SLIDING_WINDOW_SCRIPT = """
+local key = KEYS[1]
+local window_start = tonumber(ARGV[1]) - tonumber(ARGV[2])
+redis.call('ZREMRANGEBYSCORE', key, 0, window_start)
+redis.call('ZADD', key, ARGV[1], ARGV[3])
+local count = redis.call('ZCOUNT', key, window_start, ARGV[1])
+redis.call('EXPIRE', key, ARGV[2])
+return count
+"""
+
+
+def _connection_pool(
+    redis_host: str,
+    redis_port: str,
+    redis_password: str | None,
+    max_connections: int,
+) -> ConnectionPool:
+    if "://" in redis_host:  # REDIS_HOST may be a full URL (the default is one)
+        return ConnectionPool.from_url(
+            redis_host,
+            password=redis_password,
+            max_connections=max_connections,
+            decode_responses=True,
+        )
+    return ConnectionPool(
+        host=redis_host,
+        port=int(redis_port),
+        password=redis_password,
+        max_connections=max_connections,
+        decode_responses=True,
+    )
+
 
 class RateLimiter:
     def __init__(
@@ -13,15 +48,27 @@ class RateLimiter:
         redis_port: str = RATE_LIMIT_SETTINGS.redis_port,
         redis_password: str | None = RATE_LIMIT_SETTINGS.redis_password,
         requests_per_minute: int = RATE_LIMIT_SETTINGS.requests_per_minute,
+        max_connections: int = RATE_LIMIT_SETTINGS.redis_max_connections,
+        redis: Optional[Redis] = None,
     ):
-        self.redis = Redis(
-            host=redis_host,
-            port=int(redis_port),
-            password=redis_password,
-            decode_responses=True,
+        """
+        Sliding-window rate limiter on an asyncio Redis client.
+
+        Create one per process (see `get_rate_limiter`) rather than one per request:
+        the client owns a connection pool that is reused across checks.
+
+        Args:
+            redis: An existing `redis.asyncio.Redis` client to use instead of
+                connecting to `redis_host`.
+        """
+        # from_pool: the client owns the pool and disconnects it on aclose()
+        self.redis = redis or Redis.from_pool(
+            _connection_pool(redis_host, redis_port, redis_password, max_connections)
         )
         self.window = 60
         self.max_requests = requests_per_minute
+        # EVALSHA, falling back to EVAL if the server does not have the script yet
+        self._sliding_window = self.redis.register_script(SLIDING_WINDOW_SCRIPT)
 
     async def check_rate_limit(self, api_key_id: str) -> Tuple[bool, int, int]:
         """
@@ -34,18 +81,46 @@ class RateLimiter:
             Tuple of (is_allowed, remaining_requests, reset_time)
         """
         now = time.time()
-        window_start = now - self.window
         key = f"ratelimit:{api_key_id}:1min"
+        # Unique member: requests in the same microsecond must not collapse into one
+        request_id = f"{now}:{uuid.uuid4().hex}"
 
-        pipe = self.redis.pipeline()
-        pipe.zremrangebyscore(key, 0, window_start)
-        pipe.zadd(key, {str(now): now})
-        pipe.zcount(key, window_start, now)
-        pipe.expire(key, self.window)
-
-        _, _, request_count, _ = pipe.execute()
+        request_count = int(
+            await self._sliding_window(keys=[key], args=[now, self.window, request_id])
+        )
 
         remaining = max(0, self.max_requests - request_count)
         reset_time = int(now + self.window)
 
         return request_count <= self.max_requests, remaining, reset_time
+
+    async def aclose(self) -> None:
+        """Close the client and disconnect its pool."""
+        await self.redis.aclose()
+
+
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    The process-wide `RateLimiter`, created on first use.
+
+    Its connections belong to the event loop that first uses them, which is the
+    server's loop in a uvicorn worker.
+    """
+    global _rate_limiter
+
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter()
+
+    return _rate_limiter
+
+
+async def close_rate_limiter() -> None:
+    """Close the process-wide limiter (e.g. on application shutdown)."""
+    global _rate_limiter
+
+    if _rate_limiter is not None:
+        await _rate_limiter.aclose()
+        _rate_limiter = None
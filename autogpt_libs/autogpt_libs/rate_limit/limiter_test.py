@@ -0,0 +1,151 @@
+"""
+Tests for the shared sliding-window rate limiter and its middleware.
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pytest_mock import MockerFixture
+
+from autogpt_libs.rate_limit import limiter as limiter_module
+from autogpt_libs.rate_limit.limiter import (
+    SLIDING_WINDOW_SCRIPT,
+    RateLimiter,
+    close_rate_limiter,
+    get_rate_limiter,
+)
+from autogpt_libs.rate_limit.middleware import rate_limit_middleware
+
+
+class FakeAsyncRedis:
+    """Runs the sliding-window script's logic in Python and counts round trips."""
+
+    def __init__(self):
+        self.windows: dict[str, dict[str, float]] = {}
+        self.calls: list[tuple[list, list]] = []
+        self.closed = False
+
+    def register_script(self, script: str):
+        assert script == SLIDING_WINDOW_SCRIPT
+
+        async def run(keys: list, args: list):
+            self.calls.append((keys, args))
+            now, window, member = float(args[0]), float(args[1]), args[2]
+            entries = self.windows.setdefault(keys[0], {})
+            for old in [m for m, score in entries.items() if score <= now - window]:
+                del entries[old]
+            entries[member] = now
+            return sum(now - window <= score <= now for score in entries.values())
+
+        return run
+
+    async def aclose(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_redis() -> FakeAsyncRedis:
+    return FakeAsyncRedis()
+
+
+@pytest.fixture
+def limiter(fake_redis: FakeAsyncRedis) -> RateLimiter:
+    return RateLimiter(requests_per_minute=3, redis=fake_redis)  # type: ignore
+
+
+async def test_allows_up_to_the_limit(limiter: RateLimiter):
+    results = [await limiter.check_rate_limit("key-1") for _ in range(4)]
+    assert [allowed for allowed, _, _ in results] == [True, True, True, False]
+    assert [remaining for _, remaining, _ in results] == [2, 1, 0, 0]
+
+
+async def test_one_round_trip_per_check(
+    limiter: RateLimiter, fake_redis: FakeAsyncRedis
+):
+    await limiter.check_rate_limit("key-1")
+    await limiter.check_rate_limit("key-2")
+    assert len(fake_redis.calls) == 2
+    keys, args = fake_redis.calls[0]
+    assert keys == ["ratelimit:key-1:1min"]
+    assert args[1] == 60
+
+
+async def test_same_instant_requests_are_all_counted(
+    limiter: RateLimiter, mocker: MockerFixture
+):
+    mocker.patch.object(limiter_module.time, "time", return_value=1_000_000.0)
+    for _ in range(3):
+        await limiter.check_rate_limit("key-1")
+    allowed, remaining, reset_time = await limiter.check_rate_limit("key-1")
+    assert not allowed
+    assert remaining == 0
+    assert reset_time == 1_000_060
+
+
+async def test_window_slides(limiter: RateLimiter, mocker: MockerFixture):
+    clock = mocker.patch.object(limiter_module.time, "time", return_value=1000.0)
+    for _ in range(3):
+        await limiter.check_rate_limit("key-1")
+    clock.return_value = 1061.0
+    allowed, remaining, _ = await limiter.check_rate_limit("key-1")
+    assert allowed
+    assert remaining == 2
+
+
+async def test_process_wide_limiter_is_shared(
+    mocker: MockerFixture, fake_redis: FakeAsyncRedis
+):
+    mocker.patch.object(limiter_module, "_rate_limiter", None)
+    mocker.patch.object(
+        limiter_module,
+        "RateLimiter",
+        lambda: RateLimiter(redis=fake_redis),  # type: ignore
+    )
+    assert get_rate_limiter() is get_rate_limiter()
+    await close_rate_limiter()
+    assert fake_redis.closed
+    assert limiter_module._rate_limiter is None
+
+
+class TestRateLimitMiddleware:
+    """Test the middleware against a limiter on the fake client."""
+
+    @pytest.fixture
+    def client(self, mocker: MockerFixture, limiter: RateLimiter) -> TestClient:
+        mocker.patch(
+            "autogpt_libs.rate_limit.middleware.get_rate_limiter",
+            return_value=limiter,
+        )
+        app = FastAPI()
+        app.middleware("http")(rate_limit_middleware)
+
+        @app.get("/api/things")
+        def things():
+            return {"ok": True}
+
+        @app.get("/health")
+        def health():
+            return {"ok": True}
+
+        return TestClient(app)
+
+    def test_headers_on_allowed_request(self, client: TestClient):
+        response = client.get("/api/things", headers={"Authorization": "Bearer k"})
+        assert response.status_code == 200
+        assert response.headers["X-RateLimit-Limit"] == "3"
+        assert response.headers["X-RateLimit-Remaining"] == "2"
+
+    def test_429_once_exceeded(self, client: TestClient):
+        for _ in range(3):
+            client.get("/api/things", headers={"Authorization": "Bearer k"})
+        response = client.get("/api/things", headers={"Authorization": "Bearer k"})
+        assert response.status_code == 429
+        assert response.headers["X-RateLimit-Remaining"] == "0"
+
+    def test_unauthenticated_and_non_api_requests_pass(
+        self, client: TestClient, fake_redis: FakeAsyncRedis
+    ):
+        assert client.get("/api/things").status_code == 200
+        response = client.get("/health", headers={"Authorization": "Bearer k"})
+        assert response.status_code == 200
+        assert fake_redis.calls == []
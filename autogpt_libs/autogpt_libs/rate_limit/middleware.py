@@ -1,13 +1,12 @@
-from fastapi import HTTPException, Request
+from fastapi import Request
+from fastapi.responses import JSONResponse
 from starlette.middleware.base import RequestResponseEndpoint
 
-from .limiter import RateLimiter
+from .limiter import get_rate_limiter
 
 
 async def rate_limit_middleware(request: Request, call_next: RequestResponseEndpoint):
     """FastAPI middleware for rate limiting API requests."""
-    limiter = RateLimiter()
-
     if not request.url.path.startswith("/api"):
         return await call_next(request)
 
@@ -17,16 +16,24 @@ async def rate_limit_middleware(request: Request, call_next: RequestResponseEndp
 
     api_key = api_key.replace("Bearer ", "")
 
+    limiter = get_rate_limiter()
     is_allowed, remaining, reset_time = await limiter.check_rate_limit(api_key)
 
+    headers = {
+        "X-RateLimit-Limit": str(limiter.max_requests),
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Reset": str(reset_time),
+    }
     if not is_allowed:
-        raise HTTPException(
-            status_code=429, detail="Rate limit exceeded. Please try again later."
+        # An HTTPException raised in middleware bypasses the exception handlers
+        # (and becomes a 500), so answer directly
+        return JSONResponse(
+            status_code=429,
+            content={"detail": "Rate limit exceeded. Please try again later."},
+            headers=headers,
         )
 
     response = await call_next(request)
-    response.headers["X-RateLimit-Limit"] = str(limiter.max_requests)
-    response.headers["X-RateLimit-Remaining"] = str(remaining)
-    response.headers["X-RateLimit-Reset"] = str(reset_time)
+    response.headers.update(headers)
 
     return response
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Load benchmark - uvicorn + asgi.py against gunicorn + Flask at the same concurrency
+
+Both deployments run on this machine with the same number of worker processes
+and are driven by the same asyncio client: --players simulated players, each on
+its own keep-alive connection, playing turns (two actions, then the choice or
+end of turn) with --think-ms of idle time between clicks, as a real player
+would. Two workloads:
+  pages   cookie-session routes served by the Flask code on both sides (GET
+          /game + POST /api/v1/...): measures the server, not the handlers
+  api     gunicorn: cookie-session /api/v1/...; uvicorn: the native JWT API
+          under /api/v1/me (game records in a shared sqlite PLAYER_STORE)
+Reported per deployment: requests/s, p50 / p99 latency, failed requests, and the
+server's threads and resident memory at the end of the run (summed over its
+processes) - the cost of holding --players connections open.
+
+Needs requirements-asgi.txt plus gunicorn (requirements.txt) and pyjwt.
+
+Usage:
+  python bench_asgi.py                                 # 500 players, 4 workers, both workloads
+  python bench_asgi.py --players 2000 --think-ms 500 --workload api --json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import secrets
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+import jwt
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# ------------------------
+# Servers
+# ------------------------
+def start_server(kind: str, port: int, args, env: Dict[str, str]) -> subprocess.Popen:
+    if kind == "gunicorn":
+        cmd = [sys.executable, "-m", "gunicorn", "app:app", "-b", f"127.0.0.1:{port}", "-w", str(args.workers),
+               "-k", "gthread", "--threads", str(args.threads), "--worker-connections", str(args.players),
+               "--keep-alive", "75", "--log-level", "warning"]
+    else:
+        cmd = [sys.executable, "-m", "uvicorn", "asgi:app", "--host", "127.0.0.1", "--port", str(port),
+               "--workers", str(args.workers), "--timeout-keep-alive", "75", "--log-level", "warning"]
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                            start_new_session=True)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            time.sleep(1.0)  # let every worker finish booting
+            return proc
+        except OSError:
+            if proc.poll() is not None:
+                raise RuntimeError(f"{kind} exited with status {proc.returncode}")
+            time.sleep(0.1)
+    stop_server(proc)
+    raise RuntimeError(f"{kind} did not start on port {port}")
+
+
+def stop_server(proc: subprocess.Popen) -> None:
+    os.killpg(proc.pid, signal.SIGTERM)
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        os.killpg(proc.pid, signal.SIGKILL)
+
+
+def process_tree_usage(pid: int) -> Tuple[int, float]:
+    """(threads, resident MB) of pid and its children, from /proc (Linux only)"""
+    pids, threads, rss_kb = [pid], 0, 0
+    try:
+        for child in os.listdir("/proc"):
+            if child.isdigit():
+                with open(f"/proc/{child}/stat") as f:
+                    if int(f.read().rsplit(")", 1)[1].split()[1]) == pid:
+                        pids.append(int(child))
+        for p in pids:
+            with open(f"/proc/{p}/status") as f:
+                for line in f:
+                    if line.startswith("Threads:"):
+                        threads += int(line.split()[1])
+                    elif line.startswith("VmRSS:"):
+                        rss_kb += int(line.split()[1])
+    except OSError:
+        pass
+    return threads, rss_kb / 1024
+
+
+# ------------------------
+# Client: one keep-alive HTTP/1.1 connection per player
+# ------------------------
+class Connection:
+    def __init__(self, port: int):
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def _open(self) -> None:
+        self.reader, self.writer = await asyncio.open_connection("127.0.0.1", self.port)
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    async def request(self, method: str, path: str, headers: Dict[str, str],
+                      body: Optional[dict] = None) -> Tuple[int, Dict[str, str], bytes]:
+        payload = json.dumps(body).encode() if body is not None else b""
+        lines = [f"{method} {path} HTTP/1.1", "Host: 127.0.0.1", f"Content-Length: {len(payload)}"]
+        if body is not None:
+            lines.append("Content-Type: application/json")
+        lines += [f"{k}: {v}" for k, v in headers.items()]
+        raw = ("\r\n".join(lines) + "\r\n\r\n").encode() + payload
+        for attempt in (0, 1):  # the server may have closed an idle connection
+            try:
+                if self.writer is None:
+                    await self._open()
+                self.writer.write(raw)
+                return await self._response()
+            except (ConnectionError, asyncio.IncompleteReadError):
+                self.close()
+                if attempt:
+                    raise
+        raise AssertionError("unreachable")
+
+    async def _response(self) -> Tuple[int, Dict[str, str], bytes]:
+        status = int((await self.reader.readuntil(b"\r\n")).split()[1])
+        headers: Dict[str, str] = {}
+        while (line := await self.reader.readuntil(b"\r\n")) != b"\r\n":
+            name, _, value = line.decode("latin-1").partition(":")
+            name = name.strip().lower()
+            value = value.strip()
+            headers[name] = f"{headers[name]}, {value}" if name in headers and name != "set-cookie" else value
+        if headers.get("transfer-encoding") == "chunked":
+            body = b""
+            while size := int((await self.reader.readuntil(b"\r\n")).strip(), 16):
+                body += (await self.reader.readexactly(size + 2))[:-2]
+            await self.reader.readuntil(b"\r\n")
+        else:
+            body = await self.reader.readexactly(int(headers.get("content-length", 0)))
+        if headers.get("connection", "").lower() == "close":
+            self.close()
+        return status, headers, body
+
+
+class Player:
+    """Plays turns over one connection, either as a cookie-session browser or as a JWT-authenticated client"""
+
+    def __init__(self, port: int, workload: str, native: bool, token: str, latencies: List[float]):
+        self.conn = Connection(port)
+        self.workload = workload
+        self.native = native
+        self.prefix = "/api/v1/me" if native else "/api/v1"
+        self.headers = {"Authorization": f"Bearer {token}"} if native else {}
+        self.latencies = latencies
+        self.errors = 0
+
+    async def call(self, method: str, path: str, body: Optional[dict] = None) -> dict:
+        """JSON body of the response ({} for pages and failures)"""
+        started = time.perf_counter()
+        try:
+            status, headers, data = await self.conn.request(method, path, self.headers, body)
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            self.errors += 1
+            return {}
+        self.latencies.append(time.perf_counter() - started)
+        if "set-cookie" in headers:
+            self.headers["Cookie"] = headers["set-cookie"].split(";", 1)[0]
+        if status >= 400:
+            self.errors += 1
+            return {}
+        return json.loads(data) if headers.get("content-type", "").startswith("application/json") else {}
+
+    async def new_game(self) -> None:
+        if self.native:
+            await self.call("POST", "/api/v1/me/new_game/normal")
+        else:
+            await self.call("GET", "/new_game/normal")
+
+    async def play(self, stop_at: float, think: float) -> None:
+        rng = random.Random()
+        await asyncio.sleep(rng.random() * think)  # players do not all click at once
+        await self.new_game()
+        clicks = [("action", {"type": "harvest"}), ("action", {"type": "gather_timber"}), ("end_turn", {})]
+        while time.monotonic() < stop_at:
+            for name, body in clicks:
+                if self.workload == "pages":
+                    await self.call("GET", "/game")
+                data = await self.call("POST", f"{self.prefix}/{name}", body)
+                if (data.get("game") or {}).get("pending_choice"):
+                    data = await self.call("POST", f"{self.prefix}/choice", {"choice": "b"})
+                await asyncio.sleep(think * rng.uniform(0.5, 1.5))
+                if not data or data.get("game_over"):
+                    await self.new_game()
+                    break
+        self.conn.close()
+
+
+async def drive(port: int, args, workload: str, native: bool, key: str) -> Dict[str, float]:
+    latencies: List[float] = []
+    tokens = [jwt.encode({"sub": f"bench-{i}", "aud": "authenticated", "role": "authenticated"}, key,
+                         algorithm="HS256") for i in range(args.players)]
+    players = [Player(port, workload, native, tokens[i], latencies) for i in range(args.players)]
+    started = time.monotonic()
+    await asyncio.gather(*(p.play(started + args.duration, args.think_ms / 1000) for p in players))
+    elapsed = time.monotonic() - started
+    latencies.sort()
+    return {
+        "requests/s": len(latencies) / elapsed,
+        "p50 ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p99 ms": latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0.0,
+        "errors": sum(p.errors for p in players),
+    }
+
+
+def measure(kind: str, workload: str, args) -> Dict[str, float]:
+    key = secrets.token_hex(32)
+    port = free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, SECRET_KEY="bench", HINT_WORKERS="0", JWT_VERIFY_KEY=key,
+                   PLAYER_STORE=f"sqlite:///{os.path.join(tmp, 'players.db')}")
+        proc = start_server(kind, port, args, env)
+        try:
+            result = asyncio.run(drive(port, args, workload, native=(kind == "uvicorn" and workload == "api"),
+                                       key=key))
+            result["threads"], result["rss MB"] = process_tree_usage(proc.pid)
+        finally:
+            stop_server(proc)
+    return result
+
+
+METRICS = ("requests/s", "p50 ms", "p99 ms", "errors", "threads", "rss MB")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="uvicorn + asgi.py against gunicorn + Flask")
+    parser.add_argument("--players", type=int, default=500, help="concurrent players (one connection each)")
+    parser.add_argument("--workers", type=int, default=4, help="server processes, for both deployments")
+    parser.add_argument("--threads", type=int, default=8, help="gunicorn threads per worker")
+    parser.add_argument("--think-ms", type=float, default=200.0, help="mean idle time between a player's clicks")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per run")
+    parser.add_argument("--workload", choices=("pages", "api", "both"), default="both")
+    parser.add_argument("--json", action="store_true", help="emit JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    workloads = ("pages", "api") if args.workload == "both" else (args.workload,)
+    results = {w: {kind: measure(kind, w, args) for kind in ("gunicorn", "uvicorn")} for w in workloads}
+    if args.json:
+        print(json.dumps({"players": args.players, "workers": args.workers, "threads": args.threads,
+                          "think_ms": args.think_ms, "results": results}, indent=2))
+        return 0
+    for workload, by_server in results.items():
+        print(f"{workload} ({args.players} players, {args.workers} workers)")
+        print(f"  {'':<12} {'gunicorn':>10} {'uvicorn':>10}")
+        for name in METRICS:
+            print(f"  {name:<12} {by_server['gunicorn'][name]:>10.1f} {by_server['uvicorn'][name]:>10.1f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the engine and the Flask routes - fails when a case regresses
+
+Every case is timed best-of-N and divided by a fixed pure-Python calibration
+workload, so the stored baselines (bench_baseline.json) are in machine-relative
+units and survive a change of machine reasonably well. A case fails when it costs
+more than BENCH_THRESHOLD (default 1.75) times its baseline; a case over the line
+is re-timed first, since noise on a busy machine only ever makes things slower.
+A case without a baseline fails too (record it with --update / BENCH_UPDATE=1).
+
+Run explicitly (not part of the regular test run):
+  python bench_game_logic.py                  # compare against the baselines
+  python bench_game_logic.py --update         # re-record the baselines
+  BENCH_THRESHOLD=1.3 python -m pytest -q bench_game_logic.py
+"""
+
+import argparse
+import copy
+import json
+import logging
+import os
+import sys
+import timeit
+import unittest
+
+import replay
+from game_logic import ACTION_SPECS, Game, new_game
+
+try:
+    from app import app
+except ImportError:  # Flask is only needed for the route benchmarks
+    app = None
+
+logging.getLogger().setLevel(logging.WARNING)
+logging.getLogger("game_logic").setLevel(logging.WARNING)
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+THRESHOLD = float(os.environ.get("BENCH_THRESHOLD", "1.75"))
+UPDATE = os.environ.get("BENCH_UPDATE") == "1"
+REPEAT = 5
+MIN_RUN_S = 0.05
+RETRIES = 3
+
+_baselines = {}
+_measured = {}
+_unit = 0.0
+
+
+def _calibration() -> None:
+    # Attribute access, dict and string work in proportions like the engine's
+    d = {}
+    for i in range(20):
+        d[f"k{i % 17}"] = d.get(f"k{i % 17}", 0) + i
+    sorted(d.items())
+
+
+def measure(fn) -> float:
+    """Best-of-REPEAT seconds per call, each run at least MIN_RUN_S long"""
+    timer = timeit.Timer(fn)
+    number = 1
+    while timer.timeit(number) < MIN_RUN_S:
+        number *= 2
+    return min(timer.repeat(REPEAT, number)) / number
+
+
+def setUpModule():
+    global _unit, _baselines
+    _unit = min(measure(_calibration) for _ in range(3))
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, encoding="utf-8") as f:
+            _baselines = json.load(f)["cases"]
+
+
+def tearDownModule():
+    if not UPDATE or not _measured:
+        return
+    cases = dict(_baselines)
+    cases.update({name: round(cost, 4) for name, cost in _measured.items()})
+    with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+        json.dump({"unit": "calibration loops", "threshold": THRESHOLD, "cases": dict(sorted(cases.items()))},
+                  f, indent=2)
+        f.write("\n")
+
+
+def _rich_game() -> Game:
+    """Normal game with every action affordable"""
+    g = new_game("normal", seed=1177)
+    g.grain = g.bronze = g.timber = g.prestige = 200
+    g.stability = g.knowledge = 80
+    g.military = 50
+    return g
+
+
+def _mid_game() -> Game:
+    """A few turns in, so the log, summary and command log are populated"""
+    g = new_game("normal", seed=1177)
+    for _ in range(6):
+        g.harvest_free()
+        g.fortify() or g.gather_timber()
+        if g.pending_choice:
+            g.resolve_choice("b")
+        g.end_turn()
+    g.command_log = list(range(24))
+    return g
+
+
+class BenchmarkCase(unittest.TestCase):
+    """Shared timing and baseline comparison"""
+
+    def check(self, name: str, fn) -> None:
+        cost = measure(fn) / _unit
+        baseline = _baselines.get(name)
+        for _ in range(RETRIES):
+            if baseline is None or cost <= baseline * THRESHOLD:
+                break
+            cost = min(cost, measure(fn) / _unit)
+        _measured[name] = cost
+        with self.subTest(case=name):
+            if UPDATE:
+                return
+            if baseline is None:
+                self.fail(f"{name}: no baseline in {os.path.basename(BASELINE_PATH)}; record one with --update")
+            self.assertLessEqual(cost, baseline * THRESHOLD,
+                                 f"{name}: {cost:.2f} units vs baseline {baseline:.2f} (x{cost / baseline:.2f})")
+
+
+class BenchActions(BenchmarkCase):
+    """Every Game action on a fresh clone (the clone cost is its own case)"""
+
+    def test_clone(self):
+        g = _rich_game()
+        self.check("engine.clone", g.clone)
+
+    def test_each_action(self):
+        g = _rich_game()
+        for spec in ACTION_SPECS:
+            self.assertTrue(g.clone().perform(spec.code, "hatti"), spec.code)
+            self.check(f"engine.action.{spec.code}", lambda code=spec.code: g.clone().perform(code, "hatti"))
+
+
+class BenchTurn(BenchmarkCase):
+    """End of turn and its random event"""
+
+    def test_end_turn(self):
+        g = _rich_game()
+        g.harvest_free()
+        g.fortify()
+        self.assertTrue(g.clone().end_turn())
+        self.check("engine.end_turn", lambda: g.clone().end_turn())
+
+    def test_resolve_random_event(self):
+        g = _rich_game()
+        self.check("engine.resolve_random_event", lambda: g.clone().resolve_random_event())
+
+
+class BenchSerialization(BenchmarkCase):
+    """to_dict / from_dict and deepcopy on a mid-game state"""
+
+    def test_to_dict(self):
+        g = _mid_game()
+        self.check("engine.to_dict", g.to_dict)
+
+    def test_from_dict(self):
+        data = _mid_game().to_storage_dict()
+        self.check("engine.from_dict", lambda: Game.from_dict(data))
+
+    def test_deepcopy(self):
+        g = _mid_game()
+        self.check("engine.deepcopy", lambda: copy.deepcopy(g))
+
+
+@unittest.skipIf(app is None, "Flask not installed")
+class BenchRoutes(BenchmarkCase):
+    """Full Flask round trips; each request starts from the same session cookie"""
+
+    def setUp(self):
+        app.config["TESTING"] = True
+        self.client = app.test_client()
+        replay.clear_snapshots()
+        self.client.get("/new_game/normal")
+
+    def cookie(self) -> str:
+        return self.client.get_cookie(app.config["SESSION_COOKIE_NAME"]).value
+
+    def request(self, cookie: str, method: str, path: str, **kwargs):
+        def run():
+            self.client.set_cookie(app.config["SESSION_COOKIE_NAME"], cookie)
+            return getattr(self.client, method)(path, **kwargs)
+        return run
+
+    def test_game(self):
+        run = self.request(self.cookie(), "get", "/game")
+        self.assertEqual(run().status_code, 200)
+        self.check("route.game", run)
+
+    def test_action(self):
+        run = self.request(self.cookie(), "post", "/action", data={"type": "harvest"})
+        self.assertEqual(run().status_code, 302)
+        self.check("route.action", run)
+
+    def test_end_turn(self):
+        self.client.post("/action", data={"type": "harvest"})
+        self.client.post("/action", data={"type": "fortify"})
+        run = self.request(self.cookie(), "post", "/end_turn")
+        self.assertEqual(run().status_code, 302)
+        self.check("route.end_turn", run)
+
+
+def main(argv=None) -> int:
+    global UPDATE, THRESHOLD
+    parser = argparse.ArgumentParser(description="Engine and route benchmarks")
+    parser.add_argument("--update", action="store_true", help="re-record bench_baseline.json")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="allowed slowdown factor")
+    args, rest = parser.parse_known_args(argv)
+    UPDATE, THRESHOLD = UPDATE or args.update, args.threshold
+    program = unittest.main(argv=[sys.argv[0]] + rest, exit=False, verbosity=2)
+    for name, cost in sorted(_measured.items()):
+        baseline = _baselines.get(name)
+        ratio = f"x{cost / baseline:.2f}" if baseline else "new"
+        print(f"{name:<40} {cost * _unit * 1e6:>10.2f} us {cost:>10.2f} units  {ratio}")
+    return 0 if program.result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
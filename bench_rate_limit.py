@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Rate limiter benchmark - per-request sync client against the shared async limiter
+
+Drives rate-limit checks from --concurrency asyncio tasks, as concurrent API
+requests on one uvicorn worker would, against a local Redis-compatible server
+(fakeredis' TCP server in a subprocess by default, or --url for a real Redis).
+Two implementations:
+  per-request   what rate_limit_middleware used to do: a new RateLimiter (and
+                sync redis.Redis client + connection) per request, four
+                pipelined commands run on the event loop
+  shared        autogpt_libs.rate_limit.limiter: one process-wide asyncio client
+                with a connection pool, one EVALSHA per check
+Reported: checks/s, p50 / p99 check latency, and the longest event-loop stall
+(how late a 1 ms ticker task woke up), which is what every other request on the
+worker waits for while a blocking call holds the loop.
+
+Needs redis and autogpt_libs (requirements-asgi.txt), plus fakeredis[lua] for
+the default server.
+
+Usage:
+  python bench_rate_limit.py                      # 64 concurrent, 2000 checks each way
+  python bench_rate_limit.py --url redis://localhost:6379/0 --concurrency 256 --json
+"""
+
+import argparse
+import asyncio
+import json
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import redis
+import redis.asyncio
+
+from autogpt_libs.rate_limit.limiter import RateLimiter
+
+FAKE_SERVER = r"""
+import sys
+from fakeredis import TcpFakeServer
+TcpFakeServer(("127.0.0.1", int(sys.argv[1])), server_type="redis").serve_forever()
+"""
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_fake_server() -> tuple:
+    port = free_port()
+    proc = subprocess.Popen([sys.executable, "-c", FAKE_SERVER, str(port)])
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return proc, f"redis://127.0.0.1:{port}/0"
+        except OSError:
+            if proc.poll() is not None:
+                raise RuntimeError("fakeredis server exited (is fakeredis[lua] installed?)")
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError("fakeredis server did not start")
+
+
+class PerRequestLimiter:
+    """The previous limiter: a sync client per instance and a blocking pipeline inside async"""
+
+    def __init__(self, url: str, requests_per_minute: int):
+        self.redis = redis.Redis.from_url(url, decode_responses=True)
+        self.window = 60
+        self.max_requests = requests_per_minute
+
+    async def check_rate_limit(self, api_key_id: str):
+        now = time.time()
+        window_start = now - self.window
+        key = f"ratelimit:{api_key_id}:1min"
+        pipe = self.redis.pipeline()
+        pipe.zremrangebyscore(key, 0, window_start)
+        pipe.zadd(key, {str(now): now})
+        pipe.zcount(key, window_start, now)
+        pipe.expire(key, self.window)
+        _, _, request_count, _ = pipe.execute()
+        self.redis.close()  # the middleware dropped it after each request
+        return request_count <= self.max_requests, max(0, self.max_requests - request_count), int(now + 60)
+
+
+async def run(kind: str, url: str, args) -> Dict[str, float]:
+    shared: Optional[RateLimiter] = None
+    if kind == "shared":
+        shared = RateLimiter(requests_per_minute=10 ** 9, redis=redis.asyncio.Redis.from_url(
+            url, decode_responses=True, max_connections=args.pool))
+    latencies: List[float] = []
+    stall = 0.0
+    done = asyncio.Event()
+
+    async def ticker():
+        nonlocal stall
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.001)
+            stall = max(stall, time.perf_counter() - started - 0.001)
+
+    async def client(n: int):
+        for i in range(args.checks // args.concurrency):
+            limiter = shared or PerRequestLimiter(url, 10 ** 9)
+            started = time.perf_counter()
+            await limiter.check_rate_limit(f"bench-{n}-{i % 8}")
+            latencies.append(time.perf_counter() - started)
+
+    tick = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    await asyncio.gather(*(client(n) for n in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await tick
+    if shared is not None:
+        await shared.aclose()
+    latencies.sort()
+    return {
+        "checks/s": len(latencies) / elapsed,
+        "p50 ms": statistics.median(latencies) * 1000,
+        "p99 ms": latencies[int(len(latencies) * 0.99)] * 1000,
+        "max stall ms": stall * 1000,
+    }
+
+
+METRICS = ("checks/s", "p50 ms", "p99 ms", "max stall ms")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Per-request sync limiter against the shared async limiter")
+    parser.add_argument("--url", help="Redis URL (default: a fakeredis TCP server in a subprocess)")
+    parser.add_argument("--concurrency", type=int, default=64, help="concurrent checking tasks")
+    parser.add_argument("--checks", type=int, default=2000, help="checks per implementation")
+    parser.add_argument("--pool", type=int, default=50, help="shared limiter's max connections")
+    parser.add_argument("--json", action="store_true", help="emit JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    server = None
+    url = args.url
+    if url is None:
+        server, url = start_fake_server()
+    try:
+        results = {kind: asyncio.run(run(kind, url, args)) for kind in ("per-request", "shared")}
+    finally:
+        if server is not None:
+            server.kill()
+    if args.json:
+        print(json.dumps({"concurrency": args.concurrency, "checks": args.checks, "results": results}, indent=2))
+        return 0
+    print(f"{'':<14} {'per-request':>12} {'shared':>10}")
+    for name in METRICS:
+        print(f"{name:<14} {results['per-request'][name]:>12.2f} {results['shared'][name]:>10.2f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
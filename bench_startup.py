@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark - import and first-request cost of a fresh app process
+
+Each run starts a new interpreter on a fresh copy of the app (top-level modules
+and templates, like a newly deployed serverless bundle: VERCEL=1, bytecode never
+written back) and times importing Flask, game_logic and app, then the first
+/new_game + /game round trip (which compiles the templates) and a second /game
+for comparison. Two bundles are measured:
+  source        no .pyc files, no prebuilt template bytecode
+  precompiled   after precompile.py (hash-checked .pyc + prebuilt templates)
+
+Usage:
+  python bench_startup.py              # median of 5 runs per bundle
+  python bench_startup.py --runs 11 --json
+"""
+
+import argparse
+import glob
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Runs inside the fresh process; prints one JSON line of timings in ms
+CHILD = r"""
+import json, time
+t0 = time.perf_counter()
+import flask
+t1 = time.perf_counter()
+import game_logic
+t2 = time.perf_counter()
+import app as module
+t3 = time.perf_counter()
+client = module.app.test_client()
+client.get("/new_game/normal")
+assert client.get("/game").status_code == 200
+t4 = time.perf_counter()
+client.get("/game")
+t5 = time.perf_counter()
+ms = lambda a, b: round((b - a) * 1000, 2)
+print(json.dumps({"import flask": ms(t0, t1), "import game_logic": ms(t1, t2), "import app": ms(t2, t3),
+                  "first request": ms(t3, t4), "second request": ms(t4, t5), "to first response": ms(t0, t4)}))
+"""
+
+METRICS = ("import flask", "import game_logic", "import app", "first request", "second request", "to first response")
+
+
+def make_bundle(directory: str, precompiled: bool) -> None:
+    for path in glob.glob(os.path.join(ROOT, "*.py")):
+        shutil.copy2(path, directory)
+    shutil.copytree(os.path.join(ROOT, "templates"), os.path.join(directory, "templates"))
+    if precompiled:
+        subprocess.run([sys.executable, "precompile.py"], cwd=directory, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def run_once(directory: str) -> dict:
+    env = dict(os.environ, VERCEL="1", PYTHONDONTWRITEBYTECODE="1", PYTHONPATH=directory)
+    with tempfile.TemporaryDirectory() as jinja_cache:  # a new instance has an empty /tmp
+        env["JINJA_CACHE_DIR"] = jinja_cache
+        out = subprocess.run([sys.executable, "-c", CHILD], cwd=directory, env=env, check=True,
+                             stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def measure(precompiled: bool, runs: int) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        make_bundle(directory, precompiled)
+        samples = [run_once(directory) for _ in range(runs)]
+    return {name: statistics.median(s[name] for s in samples) for name in METRICS}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Cold-start import and first-request cost")
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes per bundle (median reported)")
+    parser.add_argument("--json", action="store_true", help="emit JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    results = {"source": measure(False, args.runs), "precompiled": measure(True, args.runs)}
+    if args.json:
+        print(json.dumps({"runs": args.runs, "ms": results}, indent=2))
+        return 0
+    print(f"{'median ms':<20} {'source':>10} {'precompiled':>12}")
+    for name in METRICS:
+        print(f"{name:<20} {results['source'][name]:>10.1f} {results['precompiled'][name]:>12.1f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,359 @@
+# codec.py — versioned binary encoding of game_logic.Game
+# - Compact, lossless alternative to Game.to_dict / Game.from_dict (which also
+#   truncates the message log to the last 8 entries)
+# - Header (magic + version) followed by tagged, length-prefixed sections
+# - Stats and flags are struct-packed
+# - Every distinct string is stored once in a string table (u16 lengths + one
+#   UTF-8 blob, decoded with a single call); other sections refer to strings
+#   by u16 index, so repeated levels / messages cost two bytes each
+# - Decoding skips the __post_init__ path (no logging, no throwaway GameRng)
+#
+# Schema evolution:
+#   - Unknown section tags are skipped, so older readers accept newer payloads
+#     that only add sections
+#   - Missing sections keep the Game defaults, so newer readers accept older payloads
+#   - Sections may grow at the end: readers unpack the prefix they know
+#   - A payload with a newer VERSION than the reader is rejected (CodecError)
+#
+# Usage:
+#   data = encode(game)
+#   game = decode(data)
+#   python codec.py            # benchmark against the dict + JSON path
+
+from __future__ import annotations
+import itertools
+import json
+import logging
+import struct
+import sys
+import time
+from array import array
+from typing import Any, Callable, Dict, List, Tuple
+
+from game_logic import ChoiceEvent, Game, GameRng, MessageLog, TurnSummary, new_game
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"BZ"
+VERSION = 1
+
+_HEADER = struct.Struct("<2sB")
+_SECTION = struct.Struct("<BI")  # tag, payload length
+_U32 = struct.Struct("<I")
+_I32 = struct.Struct("<i")
+# stats (STAT_NAMES order), flags, turn, max_turns, drift_per_turn,
+# withdrawals_used, max_withdrawals, free_harvest_used, paid_action_used
+_CORE = struct.Struct("<9iI5i2B")
+_RNG = struct.Struct("<qQ")  # seed, position
+# Length tables and string references are little-endian u16 arrays
+_BIG_ENDIAN = sys.byteorder == "big"
+
+# Section tags. Append-only: never reuse or renumber a tag.
+TAG_CORE = 1
+TAG_DIFFICULTY = 2
+TAG_RNG = 3
+TAG_MESSAGES = 4
+TAG_SUMMARY = 5
+TAG_CURRENT_ACTIONS = 6
+TAG_PENDING_CHOICE = 7
+TAG_COMMAND_LOG = 8
+TAG_STRINGS = 9
+
+_CHOICE_FIELDS: Tuple[str, ...] = (
+    "event_id", "title", "description",
+    "choice_a_label", "choice_a_effects", "choice_b_label", "choice_b_effects",
+)
+
+
+class CodecError(ValueError):
+    """Raised for payloads that are not (or no longer) decodable"""
+
+
+def _u16_bytes(values: List[int]) -> bytes:
+    packed = array("H", values)
+    if _BIG_ENDIAN:
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _u16_array(data: memoryview) -> array:
+    values = array("H")
+    values.frombytes(data)
+    if _BIG_ENDIAN:
+        values.byteswap()
+    return values
+
+
+# ------------------------
+# Encoding
+# ------------------------
+class _Strings:
+    """Interning string table for one payload"""
+    __slots__ = ("items", "index")
+
+    def __init__(self):
+        self.items: List[str] = []
+        self.index: Dict[str, int] = {}
+
+    def refs(self, texts: List[str]) -> bytes:
+        """u32 count + u16 string indexes"""
+        index, items = self.index, self.items
+        refs: List[int] = []
+        for text in texts:
+            i = index.get(text)
+            if i is None:
+                i = index[text] = len(items)
+                items.append(text)
+            refs.append(i)
+        return _U32.pack(len(refs)) + _u16_bytes(refs)
+
+    def pairs(self, entries: List[Dict[str, str]], first: str, second: str) -> bytes:
+        flat: List[str] = []
+        for entry in entries:
+            flat.append(entry[first])
+            flat.append(entry[second])
+        return self.refs(flat)
+
+    def table(self) -> bytes:
+        blob = "".join(self.items).encode("utf-8")
+        return b"".join((_U32.pack(len(self.items)), _u16_bytes([len(t) for t in self.items]),
+                         _U32.pack(len(blob)), blob))
+
+
+def _section(out: List[bytes], tag: int, payload: bytes) -> None:
+    out.append(_SECTION.pack(tag, len(payload)))
+    out.append(payload)
+
+
+def encode(game: Game) -> bytes:
+    """Serialize the full game state (including the whole message log and command log)"""
+    try:
+        strings = _Strings()
+        out: List[bytes] = []
+        _section(out, TAG_CORE, _CORE.pack(
+            *game.stats, game.flags, game.turn, game.max_turns, game.drift_per_turn,
+            game.withdrawals_used, game.max_withdrawals, game.free_harvest_used, game.paid_action_used,
+        ))
+        _section(out, TAG_DIFFICULTY, strings.refs([game.difficulty]))
+        _section(out, TAG_RNG, _RNG.pack(game.rng.seed, game.rng.position))
+        _section(out, TAG_MESSAGES, strings.pairs(game.message_log, "type", "text"))
+
+        summary = game.previous_turn_summary
+        if summary is not None:
+            _section(out, TAG_SUMMARY, b"".join((
+                _I32.pack(summary.turn_number),
+                strings.pairs(summary.actions, "name", "effects"),
+                strings.refs(summary.events),
+                strings.refs(summary.income),
+                strings.refs(summary.drift),
+            )))
+
+        _section(out, TAG_CURRENT_ACTIONS, strings.pairs(game.current_turn_actions, "name", "effects"))
+        if game.pending_choice is not None:
+            _section(out, TAG_PENDING_CHOICE,
+                     strings.refs([getattr(game.pending_choice, name) for name in _CHOICE_FIELDS]))
+        _section(out, TAG_COMMAND_LOG, bytes(game.command_log))
+
+        # The string table goes first so a reader can resolve references in one pass
+        head: List[bytes] = [_HEADER.pack(MAGIC, VERSION)]
+        _section(head, TAG_STRINGS, strings.table())
+        return b"".join(head + out)
+    except (struct.error, KeyError, TypeError, ValueError, OverflowError) as e:
+        raise CodecError(f"Cannot encode game: {e}") from e
+
+
+# ------------------------
+# Decoding
+# ------------------------
+class _Reader:
+    __slots__ = ("data", "pos", "strings")
+
+    def __init__(self, data: memoryview, strings: List[str]):
+        self.data = data
+        self.pos = 0
+        self.strings = strings
+
+    def unpack(self, fmt: struct.Struct) -> Tuple[Any, ...]:
+        values = fmt.unpack_from(self.data, self.pos)
+        self.pos += fmt.size
+        return values
+
+    def u16s(self) -> array:
+        (n,) = self.unpack(_U32)
+        end = self.pos + 2 * n
+        if end > len(self.data):
+            raise CodecError("Truncated u16 array")
+        values = _u16_array(self.data[self.pos:end])
+        self.pos = end
+        return values
+
+    def refs(self) -> List[str]:
+        strings = self.strings
+        return [strings[i] for i in self.u16s()]
+
+    def pairs(self, first: str, second: str) -> List[Dict[str, str]]:
+        flat = iter(self.refs())
+        return [{first: a, second: b} for a, b in zip(flat, flat)]
+
+
+def _decode_strings(data: memoryview) -> List[str]:
+    r = _Reader(data, [])
+    lengths = r.u16s()
+    (size,) = r.unpack(_U32)
+    text = str(data[r.pos:r.pos + size], "utf-8")
+    offsets = list(itertools.accumulate(lengths, initial=0))
+    if offsets[-1] != len(text):
+        raise CodecError("String table does not match its lengths")
+    return [text[a:b] for a, b in zip(offsets, offsets[1:])]
+
+
+def _decode_core(g: Game, r: _Reader) -> None:
+    values = r.unpack(_CORE)
+    g._stats = array("q", values[:9])
+    (g._flags, g.turn, g.max_turns, g.drift_per_turn,
+     g.withdrawals_used, g.max_withdrawals) = values[9:15]
+    g.free_harvest_used, g.paid_action_used = bool(values[15]), bool(values[16])
+
+
+def _decode_difficulty(g: Game, r: _Reader) -> None:
+    g.difficulty = r.refs()[0]
+
+
+def _decode_rng(g: Game, r: _Reader) -> None:
+    seed, position = r.unpack(_RNG)
+    g.rng = GameRng(seed, position)
+
+
+def _decode_messages(g: Game, r: _Reader) -> None:
+    g.message_log = MessageLog(r.pairs("type", "text"))
+
+
+def _decode_summary(g: Game, r: _Reader) -> None:
+    (turn_number,) = r.unpack(_I32)
+    g.previous_turn_summary = TurnSummary(
+        turn_number=turn_number,
+        actions=r.pairs("name", "effects"),
+        events=r.refs(),
+        income=r.refs(),
+        drift=r.refs(),
+    )
+
+
+def _decode_current_actions(g: Game, r: _Reader) -> None:
+    g.current_turn_actions = r.pairs("name", "effects")
+
+
+def _decode_pending_choice(g: Game, r: _Reader) -> None:
+    g.pending_choice = ChoiceEvent(*r.refs()[:len(_CHOICE_FIELDS)])
+
+
+def _decode_command_log(g: Game, r: _Reader) -> None:
+    g.command_log = list(r.data)
+
+
+_DECODERS: Dict[int, Callable[[Game, _Reader], None]] = {
+    TAG_CORE: _decode_core,
+    TAG_DIFFICULTY: _decode_difficulty,
+    TAG_RNG: _decode_rng,
+    TAG_MESSAGES: _decode_messages,
+    TAG_SUMMARY: _decode_summary,
+    TAG_CURRENT_ACTIONS: _decode_current_actions,
+    TAG_PENDING_CHOICE: _decode_pending_choice,
+    TAG_COMMAND_LOG: _decode_command_log,
+}
+
+
+def decode(data: bytes) -> Game:
+    """Rebuild a Game from encode() output (any VERSION up to the current one)"""
+    view = memoryview(data)
+    try:
+        magic, version = _HEADER.unpack_from(view, 0)
+        if magic != MAGIC:
+            raise CodecError("Not an encoded game (bad magic)")
+        if version > VERSION:
+            raise CodecError(f"Encoded game version {version} is newer than supported version {VERSION}")
+
+        g = Game._blank()
+        strings: List[str] = []
+        pos, end = _HEADER.size, len(view)
+        while pos < end:
+            tag, length = _SECTION.unpack_from(view, pos)
+            pos += _SECTION.size
+            if pos + length > end:
+                raise CodecError("Truncated section")
+            section = view[pos:pos + length]
+            pos += length
+            if tag == TAG_STRINGS:
+                strings = _decode_strings(section)
+                continue
+            decoder = _DECODERS.get(tag)
+            if decoder is not None:
+                decoder(g, _Reader(section, strings))
+            else:
+                logger.debug(f"Skipping unknown codec section {tag}")
+        if g.rng is None:
+            g.rng = GameRng()
+        return g
+    except CodecError:
+        raise
+    except (struct.error, UnicodeDecodeError, ValueError, TypeError, IndexError) as e:
+        raise CodecError(f"Cannot decode game: {e}") from e
+
+
+def is_encoded(data: Any) -> bool:
+    return isinstance(data, (bytes, bytearray, memoryview)) and bytes(data[:2]) == MAGIC
+
+
+# ------------------------
+# Benchmark
+# ------------------------
+def _sample_game(turns: int = 10) -> Game:
+    g = new_game("easy", seed=1177)
+    for _ in range(turns):
+        if g.pending_choice:
+            g.resolve_choice("b")
+        g.harvest_free()
+        g.gather_timber() or g.host_festival() or g.fortify()
+        g.end_turn()
+    return g
+
+
+def _time(fn: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        best = min(best, time.perf_counter() - start)
+    return best / repeat * 1e6
+
+
+def benchmark(repeat: int = 2000) -> Dict[str, float]:
+    """
+    Encode/decode cost (µs) and size (bytes) against the to_storage_dict + JSON path.
+    The dict path only keeps the last 8 messages, so the binary path is also
+    measured on a game trimmed to the same 8 messages.
+    """
+    logging.getLogger("game_logic").setLevel(logging.WARNING)
+    g = _sample_game()
+    trimmed = _sample_game()
+    trimmed.message_log = MessageLog(trimmed.message_log[-8:])
+    as_json = json.dumps(g.to_storage_dict())
+    as_bytes, trimmed_bytes = encode(g), encode(trimmed)
+    return {
+        "dict_encode_us": _time(lambda: json.dumps(g.to_storage_dict()), repeat),
+        "dict_decode_us": _time(lambda: Game.from_dict(json.loads(as_json)), repeat),
+        "binary_encode_us": _time(lambda: encode(trimmed), repeat),
+        "binary_decode_us": _time(lambda: decode(trimmed_bytes), repeat),
+        "binary_full_log_encode_us": _time(lambda: encode(g), repeat),
+        "binary_full_log_decode_us": _time(lambda: decode(as_bytes), repeat),
+        "dict_bytes": len(as_json.encode("utf-8")),
+        "binary_bytes": len(trimmed_bytes),
+        "binary_full_log_bytes": len(as_bytes),
+        "messages": len(g.message_log),
+    }
+
+
+if __name__ == "__main__":
+    for key, value in benchmark().items():
+        print(f"{key:>26}  {value:,.1f}")
@@ -7,11 +7,16 @@
 # - Imperial Bureaucracy mitigates Stability losses (-25%)
 
 from __future__ import annotations
+from array import array
 from dataclasses import dataclass, field
+import bisect
+from collections import deque
+import copy
+import itertools
 import random
 import logging
 import math
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -21,6 +26,115 @@ def clamp(v: int, lo: int = 0, hi: int = 100) -> int:
     return max(lo, min(hi, v))
 
 
+class GameRng:
+    """
+    Per-game random stream: a seed plus the number of draws consumed so far.
+    (seed, position) fully describes the stream, so it round-trips through
+    to_dict/from_dict and a replay from the same seed draws the same events.
+
+    Bulk mode (block_size > 0) pre-draws blocks of numbers for simulations;
+    the values and positions are identical to the unbuffered stream.
+    """
+
+    def __init__(self, seed: Optional[int] = None, position: int = 0, block_size: int = 0):
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(32)
+        self.seed = seed
+        self.position = 0
+        self.block_size = block_size
+        self._random = random.Random(seed)
+        self._shared = False  # _random is also another clone's generator
+        self._block: List[float] = []
+        self._index = 0
+        self.advance(position)
+
+    def random(self) -> float:
+        """Next float in [0, 1)"""
+        if self.block_size:
+            if self._index >= len(self._block):
+                r = self._own().random
+                self._block = [r() for _ in range(self.block_size)]
+                self._index = 0
+            value = self._block[self._index]
+            self._index += 1
+        else:
+            value = self._own().random()
+        self.position += 1
+        return value
+
+    def draws(self, n: int) -> List[float]:
+        """Consume n floats at once (the same values n calls to random() would return)"""
+        head = self._block[self._index:self._index + n]
+        self._index += len(head)
+        r = self._own().random
+        block = head + [r() for _ in range(n - len(head))]
+        self.position += n
+        return block
+
+    def uniform(self, a: float, b: float) -> float:
+        return a + (b - a) * self.random()
+
+    def choice(self, seq):
+        return seq[min(int(self.random() * len(seq)), len(seq) - 1)]
+
+    def advance(self, n: int) -> None:
+        """Skip n draws (used to restore a saved position)"""
+        if self.block_size:
+            for _ in range(n):
+                self.random()
+            return
+        r = self._own().random
+        for _ in range(n):
+            r()
+        self.position += n
+
+    def _own(self) -> random.Random:
+        """The generator, first copied out if clone() left it shared with another stream"""
+        if self._shared:
+            r = random.Random.__new__(random.Random)
+            r.setstate(self._random.getstate())
+            self._random, self._shared = r, False
+        return self._random
+
+    def clone(self) -> GameRng:
+        """
+        Copy-on-write copy: both streams share the generator until either one
+        draws from it. The pre-drawn block is only ever replaced, so it is shared as is.
+        """
+        clone = GameRng.__new__(GameRng)
+        clone.seed, clone.position, clone.block_size = self.seed, self.position, self.block_size
+        clone._random, clone._block, clone._index = self._random, self._block, self._index
+        clone._shared = self._shared = True
+        return clone
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> GameRng:
+        # Mersenne Twister state round-trips through getstate/setstate far faster than generic deepcopy
+        clone = GameRng.__new__(GameRng)
+        clone.seed, clone.position, clone.block_size = self.seed, self.position, self.block_size
+        clone._random = random.Random.__new__(random.Random)
+        clone._random.setstate(self._random.getstate())
+        clone._block, clone._index = list(self._block), self._index
+        clone._shared = False
+        return clone
+
+    def to_dict(self) -> Dict[str, int]:
+        return {"seed": self.seed, "position": self.position}
+
+    @staticmethod
+    def from_dict(data: Optional[Dict[str, int]]) -> GameRng:
+        if not data:
+            return GameRng()
+        return GameRng(data.get("seed"), data.get("position", 0))
+
+
+# Difficulty presets, applied on top of the Game defaults
+DIFFICULTY_SETTINGS: Dict[str, Dict[str, int]] = {
+    "easy": {"max_turns": 30, "stability": 70},
+    "normal": {},
+    "hard": {"max_turns": 16, "stability": 60, "collapse": 50},
+}
+
+
 @dataclass
 class TurnSummary:
     turn_number: int
@@ -30,9 +144,9 @@ class TurnSummary:
     drift: List[str] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(frozen=True)
 class ChoiceEvent:
-    """Represents a choice-based event that requires player decision"""
+    """Represents a choice-based event that requires player decision (immutable, so clones share it)"""
     event_id: str
     title: str
     description: str
@@ -42,90 +156,604 @@ class ChoiceEvent:
     choice_b_effects: str
 
 
-@dataclass
+# Stat order shared by Game._apply, effect vectors and the vector engine
+STAT_NAMES = (
+    "grain", "bronze", "timber", "prestige",
+    "stability", "knowledge", "elasticity", "military", "collapse",
+)
+
+
+def effect(**deltas: int) -> Tuple[int, ...]:
+    """Effect vector in STAT_NAMES order, e.g. effect(grain=-8, timber=+10)"""
+    return tuple(deltas.get(stat, 0) for stat in STAT_NAMES)
+
+
+@dataclass(frozen=True)
+class ActionSpec:
+    """Declarative description of one player action (see ACTION_SPECS)"""
+    code: str                 # code used by /action, replay logs and simulators
+    name: str                 # turn-summary name ("{target}" is the tribute target)
+    effects: str              # turn-summary effects text
+    log: str                  # success message ("{target}", "{left}" available)
+    effect: Tuple[int, ...]   # stat deltas in STAT_NAMES order
+    checks: Tuple[Tuple[Tuple[Tuple[str, int], ...], str, str], ...] = ()  # (requirements, message, level)
+    flag: Optional[str] = None      # Game flag set on success
+    once: str = ""                  # message when flag is already set ("" = repeatable)
+    counter: Optional[str] = None   # Game counter incremented on success
+    slot: str = "paid_action_used"  # per-turn slot the action consumes
+    detail_suffix: str = ""
+    level: str = "success"
+
+
+def _needs(message: str, **minimums: int) -> Tuple[Tuple[Tuple[str, int], ...], str, str]:
+    return tuple(minimums.items()), message, "danger"
+
+
+SLOT_USED_MESSAGES: Dict[str, str] = {
+    "free_harvest_used": "You already took the free Harvest this turn.",
+    "paid_action_used": "You already used your paid action this turn.",
+}
+
+ACTION_SPECS: Tuple[ActionSpec, ...] = (
+    ActionSpec("harvest", "Harvest", "+15 Grain, +10 Bronze", "✓ Harvested! +15 Grain, +10 Bronze",
+               effect(grain=+15, bronze=+10), slot="free_harvest_used"),
+    ActionSpec("gather_timber", "Gather Timber", "-8 Grain, +10 Timber", "✓ Gathered Timber! -8 Grain, +10 Timber",
+               effect(grain=-8, timber=+10),
+               checks=(_needs("✗ Not enough Grain (need 8) to Gather Timber.", grain=8),)),
+    ActionSpec("fortify", "Fortify Defenses", "-10 Bronze, +8 Military", "✓ Defenses fortified! -10 Bronze, +8 Military",
+               effect(bronze=-10, military=+8),
+               checks=(_needs("✗ Not enough Bronze (need 10) to Fortify.", bronze=10),)),
+    ActionSpec("withdraw", "Withdraw Support", "-10 Stability, +15 Collapse",
+               "⚠️ Support withdrawn ({left} left). +15 Collapse, -10 Stability",
+               effect(stability=-10, collapse=+15),
+               checks=(((("withdrawals_left", 1),), "✗ No withdrawals remaining.", "danger"),
+                       ((("stability", 45),), "✗ Withdraw locked — requires Stability ≥ 45.", "warning")),
+               counter="withdrawals_used", level="danger"),
+    ActionSpec("research_ib", "Researched Imperial Bureaucracy", "-15 Knowledge, -20 Grain, +10 Elasticity",
+               "✓ Researched Imperial Bureaucracy! Stability losses reduced 25%.",
+               effect(knowledge=-15, grain=-20, elasticity=+10),
+               checks=(_needs("✗ Insufficient resources for Imperial Bureaucracy.", knowledge=15, grain=20),),
+               flag="tech_imperial_bureaucracy"),
+    ActionSpec("research_tin_trade", "Researched Tin Trade Routes", "-25 Grain, -15 Bronze, +10 Prestige, -2 Collapse",
+               "✓ Researched Tin Trade Routes! +10 Prestige, -2 Collapse.",
+               effect(grain=-25, bronze=-15, prestige=+10, collapse=-2),
+               checks=(_needs("✗ Not enough Grain (25) and Bronze (15) for Tin Trade Routes.", grain=25, bronze=15),),
+               flag="tech_tin_trade_routes", once="✗ Tin Trade Routes already researched."),
+    ActionSpec("research_phalanx", "Researched Phalanx Formation", "-20 Bronze, +15 Military",
+               "✓ Researched Phalanx Formation! +15 Military.",
+               effect(bronze=-20, military=+15),
+               checks=(_needs("✗ Not enough Bronze (20) and Military (25) for Phalanx Formation.", bronze=20, military=25),),
+               flag="tech_phalanx_formation", once="✗ Phalanx Formation already researched."),
+    ActionSpec("research_marriage", "Researched Diplomatic Marriage", "-30 Prestige, +15 Stability, -5 Collapse",
+               "✓ Researched Diplomatic Marriage! +15 Stability, -5 Collapse.",
+               effect(prestige=-30, stability=+15, collapse=-5),
+               checks=(_needs("✗ Not enough Prestige (30) for Diplomatic Marriage.", prestige=30),),
+               flag="tech_diplomatic_marriage", once="✗ Diplomatic Marriage already researched."),
+    ActionSpec("build_mine", "Built Bronze Mine", "-20 Timber, -15 Grain → +3 Bronze/turn",
+               "✓ Bronze Mine built! +3 Bronze each turn.",
+               effect(timber=-20, grain=-15),
+               checks=(_needs("✗ Not enough Timber (20) and Grain (15) to build Bronze Mine.", timber=20, grain=15),),
+               flag="has_bronze_mine", detail_suffix=" → +3 Bronze/turn"),
+    ActionSpec("build_granary", "Built Granary", "-15 Timber, -20 Grain → +5 Grain/turn",
+               "✓ Granary built! +5 Grain each turn.",
+               effect(timber=-15, grain=-20),
+               checks=(_needs("✗ Not enough Timber (15) and Grain (20) to build Granary.", timber=15, grain=20),),
+               flag="has_granary", once="✗ Granary already built.", detail_suffix=" → +5 Grain/turn"),
+    ActionSpec("build_barracks", "Built Barracks", "-20 Timber, -25 Grain, -10 Bronze, +15 Military",
+               "✓ Barracks built! +15 Military.",
+               effect(timber=-20, grain=-25, bronze=-10, military=+15),
+               checks=(_needs("✗ Not enough Timber (20), Grain (25), and Bronze (10) to build Barracks.",
+                              timber=20, grain=25, bronze=10),),
+               flag="has_barracks", once="✗ Barracks already built."),
+    ActionSpec("build_palace", "Built Palace", "-25 Timber, -30 Grain, -15 Bronze, +20 Prestige, +10 Stability",
+               "✓ Palace built! +20 Prestige, +10 Stability.",
+               effect(timber=-25, grain=-30, bronze=-15, prestige=+20, stability=+10),
+               checks=(_needs("✗ Not enough Timber (25), Grain (30), and Bronze (15) to build Palace.",
+                              timber=25, grain=30, bronze=15),),
+               flag="has_palace", once="✗ Palace already built."),
+    ActionSpec("build_lighthouse", "Built Lighthouse", "-20 Timber, -20 Grain, +10 Prestige, -3 Collapse",
+               "✓ Lighthouse built! +10 Prestige, -3 Collapse.",
+               effect(timber=-20, grain=-20, prestige=+10, collapse=-3),
+               checks=(_needs("✗ Not enough Timber (20) and Grain (20) to build Lighthouse.", timber=20, grain=20),),
+               flag="has_lighthouse", once="✗ Lighthouse already built."),
+    ActionSpec("build_watchtower", "Built Watchtower", "-15 Timber, -15 Grain, +10 Military",
+               "✓ Watchtower built! +10 Military.",
+               effect(timber=-15, grain=-15, military=+10),
+               checks=(_needs("✗ Not enough Timber (15) and Grain (15) to build Watchtower.", timber=15, grain=15),),
+               flag="has_watchtower", once="✗ Watchtower already built."),
+    ActionSpec("send_tribute", "Sent tribute to {target}", "-15 Grain, -10 Bronze, +5 Prestige, -3 Collapse",
+               "✓ Tribute sent to {target}! +5 Prestige, -3 Collapse.",
+               effect(grain=-15, bronze=-10, prestige=+5, collapse=-3),
+               checks=(_needs("✗ Not enough Grain (15) and Bronze (10) to send tribute.", grain=15, bronze=10),)),
+    ActionSpec("form_alliance", "Formed Alliance", "-15 Prestige, +8 Stability, +5 Military, -4 Collapse",
+               "✓ Alliance formed! +8 Stability, +5 Military, -4 Collapse.",
+               effect(prestige=-15, stability=+8, military=+5, collapse=-4),
+               checks=(_needs("✗ Not enough Prestige (15) to form alliance.", prestige=15),)),
+    ActionSpec("host_festival", "Hosted Festival", "-20 Grain, +10 Stability, +8 Prestige",
+               "✓ Festival hosted! +10 Stability, +8 Prestige.",
+               effect(grain=-20, stability=+10, prestige=+8),
+               checks=(_needs("✗ Not enough Grain (20) to host festival.", grain=20),)),
+)
+ACTIONS: Dict[str, ActionSpec] = {spec.code: spec for spec in ACTION_SPECS}
+ACTION_BITS: Dict[str, int] = {spec.code: 1 << i for i, spec in enumerate(ACTION_SPECS)}
+PAID_ACTION_CODES: Tuple[str, ...] = tuple(s.code for s in ACTION_SPECS if s.slot == "paid_action_used")
+
+# ------------------------
+# Random events, compiled once at import
+# ------------------------
+NEGATIVE_CHANCE = 0.50
+POSITIVE_CHANCE = 0.30
+CHOICE_CHANCE = 0.10
+
+
+@dataclass(frozen=True)
+class EventTable:
+    """Weighted event table: cumulative weights for bisect sampling, effect vectors per entry"""
+    names: Tuple[str, ...]
+    weights: Tuple[int, ...]
+    effects: Tuple[Tuple[int, ...], ...]  # STAT_NAMES order
+    cumulative: Tuple[int, ...]
+    total: int
+
+    @classmethod
+    def compile(cls, entries: Tuple[Tuple[str, int, Tuple[int, ...]], ...]) -> "EventTable":
+        names, weights, effects = zip(*entries)
+        cumulative = tuple(itertools.accumulate(weights))
+        return cls(names, weights, effects, cumulative, cumulative[-1])
+
+    def index(self, pick: float) -> int:
+        """First entry whose cumulative weight reaches `pick` (0 ≤ pick ≤ total)"""
+        return min(bisect.bisect_left(self.cumulative, pick), len(self.cumulative) - 1)
+
+
+NEGATIVE_EVENTS = EventTable.compile((
+    ("Sea Peoples Raid",           6, effect(military=-12, stability=-9, collapse=+8)),
+    ("Trade Route Disruption",     5, effect(bronze=-10, prestige=-5, stability=-6, collapse=+6)),
+    ("Palace Conspiracy",          4, effect(stability=-15, prestige=-8, collapse=+5)),
+    ("Drought in Anatolia",        4, effect(grain=-15, stability=-7, collapse=+5)),
+    ("Vassal Rebellion",           3, effect(military=-10, stability=-11, grain=-10, collapse=+7)),
+))
+POSITIVE_EVENTS = EventTable.compile((
+    ("Diplomatic Success",         6, effect(stability=+12, prestige=+8, collapse=-4)),
+    ("Bountiful Harvest",          5, effect(grain=+20, stability=+8, collapse=-3)),
+    ("Military Victory",           4, effect(military=+12, stability=+10, collapse=-3)),
+    ("Technological Breakthrough", 3, effect(knowledge=+15, stability=+5, collapse=-2)),
+))
+
+
+@dataclass(frozen=True)
+class ChoiceOutcome:
+    """How a choice event resolves: option A pays a cost outside _apply, option B does not"""
+    event_id: str
+    factory: str          # Game method that builds the ChoiceEvent
+    cost_stat: str
+    cost: int
+    shortfall: str        # message when the cost can't be paid
+    a_effect: Tuple[int, ...]
+    a_result: str
+    b_effect: Tuple[int, ...]
+    b_result: str
+
+
+# In the order _trigger_choice_event draws them
+CHOICE_EVENTS: Tuple[ChoiceOutcome, ...] = (
+    ChoiceOutcome("vassal_aid", "_create_vassal_aid_choice", "grain", 20, "Insufficient Grain to send aid!",
+                  effect(prestige=+8, stability=+5, collapse=-2), "Sent Aid",
+                  effect(prestige=-10, stability=-8, collapse=+3), "Refused"),
+    ChoiceOutcome("hittite_trade", "_create_hittite_trade_choice", "timber", 15, "Insufficient Timber for trade!",
+                  effect(bronze=+12, prestige=+5, collapse=-1), "Accepted Trade",
+                  effect(prestige=-3), "Declined"),
+    ChoiceOutcome("refugee_crisis", "_create_refugee_crisis_choice", "grain", 12,
+                  "Insufficient Grain to welcome refugees!",
+                  effect(stability=+10, military=+6, collapse=-2), "Welcomed Refugees",
+                  effect(stability=-12, military=+3, collapse=+4), "Turned Away"),
+)
+CHOICE_OUTCOMES: Dict[str, ChoiceOutcome] = {c.event_id: c for c in CHOICE_EVENTS}
+_CHOICE_FACTORIES: Tuple[str, ...] = tuple(c.factory for c in CHOICE_EVENTS)
+
+
+# ------------------------
+# Message log: (code, args) records, rendered to text only when read
+# ------------------------
+MESSAGE_LOG_CAPACITY = 32
+
+# Message code → (level, template); codes are assigned at import and only live in memory
+MESSAGE_TEMPLATES: List[Tuple[str, str]] = []
+_MESSAGE_CODES: Dict[Tuple[str, str], int] = {}
+
+
+def message_code(level: str, template: str) -> int:
+    """Code for a (level, template) pair, registering it on first use"""
+    key = (level, template)
+    code = _MESSAGE_CODES.get(key)
+    if code is None:
+        code = _MESSAGE_CODES[key] = len(MESSAGE_TEMPLATES)
+        MESSAGE_TEMPLATES.append(key)
+    return code
+
+
+def render_message(record: Tuple[int, Tuple[Any, ...]]) -> Dict[str, str]:
+    """{"type", "text"} dict for a (code, args) record"""
+    code, args = record
+    level, template = MESSAGE_TEMPLATES[code]
+    return {"type": level, "text": template.format(*args) if args else template}
+
+
+def text_code(level: str) -> int:
+    """Code for free-form text (the text is the record's only arg)"""
+    return message_code(level, "{0}")
+
+
+MSG_CRISIS = message_code("danger", "✗ CRISIS: {0} — {1}")
+MSG_POSITIVE_EVENT = message_code("success", "✓ POSITIVE EVENT: {0} — {1}")
+MSG_CHOICE_EVENT = message_code("warning", "⚠️ CHOICE EVENT: {0}")
+MSG_CHOICE_A = message_code("success", "✓ {0}: {1}")
+MSG_CHOICE_B = message_code("warning", "✓ {0}: {1}")
+MSG_HARVEST_FIRST = message_code("warning", "Take the FREE Harvest before ending your turn.")
+MSG_PAID_ACTION_LEFT = message_code("warning", "You still have one paid action this turn.")
+SLOT_USED_CODES: Dict[str, int] = {slot: message_code("warning", text) for slot, text in SLOT_USED_MESSAGES.items()}
+
+
+@dataclass(frozen=True)
+class ActionMessages:
+    """Message codes for one ActionSpec; success args are (target, withdrawals left)"""
+    success: int
+    once: int
+    checks: Tuple[int, ...]  # parallel to ActionSpec.checks
+
+
+ACTION_MESSAGES: Dict[str, ActionMessages] = {
+    spec.code: ActionMessages(
+        message_code(spec.level, spec.log.format(target="{0}", left="{1}")),
+        message_code("warning", spec.once),
+        tuple(message_code(level, message) for _, message, level in spec.checks),
+    )
+    for spec in ACTION_SPECS
+}
+CHOICE_SHORTFALL_CODES: Dict[str, int] = {c.event_id: message_code("danger", c.shortfall) for c in CHOICE_EVENTS}
+
+
+class MessageLog:
+    """
+    Game messages as (code, args) records in a fixed-capacity ring buffer: once
+    full, each new message drops the oldest. Reading renders records to the
+    {"type", "text"} dicts templates, to_dict() and the codec expect, so the log
+    indexes, slices, iterates and compares like the old list of dicts.
+    capacity=0 keeps nothing (simulations); Game skips building records then.
+    """
+    __slots__ = ("_records",)
+    __hash__ = None  # mutable, compared by value
+
+    def __init__(self, entries: Iterable[Dict[str, str]] = (), capacity: int = MESSAGE_LOG_CAPACITY):
+        self._records: deque = deque(((text_code(e["type"]), (e["text"],)) for e in entries), maxlen=capacity)
+
+    @property
+    def capacity(self) -> int:
+        return self._records.maxlen
+
+    def add(self, code: int, args: Tuple[Any, ...] = ()) -> None:
+        self._records.append((code, args))
+
+    def append(self, entry: Dict[str, str]) -> None:
+        """Append an already-rendered {"type", "text"} message"""
+        self._records.append((text_code(entry["type"]), (entry["text"],)))
+
+    def records(self) -> List[Tuple[int, Tuple[Any, ...]]]:
+        return list(self._records)
+
+    def copy(self) -> MessageLog:
+        log = MessageLog.__new__(MessageLog)
+        log._records = self._records.copy()  # records are immutable tuples
+        return log
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        return map(render_message, self._records)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Dict[str, str], List[Dict[str, str]]]:
+        if isinstance(index, slice):
+            records = self._records
+            return [render_message(records[i]) for i in range(*index.indices(len(records)))]
+        return render_message(self._records[index])
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (MessageLog, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"MessageLog({list(self)!r}, capacity={self.capacity})"
+
+
+# Stat defaults (STAT_NAMES order); stability..collapse are clamped to 0-100
+STAT_DEFAULTS: Tuple[int, ...] = (50, 30, 20, 10, 65, 40, 50, 30, 45)
+CLAMPED_STATS = frozenset(STAT_NAMES[4:])
+
+# Tech/build flags, packed into Game._flags (bit i = FLAG_NAMES[i])
+FLAG_NAMES: Tuple[str, ...] = (
+    "tech_imperial_bureaucracy", "tech_bronze_mines", "tech_granary_network",
+    "tech_alphabetic_script", "tech_ironworking", "tech_diplomatic_protocols",
+    "tech_tin_trade_routes", "tech_phalanx_formation", "tech_diplomatic_marriage",
+    "has_granary", "has_library", "has_walls", "has_bronze_mine", "has_barracks",
+    "has_palace", "has_lighthouse", "has_watchtower",
+)
+FLAG_BITS: Dict[str, int] = {name: 1 << i for i, name in enumerate(FLAG_NAMES)}
+
+# Requirement operands: the stats array plus the derived withdrawal allowance (index 9)
+_OPERANDS: Tuple[str, ...] = STAT_NAMES + ("withdrawals_left",)
+
+# Flattened legality checks for Game.legal_actions: (bit, slot, once-flag bit, (operand index, minimum)...)
+_LEGALITY: Tuple[Tuple[int, str, int, Tuple[Tuple[int, int], ...]], ...] = tuple(
+    (ACTION_BITS[s.code], s.slot, FLAG_BITS[s.flag] if s.once else 0,
+     tuple((_OPERANDS.index(stat), minimum) for requires, _, _ in s.checks for stat, minimum in requires))
+    for s in ACTION_SPECS
+)
+
+# Constructor fields in their original (dataclass) order; rng / command_log are not compared or shown
+_SCALAR_FIELDS: Tuple[str, ...] = (
+    "turn", "max_turns", "drift_per_turn", "difficulty",
+    "free_harvest_used", "paid_action_used", "withdrawals_used", "max_withdrawals",
+    "message_log", "previous_turn_summary", "current_turn_actions", "pending_choice",
+)
+GAME_FIELDS: Tuple[str, ...] = STAT_NAMES + _SCALAR_FIELDS[:4] + FLAG_NAMES + _SCALAR_FIELDS[4:]
+# Stored in private slots behind copy-on-write properties (see Game.clone)
+_COW_FIELDS: Tuple[str, ...] = ("message_log", "previous_turn_summary", "current_turn_actions", "command_log")
+
+
+def _stat_property(index: int) -> property:
+    def get(self: Game) -> int:
+        return self._stats[index]
+
+    def set(self: Game, value: int) -> None:
+        self._stats[index] = value
+    return property(get, set)
+
+
+def _flag_property(bit: int) -> property:
+    def get(self: Game) -> bool:
+        return bool(self._flags & bit)
+
+    def set(self: Game, value: bool) -> None:
+        if value:
+            self._flags |= bit
+        else:
+            self._flags &= ~bit
+    return property(get, set)
+
+
+# Copy-on-write fields: clone() shares them and sets their bit in _cow on both games;
+# the first read through either game after that takes a private copy
+COW_MESSAGES, COW_SUMMARY, COW_ACTIONS, COW_COMMANDS = 1, 2, 4, 8
+COW_ALL = COW_MESSAGES | COW_SUMMARY | COW_ACTIONS | COW_COMMANDS
+_COW_SLOTS: Tuple[str, ...] = ("_messages", "_summary", "_actions", "_commands")
+
+
+def _copy_summary(s: Optional[TurnSummary]) -> Optional[TurnSummary]:
+    return s and TurnSummary(
+        s.turn_number, [dict(a) for a in s.actions], list(s.events), list(s.income), list(s.drift))
+
+
+def _cow_property(slot: str, bit: int, copier: Callable[[Any], Any]) -> property:
+    # Any read may be followed by a mutation (game.command_log.append), so reads copy too
+    def get(self: Game) -> Any:
+        if self._cow & bit:
+            setattr(self, slot, copier(getattr(self, slot)))
+            self._cow &= ~bit
+        return getattr(self, slot)
+
+    def set(self: Game, value: Any) -> None:
+        setattr(self, slot, value)
+        self._cow &= ~bit
+    return property(get, set)
+
+
 class Game:
-    # Core resources / metrics
-    grain: int = 50
-    bronze: int = 30
-    timber: int = 20
-    prestige: int = 10  # (luxuries in the CLI build — named 'prestige' here)
-    stability: int = 65
-    knowledge: int = 40
-    elasticity: int = 50
-    military: int = 30
-    collapse: int = 45
-
-    # Progress
-    turn: int = 1
-    max_turns: int = 20
-    drift_per_turn: int = 3
-    difficulty: str = "normal"  # Track difficulty level
-
-    # Tech/build flags (simple booleans so UI can reflect state)
-    tech_imperial_bureaucracy: bool = False
-    tech_bronze_mines: bool = False
-    tech_granary_network: bool = False
-    tech_alphabetic_script: bool = False
-    tech_ironworking: bool = False
-    tech_diplomatic_protocols: bool = False
-    tech_tin_trade_routes: bool = False
-    tech_phalanx_formation: bool = False
-    tech_diplomatic_marriage: bool = False
-
-    # Build flags
-    has_granary: bool = False
-    has_library: bool = False
-    has_walls: bool = False
-    has_bronze_mine: bool = False
-    has_barracks: bool = False
-    has_palace: bool = False
-    has_lighthouse: bool = False
-    has_watchtower: bool = False
-
-    # Per-turn economy: FREE harvest + ONE paid action
-    free_harvest_used: bool = False
-    paid_action_used: bool = False
-
-    # Withdraw (vacuum push)
-    withdrawals_used: int = 0
-    max_withdrawals: int = 3
-
-    # Messaging for UI
-    message_log: List[Dict[str, str]] = field(default_factory=list)
-    previous_turn_summary: Optional[TurnSummary] = None
-    current_turn_actions: List[Dict[str, str]] = field(default_factory=list)
-
-    # Choice events
-    pending_choice: Optional[ChoiceEvent] = None
-    
+    """
+    One game's state. Compact layout for holding many live games at once:
+    __slots__ instead of a per-instance dict, the nine stats in a fixed-layout
+    int array (STAT_NAMES order) and the 17 tech/build flags in one int
+    bitmask (FLAG_NAMES order). Every stat and flag is still readable and
+    writable as an attribute (game.grain, game.has_granary), so templates,
+    to_dict() and callers are unchanged.
+    """
+    __slots__ = (("_stats", "_flags", "_cow") + tuple(f for f in _SCALAR_FIELDS if f not in _COW_FIELDS)
+                 + _COW_SLOTS + ("rng", "quiet"))
+    __hash__ = None  # mutable, compared by value
+
+    def __init__(self,
+                 # Core resources / metrics
+                 grain: int = 50, bronze: int = 30, timber: int = 20,
+                 prestige: int = 10,  # (luxuries in the CLI build — named 'prestige' here)
+                 stability: int = 65, knowledge: int = 40, elasticity: int = 50,
+                 military: int = 30, collapse: int = 45,
+                 # Progress
+                 turn: int = 1, max_turns: int = 20, drift_per_turn: int = 3,
+                 difficulty: str = "normal",  # Track difficulty level
+                 # Tech/build flags (simple booleans so UI can reflect state)
+                 tech_imperial_bureaucracy: bool = False, tech_bronze_mines: bool = False,
+                 tech_granary_network: bool = False, tech_alphabetic_script: bool = False,
+                 tech_ironworking: bool = False, tech_diplomatic_protocols: bool = False,
+                 tech_tin_trade_routes: bool = False, tech_phalanx_formation: bool = False,
+                 tech_diplomatic_marriage: bool = False,
+                 # Build flags
+                 has_granary: bool = False, has_library: bool = False, has_walls: bool = False,
+                 has_bronze_mine: bool = False, has_barracks: bool = False, has_palace: bool = False,
+                 has_lighthouse: bool = False, has_watchtower: bool = False,
+                 # Per-turn economy: FREE harvest + ONE paid action
+                 free_harvest_used: bool = False, paid_action_used: bool = False,
+                 # Withdraw (vacuum push)
+                 withdrawals_used: int = 0, max_withdrawals: int = 3,
+                 # Messaging for UI
+                 message_log: Optional[List[Dict[str, str]]] = None,
+                 previous_turn_summary: Optional[TurnSummary] = None,
+                 current_turn_actions: Optional[List[Dict[str, str]]] = None,
+                 # Choice events
+                 pending_choice: Optional[ChoiceEvent] = None,
+                 # Per-game random stream (seeded from the OS when not given)
+                 rng: Optional[GameRng] = None,
+                 # Commands executed so far (replay.py codes; seed + difficulty + this log rebuild the game)
+                 command_log: Optional[List[int]] = None,
+                 # Messages kept in the ring buffer (0 = keep none, for simulations)
+                 message_capacity: int = MESSAGE_LOG_CAPACITY,
+                 # Sim mode: skip messages, turn summaries and logging; numbers and rng draws are unchanged
+                 quiet: bool = False):
+        self._stats = array("q", (grain, bronze, timber, prestige, stability,
+                                  knowledge, elasticity, military, collapse))
+        self._flags = self._cow = 0
+        for name, value in (
+            ("tech_imperial_bureaucracy", tech_imperial_bureaucracy), ("tech_bronze_mines", tech_bronze_mines),
+            ("tech_granary_network", tech_granary_network), ("tech_alphabetic_script", tech_alphabetic_script),
+            ("tech_ironworking", tech_ironworking), ("tech_diplomatic_protocols", tech_diplomatic_protocols),
+            ("tech_tin_trade_routes", tech_tin_trade_routes), ("tech_phalanx_formation", tech_phalanx_formation),
+            ("tech_diplomatic_marriage", tech_diplomatic_marriage), ("has_granary", has_granary),
+            ("has_library", has_library), ("has_walls", has_walls), ("has_bronze_mine", has_bronze_mine),
+            ("has_barracks", has_barracks), ("has_palace", has_palace), ("has_lighthouse", has_lighthouse),
+            ("has_watchtower", has_watchtower),
+        ):
+            if value:
+                self._flags |= FLAG_BITS[name]
+        self.turn = turn
+        self.max_turns = max_turns
+        self.drift_per_turn = drift_per_turn
+        self.difficulty = difficulty
+        self.free_harvest_used = free_harvest_used
+        self.paid_action_used = paid_action_used
+        self.withdrawals_used = withdrawals_used
+        self.max_withdrawals = max_withdrawals
+        self.quiet = quiet
+        self.message_log = MessageLog(message_log or (), 0 if quiet else message_capacity)
+        self.previous_turn_summary = previous_turn_summary
+        self.current_turn_actions = [] if current_turn_actions is None else current_turn_actions
+        self.pending_choice = pending_choice
+        self.rng = rng
+        self.command_log = [] if command_log is None else command_log
+        self.__post_init__()
+
     def __post_init__(self):
         """Validate game state after initialization"""
         try:
-            logger.info("Initializing new Game instance")
-            # Validate initial state (using object.__setattr__ for dataclass fields)
+            if not self.quiet:
+                logger.info("Initializing new Game instance")
+            if self.rng is None:
+                self.rng = GameRng()
+            # Validate initial state
             if self.turn < 1:
                 logger.warning("Turn was less than 1, resetting to 1")
-                object.__setattr__(self, 'turn', 1)
+                self.turn = 1
             if self.max_turns < 1:
                 logger.warning("max_turns was less than 1, resetting to 20")
-                object.__setattr__(self, 'max_turns', 20)
+                self.max_turns = 20
             # Initialize turn summary at game start
             self._start_turn_summary()
-            logger.info(f"Game initialized: turn {self.turn}/{self.max_turns}")
+            if not self.quiet:
+                logger.info(f"Game initialized: turn {self.turn}/{self.max_turns}")
         except Exception as e:
             logger.error(f"Error in Game.__post_init__: {e}", exc_info=True)
 
+    @classmethod
+    def _blank(cls) -> Game:
+        """
+        Default-valued game without __post_init__ (no INFO logging, no OS-seeded
+        GameRng); used by decoders that overwrite every field. Callers set rng.
+        """
+        g = cls.__new__(cls)
+        g._stats = array("q", STAT_DEFAULTS)
+        g._flags = g._cow = 0
+        g.turn, g.max_turns, g.drift_per_turn, g.difficulty = 1, 20, 3, "normal"
+        g.free_harvest_used = g.paid_action_used = False
+        g.withdrawals_used, g.max_withdrawals = 0, 3
+        g.message_log = MessageLog()
+        g.previous_turn_summary = TurnSummary(turn_number=1)
+        g.current_turn_actions = []
+        g.pending_choice = None
+        g.rng = None
+        g.quiet = False
+        g.command_log = []
+        return g
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in GAME_FIELDS)
+
+    def __repr__(self) -> str:
+        return f"Game({', '.join(f'{name}={getattr(self, name)!r}' for name in GAME_FIELDS)})"
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> Game:
+        # Field-by-field copy: log entries are flat str dicts, summaries hold lists of those
+        g = Game.__new__(Game)
+        g._stats = array("q", self._stats)
+        g._flags, g._cow = self._flags, 0
+        g.turn, g.max_turns, g.drift_per_turn, g.difficulty = (
+            self.turn, self.max_turns, self.drift_per_turn, self.difficulty)
+        g.free_harvest_used, g.paid_action_used = self.free_harvest_used, self.paid_action_used
+        g.withdrawals_used, g.max_withdrawals = self.withdrawals_used, self.max_withdrawals
+        g.message_log = self.message_log.copy()
+        g.previous_turn_summary = _copy_summary(self.previous_turn_summary)
+        g.current_turn_actions = [dict(a) for a in self.current_turn_actions]
+        g.pending_choice = copy.copy(self.pending_choice)
+        g.rng = copy.deepcopy(self.rng, memo)
+        g.quiet = self.quiet
+        g.command_log = list(self.command_log)
+        return g
+
+    def clone(self) -> Game:
+        """
+        Exact, independent copy for search, what-if previews and undo. Stats and
+        flags are copied; the log and summary lists and the rng's generator are
+        shared copy-on-write, so each is copied only if one of the two games
+        touches it again. References taken before clone() are not tracked:
+        re-read game.message_log etc. after cloning rather than holding on to them.
+        """
+        g = Game.__new__(Game)
+        g._stats = array("q", self._stats)
+        g._flags = self._flags
+        g.turn, g.max_turns, g.drift_per_turn, g.difficulty = (
+            self.turn, self.max_turns, self.drift_per_turn, self.difficulty)
+        g.free_harvest_used, g.paid_action_used = self.free_harvest_used, self.paid_action_used
+        g.withdrawals_used, g.max_withdrawals = self.withdrawals_used, self.max_withdrawals
+        g._messages, g._summary, g._actions, g._commands = (
+            self._messages, self._summary, self._actions, self._commands)
+        g._cow = self._cow = COW_ALL
+        g.pending_choice = self.pending_choice  # frozen
+        g.rng = self.rng.clone()
+        g.quiet = self.quiet
+        return g
+
+    @property
+    def stats(self) -> Tuple[int, ...]:
+        """The nine stats in STAT_NAMES order"""
+        return tuple(self._stats)
+
+    @property
+    def flags(self) -> int:
+        """Tech/build flags as a bitmask (see FLAG_BITS)"""
+        return self._flags
+
+    @property
+    def version(self) -> int:
+        """State version: commands recorded so far (grows with every replay.execute; see replay.revision)"""
+        return len(self._commands)
+
     # ------------------------
     # Utility / logging
     # ------------------------
     def _log(self, text: str, level: str = "info") -> None:
-        """Add a message to the game log"""
+        """Add a free-form message to the game log"""
         try:
-            self.message_log.append({"type": level, "text": text})
+            self._say(text_code(level), text)
             logger.debug(f"Game log [{level}]: {text}")
         except Exception as e:
             logger.error(f"Error in _log: {e}", exc_info=True)
 
+    def _say(self, code: int, *args: Any) -> None:
+        """Add a coded message (see MESSAGE_TEMPLATES); args are formatted only when the log is read"""
+        log = self.message_log
+        if log.capacity:
+            log.add(code, args)
+
     def _start_turn_summary(self) -> None:
         self.previous_turn_summary = TurnSummary(turn_number=self.turn)
 
@@ -159,19 +787,22 @@ class Game:
                d_grain: int = 0, d_bronze: int = 0, d_timber: int = 0, d_prestige: int = 0,
                d_stab: int = 0, d_know: int = 0, d_elast: int = 0, d_mil: int = 0, d_col: int = 0) -> str:
 
-        if self.tech_imperial_bureaucracy and d_stab < 0:
+        if d_stab < 0 and self._flags & FLAG_BITS["tech_imperial_bureaucracy"]:
             # Apply 25% reduction, then ceil rounds negative values up (e.g., -7.5 → -7, -10 → -10)
             d_stab = math.ceil(d_stab * 0.75)
 
-        self.grain += d_grain
-        self.bronze += d_bronze
-        self.timber += d_timber
-        self.prestige += d_prestige
-        self.stability = clamp(self.stability + d_stab)
-        self.knowledge = clamp(self.knowledge + d_know)
-        self.elasticity = clamp(self.elasticity + d_elast)
-        self.military = clamp(self.military + d_mil)
-        self.collapse = clamp(self.collapse + d_col)
+        s = self._stats
+        s[0] += d_grain
+        s[1] += d_bronze
+        s[2] += d_timber
+        s[3] += d_prestige
+        s[4] = clamp(s[4] + d_stab)
+        s[5] = clamp(s[5] + d_know)
+        s[6] = clamp(s[6] + d_elast)
+        s[7] = clamp(s[7] + d_mil)
+        s[8] = clamp(s[8] + d_col)
+        if self.quiet:
+            return ""
 
         parts: List[str] = []
         if d_grain: parts.append(f"Grain {d_grain:+}")
@@ -188,281 +819,112 @@ class Game:
     # ------------------------
     # Actions (return bool for “performed” so caller won’t advance turn on False)
     # ------------------------
-    def harvest_free(self) -> bool:
-        if self.free_harvest_used:
-            self._log("You already took the free Harvest this turn.", "warning")
-            return False
-        detail = self._apply(d_grain=+15, d_bronze=+10)
-        self._add_action_summary("Harvest", detail)
-        self._add_current_turn_action("Harvest", "+15 Grain, +10 Bronze")
-        self.free_harvest_used = True
-        self._log("✓ Harvested! +15 Grain, +10 Bronze", "success")
-        return True
+    def perform(self, code: str, target: str = "egypt") -> bool:
+        """Dispatch an action by its code (see ACTIONS)"""
+        return self._perform(ACTIONS[code], target)
 
-    def gather_timber(self) -> bool:
-        # Paid action
-        if self.paid_action_used:
-            self._log("You already used your paid action this turn.", "warning")
+    def _perform(self, spec: ActionSpec, target: str = "") -> bool:
+        """Shared check-cost / apply / flag path for every registered action"""
+        if getattr(self, spec.slot):
+            self._say(SLOT_USED_CODES[spec.slot])
             return False
-        if self.grain < 8:
-            self._log("✗ Not enough Grain (need 8) to Gather Timber.", "danger")
+        messages = ACTION_MESSAGES[spec.code]
+        if spec.once and getattr(self, spec.flag):
+            self._say(messages.once)
             return False
-        detail = self._apply(d_grain=-8, d_timber=+10)
-        self._add_action_summary("Gather Timber", detail)
-        self._add_current_turn_action("Gather Timber", "-8 Grain, +10 Timber")
-        self.paid_action_used = True
-        self._log("✓ Gathered Timber! -8 Grain, +10 Timber", "success")
+        for (requires, _, _), check_code in zip(spec.checks, messages.checks):
+            for stat, minimum in requires:
+                if getattr(self, stat) < minimum:
+                    self._say(check_code)
+                    return False
+        detail = self._apply(*spec.effect)
+        if spec.flag:
+            setattr(self, spec.flag, True)
+        if spec.counter:
+            setattr(self, spec.counter, getattr(self, spec.counter) + 1)
+        setattr(self, spec.slot, True)
+        if not self.quiet:
+            name = spec.name.format(target=target.capitalize())
+            self._add_action_summary(name, detail + spec.detail_suffix)
+            self._add_current_turn_action(name, spec.effects)
+            self._say(messages.success, target.capitalize(), self.withdrawals_left)
         return True
 
+    def legal_actions(self) -> int:
+        """Bitmask of actions that would succeed right now (bit i = ACTION_SPECS[i])"""
+        values = self._stats.tolist()
+        values.append(self.max_withdrawals - self.withdrawals_used)
+        flags, mask = self._flags, 0
+        for bit, slot, once_bit, requires in _LEGALITY:
+            if flags & once_bit or getattr(self, slot):
+                continue
+            for operand, minimum in requires:
+                if values[operand] < minimum:
+                    break
+            else:
+                mask |= bit
+        return mask
+
+    def legal_action_codes(self) -> List[str]:
+        """Codes of the actions legal_actions() allows, in ACTION_SPECS order"""
+        mask = self.legal_actions()
+        return [spec.code for spec in ACTION_SPECS if mask & ACTION_BITS[spec.code]]
+
+    @property
+    def withdrawals_left(self) -> int:
+        return self.max_withdrawals - self.withdrawals_used
+
+    def harvest_free(self) -> bool:
+        return self._perform(ACTIONS["harvest"])
+
+    def gather_timber(self) -> bool:
+        return self._perform(ACTIONS["gather_timber"])
+
     def fortify(self) -> bool:
-        if self.paid_action_used:
-            self._log("You already used your paid action this turn.", "warning")
-            return False
-        if self.bronze < 10:
-            self._log("✗ Not enough Bronze (need 10) to Fortify.", "danger")
-            return False
-        detail = self._apply(d_bronze=-10, d_mil=+8)
-        self._add_action_summary("Fortify Defenses", detail)
-        self._add_current_turn_action("Fortify Defenses", "-10 Bronze, +8 Military")
-        self.paid_action_used = True
-        self._log("✓ Defenses fortified! -10 Bronze, +8 Military", "success")
-        return True
+        return self._perform(ACTIONS["fortify"])
 
     def withdraw_support(self) -> bool:
-        if self.paid_action_used:
-            self._log("You already used your paid action this turn.", "warning")
-            return False
-        if self.withdrawals_used >= self.max_withdrawals:
-            self._log("✗ No withdrawals remaining.", "danger")
-            return False
-        if self.stability < 45:
-            self._log("✗ Withdraw locked — requires Stability ≥ 45.", "warning")
-            return False
-        detail = self._apply(d_stab=-10, d_col=+15)
-        self.withdrawals_used += 1
-        self._add_action_summary("Withdraw Support", detail)
-        self._add_current_turn_action("Withdraw Support", "-10 Stability, +15 Collapse")
-        self.paid_action_used = True
-        self._log(f"⚠️ Support withdrawn ({self.max_withdrawals - self.withdrawals_used} left). +15 Collapse, -10 Stability", "danger")
-        return True
+        return self._perform(ACTIONS["withdraw"])
 
     # Minimal tech/build hooks (keep names your UI expects)
     def research_imperial_bureaucracy(self) -> bool:
-        if self.paid_action_used:
-            self._log("You already used your paid action this turn.", "warning")
-            return False
-        # Example cost: 15 Knowledge, 20 Grain
-        if self.knowledge < 15 or self.grain < 20:
-            self._log("✗ Insufficient resources for Imperial Bureaucracy.", "danger")
-            return False
-        detail = self._apply(d_know=-15, d_grain=-20, d_elast=+10)
-        self.tech_imperial_bureaucracy = True
-        self._add_action_summary("Researched Imperial Bureaucracy", detail)
-        self._add_current_turn_action("Researched Imperial Bureaucracy", "-15 Knowledge, -20 Grain, +10 Elasticity")
-        self.paid_action_used = True
-        self._log("✓ Researched Imperial Bureaucracy! Stability losses reduced 25%.", "success")
-        return True
+        return self._perform(ACTIONS["research_ib"])
 
     def build_bronze_mine(self) -> bool:
-        if self.paid_action_used:
-            self._log("You already used your paid action this turn.", "warning")
-            return False
-        if self.timber < 20 or self.grain < 15:
-            self._log("✗ Not enough Timber (20) and Grain (15) to build Bronze Mine.", "danger")
-            return False
-        detail = self._apply(d_timber=-20, d_grain=-15)
-        self.has_bronze_mine = True
-        self._add_action_summary("Built Bronze Mine", f"{detail} → +3 Bronze/turn")
-        self._add_current_turn_action("Built Bronze Mine", "-20 Timber, -15 Grain → +3 Bronze/turn")
-        self.paid_action_used = True
-        self._log("✓ Bronze Mine built! +3 Bronze each turn.", "success")
-        return True
+        return self._perform(ACTIONS["build_mine"])
 
     def build_granary(self) -> bool:
-        if self.paid_action_used:
-            self._log("You already used your paid action this turn.", "warning")
-            return False
-        if self.has_granary:
-            self._log("✗ Granary already built.", "warning")
-            return False
-        if self.timber < 15 or self.grain < 20:
-            self._log("✗ Not enough Timber (15) and Grain (20) to build Granary.", "danger")
-            return False
-        detail = self._apply(d_timber=-15, d_grain=-20)
-        self.has_granary = True
-        self._add_action_summary("Built Granary", f"{detail} → +5 Grain/turn")
-        self._add_current_turn_action("Built Granary", "-15 Timber, -20 Grain → +5 Grain/turn")
-        self.paid_action_used = True
-        self._log("✓ Granary built! +5 Grain each turn.", "success")
-        return True
+        return self._perform(ACTIONS["build_granary"])
 
     def build_barracks(self) -> bool:
-        if self.paid_action_used:
-            self._log("You already used your paid action this turn.", "warning")
-            return False
-        if self.has_barracks:
-            self._log("✗ Barracks already built.", "warning")
-            return False
-        if self.timber < 20 or self.grain < 25 or self.bronze < 10:
-            self._log("✗ Not enough Timber (20), Grain (25), and Bronze (10) to build Barracks.", "danger")
-            return False
-        detail = self._apply(d_timber=-20, d_grain=-25, d_bronze=-10, d_mil=+15)
-        self.has_barracks = True
-        self._add_action_summary("Built Barracks", detail)
-        self._add_current_turn_action("Built Barracks", "-20 Timber, -25 Grain, -10 Bronze, +15 Military")
-        self.paid_action_used = True
-        self._log("✓ Barracks built! +15 Military.", "success")
-        return True
+        return self._perform(ACTIONS["build_barracks"])
 
     def build_palace(self) -> bool:
-        if self.paid_action_used:
-            self._log("You already used your paid action this turn.", "warning")
-            return False
-        if self.has_palace:
-            self._log("✗ Palace already built.", "warning")
-            return False
-        if self.timber < 25 or self.grain < 30 or self.bronze < 15:
-            self._log("✗ Not enough Timber (25), Grain (30), and Bronze (15) to build Palace.", "danger")
-            return False
-        detail = self._apply(d_timber=-25, d_grain=-30, d_bronze=-15, d_prestige=+20, d_stab=+10)
-        self.has_palace = True
-        self._add_action_summary("Built Palace", detail)
-        self._add_current_turn_action("Built Palace", "-25 Timber, -30 Grain, -15 Bronze, +20 Prestige, +10 Stability")
-        self.paid_action_used = True
-        self._log("✓ Palace built! +20 Prestige, +10 Stability.", "success")
-        return True
+        return self._perform(ACTIONS["build_palace"])
 
     def build_lighthouse(self) -> bool:
-        if self.paid_action_used:
-            self._log("You already used your paid action this turn.", "warning")
-            return False
-        if self.has_lighthouse:
-            self._log("✗ Lighthouse already built.", "warning")
-            return False
-        if self.timber < 20 or self.grain < 20:
-            self._log("✗ Not enough Timber (20) and Grain (20) to build Lighthouse.", "danger")
-            return False
-        detail = self._apply(d_timber=-20, d_grain=-20, d_prestige=+10, d_col=-3)
-        self.has_lighthouse = True
-        self._add_action_summary("Built Lighthouse", detail)
-        self._add_current_turn_action("Built Lighthouse", "-20 Timber, -20 Grain, +10 Prestige, -3 Collapse")
-        self.paid_action_used = True
-        self._log("✓ Lighthouse built! +10 Prestige, -3 Collapse.", "success")
-        return True
+        return self._perform(ACTIONS["build_lighthouse"])
 
     def build_watchtower(self) -> bool:
-        if self.paid_action_used:
-            self._log("You already used your paid action this turn.", "warning")
-            return False
-        if self.has_watchtower:
-            self._log("✗ Watchtower already built.", "warning")
-            return False
-        if self.timber < 15 or self.grain < 15:
-            self._log("✗ Not enough Timber (15) and Grain (15) to build Watchtower.", "danger")
-            return False
-        detail = self._apply(d_timber=-15, d_grain=-15, d_mil=+10)
-        self.has_watchtower = True
-        self._add_action_summary("Built Watchtower", detail)
-        self._add_current_turn_action("Built Watchtower", "-15 Timber, -15 Grain, +10 Military")
-        self.paid_action_used = True
-        self._log("✓ Watchtower built! +10 Military.", "success")
-        return True
+        return self._perform(ACTIONS["build_watchtower"])
 
     def research_tin_trade_routes(self) -> bool:
-        if self.paid_action_used:
-            self._log("You already used your paid action this turn.", "warning")
-            return False
-        if self.tech_tin_trade_routes:
-            self._log("✗ Tin Trade Routes already researched.", "warning")
-            return False
-        if self.grain < 25 or self.bronze < 15:
-            self._log("✗ Not enough Grain (25) and Bronze (15) for Tin Trade Routes.", "danger")
-            return False
-        detail = self._apply(d_grain=-25, d_bronze=-15, d_prestige=+10, d_col=-2)
-        self.tech_tin_trade_routes = True
-        self._add_action_summary("Researched Tin Trade Routes", detail)
-        self._add_current_turn_action("Researched Tin Trade Routes", "-25 Grain, -15 Bronze, +10 Prestige, -2 Collapse")
-        self.paid_action_used = True
-        self._log("✓ Researched Tin Trade Routes! +10 Prestige, -2 Collapse.", "success")
-        return True
+        return self._perform(ACTIONS["research_tin_trade"])
 
     def research_phalanx_formation(self) -> bool:
-        if self.paid_action_used:
-            self._log("You already used your paid action this turn.", "warning")
-            return False
-        if self.tech_phalanx_formation:
-            self._log("✗ Phalanx Formation already researched.", "warning")
-            return False
-        if self.bronze < 20 or self.military < 25:
-            self._log("✗ Not enough Bronze (20) and Military (25) for Phalanx Formation.", "danger")
-            return False
-        detail = self._apply(d_bronze=-20, d_mil=+15)
-        self.tech_phalanx_formation = True
-        self._add_action_summary("Researched Phalanx Formation", detail)
-        self._add_current_turn_action("Researched Phalanx Formation", "-20 Bronze, +15 Military")
-        self.paid_action_used = True
-        self._log("✓ Researched Phalanx Formation! +15 Military.", "success")
-        return True
+        return self._perform(ACTIONS["research_phalanx"])
 
     def research_diplomatic_marriage(self) -> bool:
-        if self.paid_action_used:
-            self._log("You already used your paid action this turn.", "warning")
-            return False
-        if self.tech_diplomatic_marriage:
-            self._log("✗ Diplomatic Marriage already researched.", "warning")
-            return False
-        if self.prestige < 30:
-            self._log("✗ Not enough Prestige (30) for Diplomatic Marriage.", "danger")
-            return False
-        detail = self._apply(d_prestige=-30, d_stab=+15, d_col=-5)
-        self.tech_diplomatic_marriage = True
-        self._add_action_summary("Researched Diplomatic Marriage", detail)
-        self._add_current_turn_action("Researched Diplomatic Marriage", "-30 Prestige, +15 Stability, -5 Collapse")
-        self.paid_action_used = True
-        self._log("✓ Researched Diplomatic Marriage! +15 Stability, -5 Collapse.", "success")
-        return True
+        return self._perform(ACTIONS["research_marriage"])
 
     def send_tribute(self, target: str) -> bool:
-        if self.paid_action_used:
-            self._log("You already used your paid action this turn.", "warning")
-            return False
-        if self.grain < 15 or self.bronze < 10:
-            self._log("✗ Not enough Grain (15) and Bronze (10) to send tribute.", "danger")
-            return False
-        detail = self._apply(d_grain=-15, d_bronze=-10, d_prestige=+5, d_col=-3)
-        self._add_action_summary(f"Sent tribute to {target.capitalize()}", detail)
-        self._add_current_turn_action(f"Sent tribute to {target.capitalize()}", "-15 Grain, -10 Bronze, +5 Prestige, -3 Collapse")
-        self.paid_action_used = True
-        self._log(f"✓ Tribute sent to {target.capitalize()}! +5 Prestige, -3 Collapse.", "success")
-        return True
+        return self._perform(ACTIONS["send_tribute"], target)
 
     def form_alliance(self) -> bool:
-        if self.paid_action_used:
-            self._log("You already used your paid action this turn.", "warning")
-            return False
-        if self.prestige < 15:
-            self._log("✗ Not enough Prestige (15) to form alliance.", "danger")
-            return False
-        detail = self._apply(d_prestige=-15, d_stab=+8, d_mil=+5, d_col=-4)
-        self._add_action_summary("Formed Alliance", detail)
-        self._add_current_turn_action("Formed Alliance", "-15 Prestige, +8 Stability, +5 Military, -4 Collapse")
-        self.paid_action_used = True
-        self._log("✓ Alliance formed! +8 Stability, +5 Military, -4 Collapse.", "success")
-        return True
+        return self._perform(ACTIONS["form_alliance"])
 
     def host_festival(self) -> bool:
-        if self.paid_action_used:
-            self._log("You already used your paid action this turn.", "warning")
-            return False
-        if self.grain < 20:
-            self._log("✗ Not enough Grain (20) to host festival.", "danger")
-            return False
-        detail = self._apply(d_grain=-20, d_stab=+10, d_prestige=+8)
-        self._add_action_summary("Hosted Festival", detail)
-        self._add_current_turn_action("Hosted Festival", "-20 Grain, +10 Stability, +8 Prestige")
-        self.paid_action_used = True
-        self._log("✓ Festival hosted! +10 Stability, +8 Prestige.", "success")
-        return True
+        return self._perform(ACTIONS["host_festival"])
 
     # ------------------------
     # End-of-turn / economy / events
@@ -470,46 +932,31 @@ class Game:
     def apply_income(self) -> None:
         if self.has_bronze_mine:
             self.bronze += 3
-            self._add_income_summary("Bronze Mines: +3 Bronze")
+            if not self.quiet:
+                self._add_income_summary("Bronze Mines: +3 Bronze")
         if self.has_granary or self.tech_granary_network:
             self.grain += 5
-            self._add_income_summary("Granary Network: +5 Grain")
+            if not self.quiet:
+                self._add_income_summary("Granary Network: +5 Grain")
 
     def apply_drift(self) -> None:
         self.collapse = clamp(self.collapse + self.drift_per_turn)
-        self._add_drift_summary(f"Collapse Drift: +{self.drift_per_turn}")
+        if not self.quiet:
+            self._add_drift_summary(f"Collapse Drift: +{self.drift_per_turn}")
 
     # Event tables (v1.2 feel)
     def resolve_random_event(self) -> None:
-        NEG, POS, CHOICE = "neg", "pos", "choice"
-        tables = {
-            NEG: [
-                ("Sea Peoples Raid",        6,  lambda: self._apply(d_mil=-12, d_stab=-9,  d_col=+8)),
-                ("Trade Route Disruption",  5,  lambda: self._apply(d_bronze=-10, d_prestige=-5, d_stab=-6, d_col=+6)),
-                ("Palace Conspiracy",       4,  lambda: self._apply(d_stab=-15, d_prestige=-8, d_col=+5)),
-                ("Drought in Anatolia",     4,  lambda: self._apply(d_grain=-15, d_stab=-7,  d_col=+5)),
-                ("Vassal Rebellion",        3,  lambda: self._apply(d_mil=-10, d_stab=-11, d_grain=-10, d_col=+7)),
-            ],
-            POS: [
-                ("Diplomatic Success",      6,  lambda: self._apply(d_stab=+12, d_prestige=+8, d_col=-4)),
-                ("Bountiful Harvest",       5,  lambda: self._apply(d_grain=+20, d_stab=+8,  d_col=-3)),
-                ("Military Victory",        4,  lambda: self._apply(d_mil=+12, d_stab=+10,  d_col=-3)),
-                ("Technological Breakthrough", 3, lambda: self._apply(d_know=+15, d_stab=+5, d_col=-2)),
-            ],
-        }
-        NEGATIVE_CHANCE = 0.50
-        POSITIVE_CHANCE = 0.30
-        CHOICE_CHANCE = 0.10
-
-        r = random.random()
+        r = self.rng.random()
         if r < NEGATIVE_CHANCE:
-            name, delta = self._weighted_apply(tables[NEG])
-            self._log(f"✗ CRISIS: {name} — {delta}", "danger")
-            self._add_event_summary(f"CRISIS: {name} — {delta}")
+            name, delta = self._weighted_apply(NEGATIVE_EVENTS)
+            if not self.quiet:
+                self._say(MSG_CRISIS, name, delta)
+                self._add_event_summary(f"CRISIS: {name} — {delta}")
         elif r < NEGATIVE_CHANCE + POSITIVE_CHANCE:
-            name, delta = self._weighted_apply(tables[POS])
-            self._log(f"✓ POSITIVE EVENT: {name} — {delta}", "success")
-            self._add_event_summary(f"POSITIVE: {name} — {delta}")
+            name, delta = self._weighted_apply(POSITIVE_EVENTS)
+            if not self.quiet:
+                self._say(MSG_POSITIVE_EVENT, name, delta)
+                self._add_event_summary(f"POSITIVE: {name} — {delta}")
         elif r < NEGATIVE_CHANCE + POSITIVE_CHANCE + CHOICE_CHANCE:
             # Trigger a choice event
             self._trigger_choice_event()
@@ -517,29 +964,14 @@ class Game:
             # No event
             pass
 
-    def _weighted_apply(self, table):
-        total = sum(w for _, w, _ in table)
-        pick = random.uniform(0, total)
-        upto = 0
-        for name, w, fn in table:
-            if upto + w >= pick:
-                delta = fn()
-                return name, (delta or "—")
-            upto += w
-        name, _, fn = table[-1]
-        delta = fn()
-        return name, (delta or "—")
+    def _weighted_apply(self, table: EventTable) -> Tuple[str, str]:
+        i = table.index(self.rng.uniform(0, table.total))
+        return table.names[i], self._apply(*table.effects[i])
 
     def _trigger_choice_event(self) -> None:
         """Randomly select and trigger a choice event"""
-        choice_events = [
-            self._create_vassal_aid_choice,
-            self._create_hittite_trade_choice,
-            self._create_refugee_crisis_choice,
-        ]
-        choice_fn = random.choice(choice_events)
-        self.pending_choice = choice_fn()
-        self._log(f"⚠️ CHOICE EVENT: {self.pending_choice.title}", "warning")
+        self.pending_choice = getattr(self, self.rng.choice(_CHOICE_FACTORIES))()
+        self._say(MSG_CHOICE_EVENT, self.pending_choice.title)
 
     def _create_vassal_aid_choice(self) -> ChoiceEvent:
         """Vassal Requests Aid choice event"""
@@ -585,52 +1017,31 @@ class Game:
                 return False
 
             event_id = self.pending_choice.event_id
-            logger.info(f"Resolving choice event {event_id} with choice {choice}")
-            
-            if event_id == "vassal_aid":
-                if choice == "a":
-                    if self.grain < 20:
-                        self._log("Insufficient Grain to send aid!", "danger")
-                        return False
-                    self.grain -= 20
-                    self._apply(d_prestige=+8, d_stab=+5, d_col=-2)
-                    self._log(f"✓ {self.pending_choice.choice_a_label}: {self.pending_choice.choice_a_effects}", "success")
-                    self._add_event_summary(f"CHOICE: {self.pending_choice.title} → Sent Aid")
-                else:
-                    self._apply(d_prestige=-10, d_stab=-8, d_col=+3)
-                    self._log(f"✓ {self.pending_choice.choice_b_label}: {self.pending_choice.choice_b_effects}", "warning")
-                    self._add_event_summary(f"CHOICE: {self.pending_choice.title} → Refused")
-            
-            elif event_id == "hittite_trade":
-                if choice == "a":
-                    if self.timber < 15:
-                        self._log("Insufficient Timber for trade!", "danger")
-                        return False
-                    self.timber -= 15
-                    self._apply(d_bronze=+12, d_prestige=+5, d_col=-1)
-                    self._log(f"✓ {self.pending_choice.choice_a_label}: {self.pending_choice.choice_a_effects}", "success")
-                    self._add_event_summary(f"CHOICE: {self.pending_choice.title} → Accepted Trade")
-                else:
-                    self._apply(d_prestige=-3)
-                    self._log(f"✓ {self.pending_choice.choice_b_label}: {self.pending_choice.choice_b_effects}", "warning")
-                    self._add_event_summary(f"CHOICE: {self.pending_choice.title} → Declined")
+            if not self.quiet:
+                logger.info(f"Resolving choice event {event_id} with choice {choice}")
             
-            elif event_id == "refugee_crisis":
+            outcome = CHOICE_OUTCOMES.get(event_id)
+            if outcome is not None:
                 if choice == "a":
-                    if self.grain < 12:
-                        self._log("Insufficient Grain to welcome refugees!", "danger")
+                    if getattr(self, outcome.cost_stat) < outcome.cost:
+                        self._say(CHOICE_SHORTFALL_CODES[event_id])
                         return False
-                    self.grain -= 12
-                    self._apply(d_stab=+10, d_mil=+6, d_col=-2)
-                    self._log(f"✓ {self.pending_choice.choice_a_label}: {self.pending_choice.choice_a_effects}", "success")
-                    self._add_event_summary(f"CHOICE: {self.pending_choice.title} → Welcomed Refugees")
+                    setattr(self, outcome.cost_stat, getattr(self, outcome.cost_stat) - outcome.cost)
+                    self._apply(*outcome.a_effect)
+                    if not self.quiet:
+                        self._say(MSG_CHOICE_A, self.pending_choice.choice_a_label,
+                                  self.pending_choice.choice_a_effects)
+                        self._add_event_summary(f"CHOICE: {self.pending_choice.title} → {outcome.a_result}")
                 else:
-                    self._apply(d_stab=-12, d_mil=+3, d_col=+4)
-                    self._log(f"✓ {self.pending_choice.choice_b_label}: {self.pending_choice.choice_b_effects}", "warning")
-                    self._add_event_summary(f"CHOICE: {self.pending_choice.title} → Turned Away")
-            
+                    self._apply(*outcome.b_effect)
+                    if not self.quiet:
+                        self._say(MSG_CHOICE_B, self.pending_choice.choice_b_label,
+                                  self.pending_choice.choice_b_effects)
+                        self._add_event_summary(f"CHOICE: {self.pending_choice.title} → {outcome.b_result}")
+
             self.pending_choice = None
-            logger.info("Choice resolved successfully")
+            if not self.quiet:
+                logger.info("Choice resolved successfully")
             return True
         except Exception as e:
             logger.error(f"Error in resolve_choice: {e}", exc_info=True)
@@ -639,10 +1050,10 @@ class Game:
 
     def can_end_turn(self) -> bool:
         if not self.free_harvest_used:
-            self._log("Take the FREE Harvest before ending your turn.", "warning")
+            self._say(MSG_HARVEST_FIRST)
             return False
         if not self.paid_action_used:
-            self._log("You still have one paid action this turn.", "warning")
+            self._say(MSG_PAID_ACTION_LEFT)
             return False
         return True
 
@@ -652,7 +1063,8 @@ class Game:
             if not self.can_end_turn():
                 return False
 
-            logger.info(f"Ending turn {self.turn}")
+            if not self.quiet:
+                logger.info(f"Ending turn {self.turn}")
             
             # Apply income with error handling
             try:
@@ -679,6 +1091,8 @@ class Game:
             self.turn += 1
             self.free_harvest_used = False
             self.paid_action_used = False
+            if self.quiet:
+                return True
             
             # Initialize turn summary at start of new turn
             self._start_turn_summary()
@@ -717,42 +1131,41 @@ class Game:
         """
         # Check defeat conditions first (highest priority)
         if self.collapse >= 100:
-            logger.info("Game end: Collapse reached 100")
-            return {"type": "defeat", "reason": "collapse"}
+            return self._game_over({"type": "defeat", "reason": "collapse"}, "Collapse reached 100")
         
         if self.stability <= 0:
-            logger.info("Game end: Stability collapsed to 0")
-            return {"type": "defeat", "reason": "stability"}
+            return self._game_over({"type": "defeat", "reason": "stability"}, "Stability collapsed to 0")
         
         if self.military <= 0:
-            logger.info("Game end: Military collapsed to 0")
-            return {"type": "defeat", "reason": "military"}
+            return self._game_over({"type": "defeat", "reason": "military"}, "Military collapsed to 0")
         
         # Check if time ran out (exceeds max turns without victory)
         if self.turn > self.max_turns:
             # Vacuum victory: survived with high collapse (80+) and strong military (50+)
             if self.collapse >= 80 and self.military >= 50:
-                logger.info("Game end: Vacuum victory")
-                return {"type": "vacuum"}
+                return self._game_over({"type": "vacuum"}, "Vacuum victory")
             else:
                 # Time ran out without achieving either victory condition
-                logger.info("Game end: Time ran out")
-                return {"type": "defeat", "reason": "time"}
+                return self._game_over({"type": "defeat", "reason": "time"}, "Time ran out")
         
         # Check victory conditions (only before exceeding max turns)
         # Preservation victory: collapse reduced to 0
         if self.collapse == 0:
-            logger.info("Game end: Preservation victory")
-            return {"type": "preservation"}
+            return self._game_over({"type": "preservation"}, "Preservation victory")
         
         # Game continues
         return None
 
+    def _game_over(self, result: Dict[str, Any], why: str) -> Dict[str, Any]:
+        if not self.quiet:
+            logger.info(f"Game end: {why}")
+        return result
+
     # ------------------------
     # Helpers for templates
     # ------------------------
     def to_dict(self) -> Dict:
-        """Convert game state to dictionary for templates"""
+        """Convert game state to dictionary for templates (client-facing: no random stream)"""
         try:
             return {
                 "turn": self.turn,
@@ -771,6 +1184,7 @@ class Game:
                 "max_withdrawals": self.max_withdrawals,
                 "free_harvest_used": self.free_harvest_used,
                 "paid_action_used": self.paid_action_used,
+                "legal_actions": self.legal_action_codes(),
                 "tech": {
                     "imperial_bureaucracy": self.tech_imperial_bureaucracy,
                     "bronze_mines": self.tech_bronze_mines,
@@ -827,11 +1241,20 @@ class Game:
                 "pending_choice": None,
             }
 
+    def to_storage_dict(self) -> Dict:
+        """
+        to_dict() plus the random stream, for from_dict(). Server-side only: the
+        seed and position predict every future event, so never send this to clients.
+        """
+        data = self.to_dict()
+        data["rng"] = self.rng.to_dict() if getattr(self, 'rng', None) else None
+        return data
+
     @staticmethod
     def from_dict(data: Dict) -> Game:
         """Reconstruct Game from dictionary (for session storage)"""
         try:
-            g = Game()
+            g = Game._blank()
             
             # Core resources/metrics
             g.turn = data.get("turn", 1)
@@ -877,7 +1300,7 @@ class Game:
             g.has_watchtower = builds.get("watchtower", False)
             
             # Message log and actions
-            g.message_log = data.get("message_log", [])
+            g.message_log = MessageLog(data.get("message_log", []))
             g.current_turn_actions = data.get("current_turn_actions", [])
             
             # Turn summary (reconstruct from dict)
@@ -891,6 +1314,9 @@ class Game:
                     drift=ts_data.get("drift", [])
                 )
             
+            # Random stream (seed + draws consumed)
+            g.rng = GameRng.from_dict(data.get("rng"))
+
             # Choice event (reconstruct from dict)
             ce_data = data.get("pending_choice")
             if ce_data:
@@ -911,3 +1337,25 @@ class Game:
             logger.error(f"Error in from_dict: {e}", exc_info=True)
             # Return new game as fallback
             return Game()
+
+
+# Attribute-style accessors for the packed stats and flags (game.grain, game.has_granary, ...)
+for _i, _name in enumerate(STAT_NAMES):
+    setattr(Game, _name, _stat_property(_i))
+for _name, _bit in FLAG_BITS.items():
+    setattr(Game, _name, _flag_property(_bit))
+for _name, _slot, _bit, _copier in zip(
+        _COW_FIELDS, _COW_SLOTS, (COW_MESSAGES, COW_SUMMARY, COW_ACTIONS, COW_COMMANDS),
+        (MessageLog.copy, _copy_summary, lambda actions: [dict(a) for a in actions], list)):
+    setattr(Game, _name, _cow_property(_slot, _bit, _copier))
+del _i, _name, _bit, _slot, _copier
+
+
+def new_game(difficulty: str = "normal", seed: Optional[int] = None, block_size: int = 0,
+             message_capacity: int = MESSAGE_LOG_CAPACITY, quiet: bool = False) -> Game:
+    """Create a Game with the settings for the given difficulty applied (quiet=True: sim mode)"""
+    g = Game(rng=GameRng(seed, block_size=block_size), message_capacity=message_capacity, quiet=quiet)
+    g.difficulty = difficulty
+    for name, value in DIFFICULTY_SETTINGS.get(difficulty, {}).items():
+        setattr(g, name, value)
+    return g
@@ -0,0 +1,200 @@
+# metrics.py — per-request phase timing for the Flask app, exposed at /metrics
+# - A sampled request records how long each phase took: session_open (cookie or
+#   backend decode), load (replay.rebuild), action, end_turn, search (/hint),
+#   to_dict, encode (replay.to_record), session_save, render (Jinja) and total
+# - Phase times are aggregated into one latency histogram per (route, phase)
+#   and served at /metrics in Prometheus text format (per process)
+# - METRICS_SAMPLE_RATE picks the share of requests timed (0 = off, 1 = all).
+#   When off, phase() returns a shared no-op without touching the request
+#   context, and the session interface adds one attribute check per request.
+#
+# Usage:
+#   metrics.init_app(app)            # after session_store.init_app
+#   with metrics.phase("render"):
+#       return render_template(...)
+
+from __future__ import annotations
+import bisect
+import contextlib
+import logging
+import random
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from flask import Response, g, request
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the histogram buckets; +Inf is implicit
+BUCKETS: Tuple[float, ...] = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+)
+METRIC_NAME = "bronze_request_phase_seconds"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_sample_rate = 0.0
+
+
+class Histogram:
+    """Prometheus-style histogram: per-bucket counts (non-cumulative here), sum and count"""
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+
+class Registry:
+    """Histograms keyed by (route, phase); safe to share between request threads"""
+
+    def __init__(self) -> None:
+        self._histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, route: str, times: Dict[str, float]) -> None:
+        with self._lock:
+            for name, seconds in times.items():
+                h = self._histograms.get((route, name))
+                if h is None:
+                    h = self._histograms[(route, name)] = Histogram()
+                h.observe(seconds)
+
+    def get(self, route: str, name: str) -> Optional[Histogram]:
+        return self._histograms.get((route, name))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+    def render(self) -> str:
+        """Prometheus text exposition format"""
+        lines: List[str] = [
+            f"# HELP {METRIC_NAME} Time spent in each phase of a sampled request",
+            f"# TYPE {METRIC_NAME} histogram",
+        ]
+        with self._lock:
+            items = sorted(self._histograms.items())
+            snapshot = [(key, list(h.counts), h.sum, h.count) for key, h in items]
+        for (route, name), counts, total, count in snapshot:
+            labels = f'route="{_escape(route)}",phase="{_escape(name)}"'
+            cumulative = 0
+            for bound, n in zip(BUCKETS, counts):
+                cumulative += n
+                lines.append(f'{METRIC_NAME}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{METRIC_NAME}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"{METRIC_NAME}_sum{{{labels}}} {total!r}")
+            lines.append(f"{METRIC_NAME}_count{{{labels}}} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = Registry()
+
+
+# ------------------------
+# Per-request timing
+# ------------------------
+class _NoPhase:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+
+_NO_PHASE = _NoPhase()
+
+
+def _begin() -> None:
+    """Decide whether this request is sampled (called when its session is opened)"""
+    if _sample_rate >= 1.0 or random.random() < _sample_rate:
+        g._phase_times = {}
+        g._request_started = time.perf_counter()
+
+
+def _times() -> Optional[Dict[str, float]]:
+    return g.get("_phase_times") if _sample_rate else None
+
+
+@contextlib.contextmanager
+def _timed(times: Dict[str, float], name: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        times[name] = times.get(name, 0.0) + time.perf_counter() - started
+
+
+def phase(name: str):
+    """Context manager timing one phase of the current request (no-op unless sampled)"""
+    if not _sample_rate:
+        return _NO_PHASE
+    times = g.get("_phase_times")
+    if times is None:
+        return _NO_PHASE
+    return _timed(times, name)
+
+
+class TimedSessionInterface:
+    """Wraps the app's session interface to time session_open / session_save"""
+
+    def __init__(self, inner: Any):
+        self.inner = inner
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.inner, name)
+
+    def open_session(self, app, req):
+        if not _sample_rate:
+            return self.inner.open_session(app, req)
+        _begin()
+        with phase("session_open"):
+            return self.inner.open_session(app, req)
+
+    def save_session(self, app, session, response) -> None:
+        with phase("session_save"):
+            self.inner.save_session(app, session, response)
+
+
+def _finish(exc: Optional[BaseException]) -> None:
+    times = _times()
+    if times is None or request.endpoint == "metrics":
+        return
+    times["total"] = time.perf_counter() - g._request_started
+    rule = request.url_rule
+    registry.observe(rule.rule if rule is not None else "<unmatched>", times)
+
+
+def _metrics_view() -> Response:
+    return Response(registry.render(), content_type=CONTENT_TYPE)
+
+
+def configure(sample_rate: float) -> None:
+    """Share of requests to time, clamped to [0, 1]"""
+    global _sample_rate
+    _sample_rate = min(max(float(sample_rate), 0.0), 1.0)
+
+
+def init_app(app, sample_rate: Optional[float] = None) -> None:
+    """Time app's sessions and requests at METRICS_SAMPLE_RATE (or sample_rate) and serve /metrics"""
+    rate = sample_rate if sample_rate is not None else app.config.get("METRICS_SAMPLE_RATE", 0.0)
+    try:
+        configure(rate)
+    except (TypeError, ValueError) as e:
+        logger.warning(f"Invalid METRICS_SAMPLE_RATE {rate!r}, timing disabled: {e}")
+        configure(0.0)
+    app.session_interface = TimedSessionInterface(app.session_interface)
+    app.teardown_request(_finish)
+    app.add_url_rule("/metrics", "metrics", _metrics_view)
@@ -0,0 +1,149 @@
+# render_cache.py — fragment caching and a persistent bytecode cache for the Jinja templates
+# - fragment(name, **inputs) renders the partial template `name` with only the
+#   given inputs, and keeps the markup in an LRU keyed by (template, script root,
+#   inputs). A panel is re-rendered only when one of its inputs changed: the
+#   action panels depend on the turn flags, builds and tech, so a player sees
+#   each rendering a few times per turn at most and other players share them
+# - Inputs must be JSON-serializable (the key is their canonical JSON)
+# - FRAGMENT_CACHE_SIZE entries are kept (0 disables caching); caching is also
+#   off while templates auto-reload (debug), so template edits show up at once
+# - Compiled templates are written to a bytecode cache (JINJA_CACHE_DIR, default:
+#   Jinja's per-user temp dir), so a recycled worker loads bytecode instead of
+#   re-parsing and compiling the templates. Entries are keyed by template name
+#   (not path), so bytecode built ahead of time by precompile_templates() into
+#   PREBUILT_DIR is found by a fresh serverless instance on another path; Jinja's
+#   source checksum still rejects bytecode whose template has since changed
+#
+# Usage:
+#   render_cache.init_app(app)
+#   {{ fragment("_actions.html", game={...}, low_stability=game.stability < 45) }}
+#   render_cache.precompile_templates(app)   # build step, see precompile.py
+#   render_cache.template_version(app)       # changes with any template source
+
+from __future__ import annotations
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+
+from flask import has_request_context, request
+from jinja2 import Environment, FileSystemBytecodeCache
+from jinja2.bccache import Bucket
+from markupsafe import Markup
+
+logger = logging.getLogger(__name__)
+
+FRAGMENT_CACHE_SIZE = 256
+# Template bytecode shipped with the deployment (written by precompile.py)
+PREBUILT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "jinja_bytecode")
+
+
+class TemplateBytecodeCache(FileSystemBytecodeCache):
+    """FileSystemBytecodeCache keyed by template name, falling back to a read-only prebuilt directory"""
+
+    def __init__(self, directory: Optional[str] = None, prebuilt: Optional[str] = None):
+        super().__init__(directory)
+        self.prebuilt = prebuilt
+
+    def get_cache_key(self, name: str, filename: Optional[str] = None) -> str:
+        return hashlib.sha1(name.encode("utf-8")).hexdigest()
+
+    def load_bytecode(self, bucket: Bucket) -> None:
+        super().load_bytecode(bucket)
+        if bucket.code is None and self.prebuilt:
+            try:
+                with open(os.path.join(self.prebuilt, self.pattern % bucket.key), "rb") as f:
+                    bucket.load_bytecode(f)
+            except OSError:
+                pass
+
+    def dump_bytecode(self, bucket: Bucket) -> None:
+        try:
+            super().dump_bytecode(bucket)
+        except OSError as e:
+            logger.debug(f"Could not write template bytecode: {e}")
+
+
+class FragmentCache:
+    """LRU of rendered partial templates, keyed by template name and inputs"""
+
+    def __init__(self, env: Environment, size: int = FRAGMENT_CACHE_SIZE):
+        self.env = env
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._fragments: "OrderedDict[Tuple[str, str, str], Markup]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def render(self, name: str, **inputs: Any) -> Markup:
+        if self.size <= 0 or self.env.auto_reload:
+            return Markup(self.env.get_template(name).render(inputs))
+        # url_for output depends on where the app is mounted
+        root = request.script_root if has_request_context() else ""
+        key = (name, root, json.dumps(inputs, sort_keys=True, separators=(",", ":")))
+        with self._lock:
+            html = self._fragments.get(key)
+            if html is not None:
+                self._fragments.move_to_end(key)
+                self.hits += 1
+                return html
+            self.misses += 1
+        html = Markup(self.env.get_template(name).render(inputs))
+        with self._lock:
+            self._fragments[key] = html
+            self._fragments.move_to_end(key)
+            while len(self._fragments) > self.size:
+                self._fragments.popitem(last=False)
+        return html
+
+    def __len__(self) -> int:
+        return len(self._fragments)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._fragments.clear()
+            self.hits = self.misses = 0
+
+
+def init_app(app, cache_dir: Optional[str] = None) -> FragmentCache:
+    """Install the bytecode cache and the fragment() template global on app"""
+    env = app.jinja_env
+    directory = cache_dir or app.config.get("JINJA_CACHE_DIR") or None
+    prebuilt = app.config.get("JINJA_PREBUILT_DIR", PREBUILT_DIR)
+    try:
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        env.bytecode_cache = TemplateBytecodeCache(directory, prebuilt if prebuilt and os.path.isdir(prebuilt) else None)
+    except (OSError, RuntimeError) as e:
+        # Read-only or insecure temp dir: compile in memory as before
+        logger.warning(f"Jinja bytecode cache unavailable: {e}")
+    cache = FragmentCache(env, int(app.config.get("FRAGMENT_CACHE_SIZE", FRAGMENT_CACHE_SIZE)))
+    env.globals["fragment"] = cache.render
+    app.extensions["render_cache"] = cache
+    return cache
+
+
+def template_version(app) -> str:
+    """Digest of every template's source (part of page ETags, so a deploy that changes a template invalidates them)"""
+    version = app.extensions.get("template_version")
+    if version is None or app.jinja_env.auto_reload:
+        env = app.jinja_env
+        digest = hashlib.sha1()
+        for name in sorted(env.list_templates()):
+            digest.update(name.encode("utf-8") + b"\0")
+            digest.update(env.loader.get_source(env, name)[0].encode("utf-8"))
+        version = app.extensions["template_version"] = digest.hexdigest()[:16]
+    return version
+
+
+def precompile_templates(app, target: str = PREBUILT_DIR) -> List[str]:
+    """Compile every template of app into target (for PREBUILT_DIR); returns the template names"""
+    os.makedirs(target, exist_ok=True)
+    env = app.jinja_env.overlay(bytecode_cache=TemplateBytecodeCache(target), cache_size=0)
+    names = [name for name in env.list_templates() if name.endswith(".html")]
+    for name in names:
+        env.get_template(name)
+    return names
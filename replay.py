@@ -0,0 +1,306 @@
+# replay.py — event-sourced game records
+# - A game is persisted as its seed, difficulty and an append-only log of the commands
+#   that changed it (rejected commands are not recorded)
+# - The state is rebuilt by deterministic replay (every Game draws from its own GameRng)
+# - An in-process cache keeps a snapshot (codec bytes) every SNAPSHOT_EVERY end_turn commands,
+#   so a rebuild only replays the last few commands
+# - The same records double as replays / audit trails
+#
+# Record format (JSON-safe, a few hundred bytes for a full game):
+#   {"v": 1, "seed": 123456, "difficulty": "hard", "log": "1204..."}
+# Records migrated from full to_dict() session payloads also carry "base" (a to_storage_dict()).
+#
+# Sealed records, for storage the player can read (Flask's cookie session is signed,
+# not encrypted): the seed would predict every event, so they carry an opaque random
+# id instead and the seed is HMAC(key, id), key being the app's SECRET_KEY. Their
+# "base" is a to_dict() (no random stream; the rebuilt game draws from the id's seed).
+#   {"v": 2, "id": "Jq3x...", "difficulty": "hard", "log": "1204..."}
+
+from __future__ import annotations
+import functools
+import hashlib
+import hmac
+import logging
+import secrets
+import string
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import codec
+from game_logic import ACTIONS, Game, GameRng, MessageLog, new_game, render_message
+
+logger = logging.getLogger(__name__)
+
+RECORD_VERSION = 1
+SEALED_RECORD_VERSION = 2
+
+# Command codes. Append-only: a command's position is its code in stored logs.
+COMMANDS: Tuple[str, ...] = (
+    "end_turn",
+    "harvest",
+    "gather_timber",
+    "fortify",
+    "withdraw",
+    "research_ib",
+    "research_tin_trade",
+    "research_phalanx",
+    "research_marriage",
+    "build_mine",
+    "build_granary",
+    "build_barracks",
+    "build_palace",
+    "build_lighthouse",
+    "build_watchtower",
+    "send_tribute:egypt",
+    "send_tribute:hittites",
+    "send_tribute:assyria",
+    "send_tribute:mycenae",
+    "form_alliance",
+    "host_festival",
+    "choice:a",
+    "choice:b",
+    "cancel",
+    "invalid_choice",
+)
+COMMAND_CODES: Dict[str, int] = {name: code for code, name in enumerate(COMMANDS)}
+END_TURN = COMMAND_CODES["end_turn"]
+# Commands the /action route may issue
+ACTION_COMMANDS = frozenset(COMMANDS[COMMAND_CODES["harvest"]:COMMAND_CODES["host_festival"] + 1])
+
+# One character per command in the stored log
+ALPHABET = string.digits + string.ascii_letters
+_ALPHABET_INDEX: Dict[str, int] = {ch: i for i, ch in enumerate(ALPHABET)}
+
+
+def _reject(game: Game, text: str, level: str) -> bool:
+    game._log(text, level)
+    return False
+
+
+TRIBUTE_TARGETS: Tuple[str, ...] = ("egypt", "hittites", "assyria", "mycenae")
+
+# Command → handler; every player action dispatches through the game_logic.ACTIONS registry
+HANDLERS: Dict[str, Callable[[Game], bool]] = {
+    "end_turn": Game.end_turn,
+    **{code: functools.partial(Game.perform, code=code) for code in ACTIONS if code != "send_tribute"},
+    **{f"send_tribute:{t}": functools.partial(Game.perform, code="send_tribute", target=t) for t in TRIBUTE_TARGETS},
+    "choice:a": lambda g: g.resolve_choice("a"),
+    "choice:b": lambda g: g.resolve_choice("b"),
+    "cancel": lambda g: _reject(g, "Action cancelled.", "secondary"),
+    "invalid_choice": lambda g: _reject(g, "Invalid choice selected.", "danger"),
+}
+_DISPATCH: Tuple[Callable[[Game], bool], ...] = tuple(HANDLERS[name] for name in COMMANDS)
+
+# Snapshot cache: (seed, difficulty, log prefix) → codec-encoded Game
+SNAPSHOT_EVERY = 5
+SNAPSHOT_CACHE_SIZE = 512
+_snapshots: "OrderedDict[Tuple[int, str, str], bytes]" = OrderedDict()
+_snapshots_lock = threading.Lock()  # request threads share the cache; eviction must not race a lookup
+
+
+def execute(game: Game, command: str) -> bool:
+    """
+    Run a command against the game; only a command that succeeded is appended
+    to the game's command log. A rejected one changes nothing but the message
+    log, so it costs no replay time and leaves the version (and revision) alone;
+    its message is not rebuilt either (see take_unrecorded_messages).
+    """
+    code = COMMAND_CODES[command]
+    ok = bool(_DISPATCH[code](game))
+    if ok:
+        game.command_log.append(code)
+    return ok
+
+
+def take_unrecorded_messages(game: Game, log: MessageLog) -> List[Dict[str, str]]:
+    """
+    Messages added since log (a message_log.copy() taken before the commands),
+    removed from the game again: with nothing recorded they would vanish on the
+    next rebuild, so callers show them once instead and the game stays as saved.
+    """
+    seen = set(map(id, log.records()))
+    added = [render_message(record) for record in game.message_log.records() if id(record) not in seen]
+    game.message_log = log
+    return added
+
+
+# ------------------------
+# Records
+# ------------------------
+def encode_log(codes: List[int]) -> str:
+    return "".join(ALPHABET[c] for c in codes)
+
+
+def decode_log(log: str) -> List[int]:
+    return [_ALPHABET_INDEX[ch] for ch in log]
+
+
+def to_record(game: Game, base: Optional[Dict[str, Any]] = None, game_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Compact persistent form of a game (replaces the full to_dict payload); sealed
+    with game_id, which must be the id the game's seed was derived from (game_seed)
+    """
+    if game_id is None:
+        record: Dict[str, Any] = {"v": RECORD_VERSION, "seed": game.rng.seed}
+    else:
+        record = {"v": SEALED_RECORD_VERSION, "id": game_id}
+    record["difficulty"] = game.difficulty
+    record["log"] = encode_log(game.command_log)
+    if base is not None:
+        record["base"] = base
+    return record
+
+
+def new_game_id() -> str:
+    return secrets.token_urlsafe(12)
+
+
+def _hmac(key: Union[str, bytes], message: str) -> bytes:
+    key = key.encode("utf-8") if isinstance(key, str) else key
+    return hmac.new(key, message.encode("utf-8"), hashlib.sha256).digest()
+
+
+@functools.lru_cache(maxsize=1024)
+def game_seed(game_id: str, key: Union[str, bytes]) -> int:
+    """The seed of a sealed record's game: 32 bits, like GameRng's own"""
+    return int.from_bytes(_hmac(key, game_id)[:4], "big")
+
+
+def new_sealed_game(difficulty: str, key: Union[str, bytes]) -> Tuple[Game, str]:
+    """A new game and the id to seal its records with"""
+    game_id = new_game_id()
+    return new_game(difficulty, seed=game_seed(game_id, key)), game_id
+
+
+def reseed(game: Game, key: Union[str, bytes]) -> str:
+    """Give a game loaded from a full payload a new, sealed random stream; returns its id"""
+    game_id = new_game_id()
+    game.rng = GameRng(game_seed(game_id, key))
+    return game_id
+
+
+def record_seed(record: Dict[str, Any], key: Optional[Union[str, bytes]] = None) -> int:
+    """The seed a record replays from (a sealed record needs the key)"""
+    if "id" not in record:
+        return record["seed"]
+    if key is None:
+        raise ValueError("A sealed game record needs its key")
+    return game_seed(record["id"], key)
+
+
+def _start(record: Dict[str, Any], key: Optional[Union[str, bytes]]) -> Game:
+    """A record's game before its first command"""
+    seed = record_seed(record, key)
+    if record.get("base") is None:
+        return new_game(record.get("difficulty", "normal"), seed=seed)
+    game = Game.from_dict(record["base"])
+    if "id" in record:
+        game.rng = GameRng(seed)  # a sealed base has no random stream of its own
+    return game
+
+
+@functools.lru_cache(maxsize=1024)
+def _game_tag(seed: int, key: Union[str, bytes]) -> str:
+    return _hmac(key, str(seed)).hex()[:16]
+
+
+def revision(game: Game, key: Union[str, bytes]) -> str:
+    """
+    Identifies a game state: a keyed hash of its seed (key: the app's SECRET_KEY)
+    and its version (how many commands have been applied). Clients see revisions,
+    and the seed would let them predict every event, so it never appears in one.
+    """
+    return f"{_game_tag(game.rng.seed, key)}.{game.version}"
+
+
+def record_revision(record: Dict[str, Any], key: Union[str, bytes]) -> str:
+    """revision() of the game a record rebuilds to, without rebuilding it (one log character per command)"""
+    return f"{_game_tag(record_seed(record, key), key)}.{len(record.get('log', ''))}"
+
+
+def _remember(key: Tuple[int, str, str], game: Game) -> None:
+    snapshot = codec.encode(game)
+    with _snapshots_lock:
+        _snapshots[key] = snapshot
+        _snapshots.move_to_end(key)
+        while len(_snapshots) > SNAPSHOT_CACHE_SIZE:
+            _snapshots.popitem(last=False)
+
+
+def _recall(key: Tuple[int, str, str]) -> Optional[bytes]:
+    with _snapshots_lock:
+        snapshot = _snapshots.get(key)
+        if snapshot is not None:
+            _snapshots.move_to_end(key)
+        return snapshot
+
+
+def rebuild(record: Dict[str, Any], key: Optional[Union[str, bytes]] = None) -> Game:
+    """
+    Rebuild a game by replaying its command log (resuming from a cached snapshot
+    when possible); key is the SECRET_KEY a sealed record was sealed with
+    """
+    log = record.get("log", "")
+    codes = decode_log(log)
+
+    if record.get("base") is not None:
+        # Migrated session: the log starts from a stored full state; no snapshots
+        game = _start(record, key)
+        for code in codes:
+            _DISPATCH[code](game)
+        game.command_log = codes
+        return game
+
+    seed, difficulty = record_seed(record, key), record.get("difficulty", "normal")
+
+    # Log positions just after every SNAPSHOT_EVERY-th end_turn command
+    boundaries: List[int] = []
+    ends = 0
+    for i, code in enumerate(codes):
+        if code == END_TURN:
+            ends += 1
+            if ends % SNAPSHOT_EVERY == 0:
+                boundaries.append(i + 1)
+
+    game, start = None, 0
+    for pos in reversed(boundaries):
+        key = (seed, difficulty, log[:pos])
+        snapshot = _recall(key)
+        if snapshot is not None:
+            game, start = codec.decode(snapshot), pos
+            break
+    if game is None:
+        game = new_game(difficulty, seed=seed)
+
+    pending = set(boundaries)
+    for i in range(start, len(codes)):
+        _DISPATCH[codes[i]](game)
+        if i + 1 in pending:
+            game.command_log = codes[:i + 1]
+            _remember((seed, difficulty, log[:i + 1]), game)
+    game.command_log = codes
+    return game
+
+
+def audit(record: Dict[str, Any], key: Optional[Union[str, bytes]] = None) -> List[Dict[str, Any]]:
+    """Replay a record step by step: one entry per command with its result and key stats"""
+    game = _start(record, key)
+    trail: List[Dict[str, Any]] = []
+    for code in decode_log(record.get("log", "")):
+        turn = game.turn
+        ok = bool(_DISPATCH[code](game))
+        trail.append({
+            "turn": turn,
+            "command": COMMANDS[code],
+            "ok": ok,
+            "collapse": game.collapse,
+            "stability": game.stability,
+            "military": game.military,
+        })
+    return trail
+
+
+def clear_snapshots() -> None:
+    with _snapshots_lock:
+        _snapshots.clear()
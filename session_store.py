@@ -0,0 +1,489 @@
+# session_store.py — server-side Flask sessions keyed by an opaque id
+# - The session cookie carries only a random session id; the session data
+#   (game record + victory result) lives in a backend
+# - An in-process LRU cache of decoded sessions: every load still reads the
+#   stored bytes (other workers may have written since), but skips JSON
+#   decoding when they are the bytes the cache holds
+# - Backends: MemoryBackend, SQLiteBackend and RedisBackend (any client with
+#   redis-py's get / set(ex=) / delete; FakeRedis is an in-process stand-in)
+# - Opt-in via SESSION_BACKEND; the default stays Flask's signed cookie,
+#   which is what serverless deployments (Vercel) need
+# - Optimistic concurrency: commit(session) writes a session only if nobody
+#   wrote it since this request loaded it (compare-and-swap on the stored
+#   bytes, atomic in every backend) and otherwise reports a conflict, after
+#   which the caller reload()s and retries. Cookie sessions have no shared
+#   copy to race on, so there commit() always succeeds
+#
+# SESSION_BACKEND values:
+#   cookie (default)          signed client-side cookie (Flask default)
+#   memory                    this process only (single worker / development)
+#   sqlite:///path/to/db      shared by workers on one host
+#   redis://host:6379/0       shared by every host (needs the redis package)
+
+from __future__ import annotations
+import abc
+import json
+import logging
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_SIZE = 1024
+DEFAULT_TTL = int(timedelta(days=31).total_seconds())
+
+
+def _dumps(data: Dict[str, Any]) -> bytes:
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+
+def _loads(raw: bytes) -> Dict[str, Any]:
+    return json.loads(raw)
+
+
+# ------------------------
+# Backends (sid → serialized bytes)
+# ------------------------
+class Backend(abc.ABC):
+    """Storage interface: bytes in, bytes out, with a time-to-live in seconds"""
+
+    @abc.abstractmethod
+    def get(self, sid: str) -> Optional[bytes]:
+        """The stored bytes, or None if missing or expired"""
+
+    @abc.abstractmethod
+    def set(self, sid: str, data: bytes, ttl: int) -> None:
+        """Store data for ttl seconds"""
+
+    @abc.abstractmethod
+    def delete(self, sid: str) -> None:
+        """Forget sid (no error if missing)"""
+
+    @abc.abstractmethod
+    def compare_and_set(self, sid: str, expected: Optional[bytes], data: bytes, ttl: int) -> bool:
+        """Atomically store data if sid currently holds expected (None: nothing); False if it does not"""
+
+
+class MemoryBackend(Backend):
+    """Process-local dict with expiry and a size cap (oldest write evicted first)"""
+
+    def __init__(self, max_entries: int = 100_000):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, sid: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(sid)
+            if entry is None:
+                return None
+            expires, data = entry
+            if expires < time.time():
+                del self._data[sid]
+                return None
+            return data
+
+    def _store(self, sid: str, data: bytes, ttl: int) -> None:
+        self._data[sid] = (time.time() + ttl, data)
+        self._data.move_to_end(sid)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def set(self, sid: str, data: bytes, ttl: int) -> None:
+        with self._lock:
+            self._store(sid, data, ttl)
+
+    def delete(self, sid: str) -> None:
+        with self._lock:
+            self._data.pop(sid, None)
+
+    def compare_and_set(self, sid: str, expected: Optional[bytes], data: bytes, ttl: int) -> bool:
+        with self._lock:
+            entry = self._data.get(sid)
+            current = entry[1] if entry is not None and entry[0] >= time.time() else None
+            if current != expected:
+                return False
+            self._store(sid, data, ttl)
+            return True
+
+
+class SQLiteBackend(Backend):
+    """Single-table SQLite store; safe to share between threads and worker processes"""
+
+    def __init__(self, path: str):
+        import sqlite3  # only this backend needs it; cookie sessions skip the import on cold start
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (sid TEXT PRIMARY KEY, data BLOB NOT NULL, expires REAL NOT NULL)"
+        )
+
+    def get(self, sid: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM sessions WHERE sid = ? AND expires >= ?", (sid, time.time())
+            ).fetchone()
+        return bytes(row[0]) if row else None
+
+    def set(self, sid: str, data: bytes, ttl: int) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (sid, data, expires) VALUES (?, ?, ?)",
+                (sid, data, time.time() + ttl),
+            )
+
+    def delete(self, sid: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+
+    def compare_and_set(self, sid: str, expected: Optional[bytes], data: bytes, ttl: int) -> bool:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")  # holds the write lock against other processes until COMMIT
+            try:
+                row = self._conn.execute(
+                    "SELECT data FROM sessions WHERE sid = ? AND expires >= ?", (sid, time.time())
+                ).fetchone()
+                swapped = (bytes(row[0]) if row else None) == expected
+                if swapped:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO sessions (sid, data, expires) VALUES (?, ?, ?)",
+                        (sid, data, time.time() + ttl),
+                    )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return swapped
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            return self._conn.execute("DELETE FROM sessions WHERE expires < ?", (time.time(),)).rowcount
+
+
+class WatchError(Exception):
+    """A watched key changed before the transaction ran (what FakeRedis raises)"""
+
+
+def _watch_errors() -> Tuple[type, ...]:
+    """WatchError plus redis-py's own, if installed (redis is optional and slow to import)"""
+    try:
+        from redis.exceptions import WatchError as RedisWatchError
+    except ImportError:
+        return (WatchError,)
+    return (WatchError, RedisWatchError)
+
+
+class RedisBackend(Backend):
+    """Any redis-py compatible client (redis.Redis, FakeRedis, ...)"""
+
+    def __init__(self, client: Any, prefix: str = "bronze:session:"):
+        self.client = client
+        self.prefix = prefix
+        self._conflicts = _watch_errors()
+
+    def get(self, sid: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + sid)
+
+    def set(self, sid: str, data: bytes, ttl: int) -> None:
+        self.client.set(self.prefix + sid, data, ex=ttl)
+
+    def delete(self, sid: str) -> None:
+        self.client.delete(self.prefix + sid)
+
+    def compare_and_set(self, sid: str, expected: Optional[bytes], data: bytes, ttl: int) -> bool:
+        key = self.prefix + sid
+        with self.client.pipeline() as pipe:
+            try:
+                pipe.watch(key)
+                if pipe.get(key) != expected:
+                    return False
+                pipe.multi()
+                pipe.set(key, data, ex=ttl)
+                pipe.execute()
+                return True
+            except self._conflicts:
+                return False
+
+
+class FakeRedis:
+    """In-process stand-in for the subset of the redis-py API the backends use"""
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[Optional[float], bytes]] = {}
+        self._versions: Dict[str, int] = {}  # bumped by every write, for WATCH
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires is not None and expires < time.time():
+                del self._data[key]
+                return None
+            return value
+
+    def _set(self, key: str, value: bytes, ex: Optional[int]) -> None:
+        self._data[key] = (time.time() + ex if ex else None, value)
+        self._versions[key] = self._versions.get(key, 0) + 1
+
+    def set(self, key: str, value: bytes, ex: Optional[int] = None) -> bool:
+        with self._lock:
+            self._set(key, value, ex)
+        return True
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            for key in keys:
+                self._versions[key] = self._versions.get(key, 0) + 1
+            return sum(self._data.pop(key, None) is not None for key in keys)
+
+    def pipeline(self) -> "FakePipeline":
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    """The optimistic-transaction subset of redis-py's Pipeline: watch, get, multi, set, execute"""
+
+    def __init__(self, client: FakeRedis):
+        self.client = client
+        self._watched: Dict[str, int] = {}
+        self._queued: List[Tuple[str, bytes, Optional[int]]] = []
+
+    def __enter__(self) -> "FakePipeline":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self._watched.clear()
+        self._queued.clear()
+
+    def watch(self, *keys: str) -> None:
+        with self.client._lock:
+            for key in keys:
+                self._watched[key] = self.client._versions.get(key, 0)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+
+    def multi(self) -> None:
+        pass
+
+    def set(self, key: str, value: bytes, ex: Optional[int] = None) -> None:
+        self._queued.append((key, value, ex))
+
+    def execute(self) -> List[bool]:
+        with self.client._lock:
+            if any(self.client._versions.get(key, 0) != version for key, version in self._watched.items()):
+                self.reset()
+                raise WatchError("Watched variable changed.")
+            for key, value, ex in self._queued:
+                self.client._set(key, value, ex)
+            results = [True] * len(self._queued)
+        self.reset()
+        return results
+
+
+# ------------------------
+# Store: LRU cache in front of a backend
+# ------------------------
+class SessionStore:
+    """Write-through store with an in-process LRU cache of decoded session dicts, checked against the backend"""
+
+    def __init__(self, backend: Backend, cache_size: int = DEFAULT_CACHE_SIZE, ttl: int = DEFAULT_TTL):
+        self.backend = backend
+        self.cache_size = cache_size
+        self.ttl = ttl
+        # sid → (decoded session, the stored bytes it came from)
+        self._cache: "OrderedDict[str, Tuple[Dict[str, Any], bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def new_id() -> str:
+        return secrets.token_urlsafe(24)
+
+    def _remember(self, sid: str, data: Dict[str, Any], raw: bytes) -> None:
+        with self._lock:
+            self._cache[sid] = (data, raw)
+            self._cache.move_to_end(sid)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def load(self, sid: str) -> Tuple[Optional[Dict[str, Any]], Optional[bytes]]:
+        """Session dict for sid (a copy the caller may modify) and the stored bytes for compare_and_set.
+        The stored bytes are the cache's version stamp: a cached copy is used only while they still match,
+        so writes by other workers sharing the backend are seen on the next load"""
+        raw = self.backend.get(sid)
+        with self._lock:
+            entry = self._cache.get(sid)
+            if raw is None:
+                self._cache.pop(sid, None)
+                return None, None
+            if entry is not None and entry[1] == raw:
+                self._cache.move_to_end(sid)
+                self.hits += 1
+                return dict(entry[0]), raw
+        self.misses += 1
+        try:
+            data = _loads(raw)
+        except ValueError:
+            logger.warning(f"Discarding unreadable session {sid[:6]}…")
+            return None, raw
+        self._remember(sid, data, raw)
+        return dict(data), raw
+
+    def get(self, sid: str) -> Optional[Dict[str, Any]]:
+        """Session dict for sid (a copy the caller may modify), or None"""
+        return self.load(sid)[0]
+
+    def set(self, sid: str, data: Dict[str, Any]) -> None:
+        data = dict(data)
+        raw = _dumps(data)
+        self.backend.set(sid, raw, self.ttl)
+        self._remember(sid, data, raw)
+
+    def compare_and_set(self, sid: str, expected: Optional[bytes], data: Dict[str, Any]) -> Optional[bytes]:
+        """Store data if the backend still holds expected (what load() returned); the new bytes, or None on conflict"""
+        data = dict(data)
+        raw = _dumps(data)
+        if not self.backend.compare_and_set(sid, expected, raw, self.ttl):
+            with self._lock:
+                self._cache.pop(sid, None)
+            return None
+        self._remember(sid, data, raw)
+        return raw
+
+    def delete(self, sid: str) -> None:
+        with self._lock:
+            self._cache.pop(sid, None)
+        self.backend.delete(sid)
+
+
+# ------------------------
+# Flask integration
+# ------------------------
+class ServerSession(CallbackDict, SessionMixin):
+    """Session dict that remembers its id, whether it changed and the stored bytes it was loaded from"""
+
+    def __init__(self, initial: Optional[Dict[str, Any]] = None, sid: Optional[str] = None, new: bool = False,
+                 store: Optional[SessionStore] = None, loaded: Optional[bytes] = None):
+        def on_update(self: ServerSession) -> None:
+            self.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.store = store
+        self.loaded = loaded
+        self.committed = False
+        self.modified = False
+
+    def commit(self) -> bool:
+        """Write now unless the stored session changed since it was loaded (then False: reload and retry)"""
+        raw = self.store.compare_and_set(self.sid, self.loaded, dict(self))
+        if raw is None:
+            return False
+        self.loaded = raw
+        self.committed = True
+        self.modified = False
+        return True
+
+    def reload(self) -> None:
+        """Replace the contents with what is stored now"""
+        data, self.loaded = self.store.load(self.sid)
+        dict.clear(self)
+        dict.update(self, data or {})
+        self.modified = False
+
+
+class ServerSessionInterface(SessionInterface):
+    """Flask session interface backed by a SessionStore; the cookie holds only the id"""
+
+    def __init__(self, store: SessionStore):
+        self.store = store
+
+    def open_session(self, app, request) -> ServerSession:
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            data, raw = self.store.load(sid)
+            if data is not None:
+                return ServerSession(data, sid=sid, store=self.store, loaded=raw)
+        return ServerSession(sid=self.store.new_id(), new=True, store=self.store)
+
+    def save_session(self, app, session: ServerSession, response) -> None:
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if not session:
+            if session.modified and not session.new:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+        if not (session.modified or session.new or session.committed):
+            return
+        if session.modified or not session.committed:
+            self.store.set(session.sid, dict(session))
+        response.set_cookie(
+            name, session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain, path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+
+
+def commit(session: Any) -> bool:
+    """Compare-and-swap write of a server-side session (see ServerSession.commit); cookie sessions always succeed"""
+    commit_ = getattr(session, "commit", None)
+    return commit_() if commit_ is not None else True
+
+
+def reload(session: Any) -> None:
+    """Reload a server-side session after a failed commit (no-op for cookie sessions)"""
+    reload_ = getattr(session, "reload", None)
+    if reload_ is not None:
+        reload_()
+
+
+def store_from_url(url: str, cache_size: int = DEFAULT_CACHE_SIZE, ttl: int = DEFAULT_TTL) -> Optional[SessionStore]:
+    """Build a SessionStore from a SESSION_BACKEND value; None means keep cookie sessions"""
+    if not url or url == "cookie":
+        return None
+    if url == "memory":
+        backend: Backend = MemoryBackend()
+    elif url.startswith("sqlite:///"):
+        backend = SQLiteBackend(url[len("sqlite:///"):])
+    elif url.startswith(("redis://", "rediss://", "unix://")):
+        import redis  # optional dependency, only needed for this backend
+        backend = RedisBackend(redis.Redis.from_url(url))
+    else:
+        raise ValueError(f"Unknown SESSION_BACKEND: {url}")
+    return SessionStore(backend, cache_size=cache_size, ttl=ttl)
+
+
+def init_app(app, url: Optional[str] = None) -> None:
+    """Switch app to server-side sessions when SESSION_BACKEND (or url) names a store"""
+    url = url if url is not None else app.config.get("SESSION_BACKEND", "cookie")
+    try:
+        store = store_from_url(url, cache_size=app.config.get("SESSION_CACHE_SIZE", DEFAULT_CACHE_SIZE),
+                               ttl=int(app.permanent_session_lifetime.total_seconds()))
+    except Exception as e:
+        logger.error(f"Could not set up session backend {url!r}, keeping cookie sessions: {e}", exc_info=True)
+        return
+    if store is not None:
+        app.session_interface = ServerSessionInterface(store)
+        logger.info(f"Using server-side sessions ({type(store.backend).__name__})")
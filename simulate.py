@@ -0,0 +1,298 @@
+# simulate.py — headless batch simulator for game_logic.Game
+# - Plays complete games without Flask: harvest_free → one paid action → end_turn
+# - Game end is checked after every step, the same way the /game view does
+# - Games run in sim mode (Game.quiet): no messages, summaries or logging
+# - Pluggable policies (built-in names or "module:attr")
+# - Spreads games across all cores with a process pool
+#
+# Usage:
+#   python simulate.py --games 1000000 --policy random --difficulty all
+#   python simulate.py --games 20000 --policy preservation --json
+
+from __future__ import annotations
+import abc
+import argparse
+import functools
+import importlib
+import json
+import logging
+import multiprocessing
+import os
+import random
+import sys
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from game_logic import ACTION_BITS, DIFFICULTY_SETTINGS, PAID_ACTION_CODES, Game, new_game
+
+logger = logging.getLogger(__name__)
+
+# Paid action codes (same codes the /action route accepts) → Game methods, from the action registry
+PAID_ACTIONS: Dict[str, Callable[[Game], bool]] = {
+    code: functools.partial(Game.perform, code=code) for code in PAID_ACTION_CODES
+}
+
+# Safety net: no game can legitimately last this many turns
+MAX_SIM_TURNS = 500
+CHUNK_SIZE = 2000
+# Random numbers pre-drawn per block by each game's GameRng (bulk mode)
+RNG_BLOCK_SIZE = 64
+
+
+# ------------------------
+# Policies
+# ------------------------
+class Policy(abc.ABC):
+    """
+    Base policy. A policy ranks the paid actions for the current state; the
+    simulator performs the first one that succeeds. Choice events are answered
+    with "a" or "b" (falling back to "b" if "a" is unaffordable).
+    """
+    name = "base"
+
+    @abc.abstractmethod
+    def rank_actions(self, game: Game, rng: random.Random) -> Sequence[str]:
+        """Paid action codes, best first"""
+
+    def choose(self, game: Game, rng: random.Random) -> str:
+        return "a"
+
+
+class RandomPolicy(Policy):
+    """Uniformly random paid action among those that succeed"""
+    name = "random"
+
+    def rank_actions(self, game: Game, rng: random.Random) -> Sequence[str]:
+        codes = list(PAID_ACTIONS)
+        rng.shuffle(codes)
+        return codes
+
+    def choose(self, game: Game, rng: random.Random) -> str:
+        return rng.choice(("a", "b"))
+
+
+class PreservationPolicy(Policy):
+    """Push Collapse down as fast as possible (Preservation victory)"""
+    name = "preservation"
+
+    ORDER = (
+        "build_lighthouse", "research_marriage", "form_alliance", "research_tin_trade",
+        "send_tribute", "build_granary", "research_ib", "host_festival",
+        "fortify", "gather_timber",
+    )
+
+    def rank_actions(self, game: Game, rng: random.Random) -> Sequence[str]:
+        if game.stability < 30:
+            return ("host_festival", "form_alliance") + self.ORDER
+        if game.military < 15:
+            return ("fortify",) + self.ORDER
+        return self.ORDER
+
+
+class VacuumPolicy(Policy):
+    """Withdraw support and build up Military (Vacuum victory)"""
+    name = "vacuum"
+
+    ORDER = (
+        "withdraw", "build_barracks", "research_phalanx", "build_watchtower",
+        "fortify", "build_mine", "gather_timber", "host_festival",
+    )
+
+    def rank_actions(self, game: Game, rng: random.Random) -> Sequence[str]:
+        order = self.ORDER
+        # Only withdraw once drift alone will no longer carry Collapse to 80
+        turns_left = game.max_turns - game.turn + 1
+        if game.collapse + game.drift_per_turn * turns_left >= 85:
+            order = order[1:] + ("form_alliance", "send_tribute")
+        if game.stability < 30:
+            return ("host_festival", "form_alliance") + order
+        return order
+
+    def choose(self, game: Game, rng: random.Random) -> str:
+        return "b" if game.pending_choice.event_id == "refugee_crisis" else "a"
+
+
+POLICIES: Dict[str, Callable[[], Policy]] = {
+    "random": RandomPolicy,
+    "preservation": PreservationPolicy,
+    "vacuum": VacuumPolicy,
+}
+
+
+def load_policy(name: str) -> Policy:
+    """Resolve a built-in policy name or a "module:attr" import path"""
+    if name in POLICIES:
+        return POLICIES[name]()
+    if ":" not in name:
+        raise ValueError(f"Unknown policy: {name} (choose from {', '.join(POLICIES)} or module:attr)")
+    module_name, attr = name.split(":", 1)
+    factory = getattr(importlib.import_module(module_name), attr)
+    return factory()
+
+
+# ------------------------
+# Single game
+# ------------------------
+def _outcome_key(result: Dict[str, Any]) -> str:
+    if result["type"] == "defeat":
+        return f"defeat:{result['reason']}"
+    return result["type"]
+
+
+def play_game(difficulty: str, policy: Policy, rng: random.Random,
+              seed: Optional[int] = None, settings: Optional[Dict[str, int]] = None) -> Tuple[str, int]:
+    """
+    Play one game to completion. `rng` drives the policy; `seed` seeds the
+    game's own event stream, so (seed, policy decisions) replays the game exactly.
+    `settings` overrides Game fields on top of the difficulty preset (see sweep.py).
+    Returns (outcome, turns_played) where outcome is "preservation", "vacuum",
+    "defeat:<reason>" or "stuck" (no paid action affordable, so the turn cannot end).
+    """
+    g = new_game(difficulty, seed=seed, block_size=RNG_BLOCK_SIZE, quiet=True)
+    for name, value in (settings or {}).items():
+        setattr(g, name, value)
+
+    while g.turn <= MAX_SIM_TURNS:
+        if g.pending_choice:
+            if not g.resolve_choice(policy.choose(g, rng)):
+                g.resolve_choice("b")
+            result = g._check_game_end()
+            if result:
+                return _outcome_key(result), g.turn - 1
+
+        g.harvest_free()
+        result = g._check_game_end()
+        if result:
+            return _outcome_key(result), g.turn - 1
+
+        # First ranked action the legality mask allows
+        legal = g.legal_actions()
+        code = next((c for c in policy.rank_actions(g, rng) if legal & ACTION_BITS[c]), None)
+        if code is None:
+            return "stuck", g.turn - 1
+        g.perform(code)
+        result = g._check_game_end()
+        if result:
+            return _outcome_key(result), g.turn - 1
+
+        g.end_turn()
+        result = g._check_game_end()
+        if result:
+            return _outcome_key(result), g.turn - 1
+
+    return "stuck", g.turn - 1
+
+
+def run_chunk(task: Tuple[str, str, int, int]) -> Tuple[str, Dict[str, int], int]:
+    """Worker entry point: play `count` games and return (difficulty, outcomes, total_turns)"""
+    difficulty, policy_name, count, seed = task
+    # Each game gets its own event stream, derived from the chunk seed
+    rng = random.Random(seed)
+    policy = load_policy(policy_name)
+    outcomes: Counter = Counter()
+    total_turns = 0
+    for _ in range(count):
+        outcome, turns = play_game(difficulty, policy, rng, seed=rng.getrandbits(32))
+        outcomes[outcome] += 1
+        total_turns += turns
+    return difficulty, dict(outcomes), total_turns
+
+
+def _init_worker() -> None:
+    logging.getLogger("game_logic").setLevel(logging.WARNING)
+
+
+# ------------------------
+# Batch driver
+# ------------------------
+def run_batch(games: int, difficulties: Sequence[str], policy_name: str = "random",
+              workers: Optional[int] = None, seed: int = 0,
+              chunk_size: int = CHUNK_SIZE) -> Dict[str, Dict[str, Any]]:
+    """
+    Simulate `games` games per difficulty and return aggregate statistics:
+    {difficulty: {"games", "outcomes", "rates", "avg_turns"}}
+    """
+    load_policy(policy_name)  # fail fast on a bad name
+
+    tasks: List[Tuple[str, str, int, int]] = []
+    for d_index, difficulty in enumerate(difficulties):
+        remaining, chunk_index = games, 0
+        while remaining > 0:
+            count = min(chunk_size, remaining)
+            tasks.append((difficulty, policy_name, count, seed + d_index * 1_000_003 + chunk_index))
+            remaining -= count
+            chunk_index += 1
+
+    totals: Dict[str, Counter] = {d: Counter() for d in difficulties}
+    turns: Dict[str, int] = {d: 0 for d in difficulties}
+
+    def collect(results) -> None:
+        for difficulty, outcomes, total_turns in results:
+            totals[difficulty].update(outcomes)
+            turns[difficulty] += total_turns
+
+    if workers == 1:
+        _init_worker()
+        collect(map(run_chunk, tasks))
+    else:
+        with multiprocessing.Pool(processes=workers, initializer=_init_worker) as pool:
+            collect(pool.imap_unordered(run_chunk, tasks))
+
+    stats: Dict[str, Dict[str, Any]] = {}
+    for difficulty in difficulties:
+        played = sum(totals[difficulty].values())
+        stats[difficulty] = {
+            "games": played,
+            "outcomes": dict(sorted(totals[difficulty].items())),
+            "rates": {k: v / played for k, v in sorted(totals[difficulty].items())} if played else {},
+            "avg_turns": turns[difficulty] / played if played else 0.0,
+        }
+    return stats
+
+
+def format_stats(stats: Dict[str, Dict[str, Any]]) -> str:
+    lines: List[str] = []
+    for difficulty, s in stats.items():
+        lines.append(f"== {difficulty}: {s['games']} games, avg {s['avg_turns']:.2f} turns")
+        for outcome, n in s["outcomes"].items():
+            lines.append(f"   {outcome:<20} {n:>10}  {s['rates'][outcome]:7.2%}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Headless BRONZE: 1177 BC batch simulator")
+    parser.add_argument("--games", type=int, default=10000, help="games per difficulty")
+    parser.add_argument("--difficulty", default="all",
+                        help=f"one of {', '.join(DIFFICULTY_SETTINGS)} or 'all'")
+    parser.add_argument("--policy", default="random",
+                        help=f"one of {', '.join(POLICIES)} or module:attr")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--json", action="store_true", help="emit JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    if args.difficulty == "all":
+        difficulties = list(DIFFICULTY_SETTINGS)
+    elif args.difficulty in DIFFICULTY_SETTINGS:
+        difficulties = [args.difficulty]
+    else:
+        parser.error(f"Invalid difficulty: {args.difficulty}")
+
+    started = time.perf_counter()
+    stats = run_batch(args.games, difficulties, args.policy, args.workers, args.seed, args.chunk_size)
+    elapsed = time.perf_counter() - started
+
+    if args.json:
+        print(json.dumps({"policy": args.policy, "seed": args.seed, "elapsed_s": elapsed,
+                          "difficulties": stats}, indent=2))
+    else:
+        print(format_stats(stats))
+        total = sum(s["games"] for s in stats.values())
+        print(f"\n{total} games in {elapsed:.1f}s ({total / elapsed:,.0f} games/s, policy={args.policy})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
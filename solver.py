@@ -0,0 +1,436 @@
+# solver.py — exact win probabilities for game_logic.Game by expectimax
+# - Plays by the simulator's turn structure: resolve a pending choice, take the
+#   FREE Harvest, one paid action, end the turn; game end is checked after every step
+# - Chance nodes follow Game.resolve_random_event exactly: crisis / positive event
+#   tables by weight, one of the choice events uniformly, or no event
+# - Rules are compiled from the game_logic registries (ACTION_SPECS, event tables,
+#   CHOICE_EVENTS); parity with Game is covered by test_solver.py
+# - Max nodes stop at a certain win and skip actions whose chance node can no longer
+#   beat the best sibling (Star1-style cut; only exact values are memoized)
+# - Start-of-turn values are memoized in a transposition table keyed by the packed
+#   canonical state and capped at max_entries (least recently used evicted first)
+# - Tables can be saved and loaded so repeated runs start warm; a fingerprint of the
+#   rules in the file header discards tables built against different rules
+#
+# The search is exact, so its cost grows with the turns left: it is practical from
+# mid/late-game states (or with --turn to shorten the horizon), not from turn 1.
+#
+# Usage:
+#   python solver.py --difficulty hard --turn 13 --memo solver.memo
+#   python solver.py --record record.json --json
+
+from __future__ import annotations
+import argparse
+import functools
+import hashlib
+import json
+import logging
+import math
+import os
+import struct
+import sys
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from game_logic import (
+    ACTION_SPECS, CHOICE_CHANCE, CHOICE_EVENTS, DIFFICULTY_SETTINGS, FLAG_BITS, NEGATIVE_CHANCE, NEGATIVE_EVENTS,
+    PAID_ACTION_CODES, POSITIVE_CHANCE, POSITIVE_EVENTS, STAT_NAMES, Game, clamp, new_game,
+)
+
+logger = logging.getLogger(__name__)
+
+# Flat state tuple: the nine stats (STAT_NAMES order) followed by these fields
+FLAGS, TURN, MAX_TURNS, DRIFT, WITHDRAWALS_USED, MAX_WITHDRAWALS, PENDING, HARVESTED, PAID = range(9, 18)
+STABILITY, MILITARY, COLLAPSE = (STAT_NAMES.index(s) for s in ("stability", "military", "collapse"))
+NO_CHOICE = -1
+IB = FLAG_BITS["tech_imperial_bureaucracy"]
+
+# Start-of-turn states (nothing harvested or paid yet) are memoized under this packing
+_KEY = struct.Struct("<9iI5hb")
+DEFAULT_MAX_ENTRIES = 1_000_000  # roughly 200 bytes per entry
+
+# Bump when income / drift / turn-structure rules change (the registries are fingerprinted directly)
+RULES_VERSION = 1
+RULES_FINGERPRINT = hashlib.blake2b(repr((
+    RULES_VERSION, _KEY.format, ACTION_SPECS, NEGATIVE_EVENTS, POSITIVE_EVENTS, CHOICE_EVENTS,
+    NEGATIVE_CHANCE, POSITIVE_CHANCE, CHOICE_CHANCE,
+)).encode("utf-8"), digest_size=16).digest()
+
+# Memo file: header (magic, version, rules fingerprint, entry count), then packed key + value records
+MEMO_MAGIC = b"BZTT"
+MEMO_VERSION = 1
+_MEMO_HEADER = struct.Struct("<4sB16sI")
+_VALUE = struct.Struct("<d")
+
+
+# ------------------------
+# Compiled rules
+# ------------------------
+HARVEST = next(s.effect for s in ACTION_SPECS if s.code == "harvest")
+
+Sparse = Tuple[Tuple[int, int], ...]
+
+
+def sparse(effect: Tuple[int, ...], ib: bool = False) -> Sparse:
+    """Non-zero (stat index, delta) pairs of an effect vector, with the Imperial Bureaucracy cut applied if ib"""
+    return tuple((i, math.ceil(d * 0.75) if ib and i == STABILITY and d < 0 else d)
+                 for i, d in enumerate(effect) if d)
+
+
+# Paid actions: (code, (operand, minimum) requirements, (sparse effect, sparse effect with IB), flag bit,
+# once-only, counts a withdrawal). Operand 9 is the withdrawal allowance, as in Game.legal_actions.
+PAID_ACTIONS: Tuple[Tuple[str, Tuple[Tuple[int, int], ...], Tuple[Sparse, Sparse], int, bool, bool], ...] = tuple(
+    (spec.code,
+     tuple(((STAT_NAMES + ("withdrawals_left",)).index(stat), minimum)
+           for requires, _, _ in spec.checks for stat, minimum in requires),
+     (sparse(spec.effect), sparse(spec.effect, ib=True)), FLAG_BITS[spec.flag] if spec.flag else 0,
+     bool(spec.once), spec.counter == "withdrawals_used")
+    for spec in ACTION_SPECS if spec.code in PAID_ACTION_CODES
+)
+
+
+def _event_outcomes(ib: bool) -> Tuple[Tuple[float, Sparse, int], ...]:
+    """End-of-turn chance outcomes: (probability, sparse effect, pending choice index)"""
+    return (
+        tuple((NEGATIVE_CHANCE * w / NEGATIVE_EVENTS.total, sparse(e, ib), NO_CHOICE)
+              for w, e in zip(NEGATIVE_EVENTS.weights, NEGATIVE_EVENTS.effects))
+        + tuple((POSITIVE_CHANCE * w / POSITIVE_EVENTS.total, sparse(e, ib), NO_CHOICE)
+                for w, e in zip(POSITIVE_EVENTS.weights, POSITIVE_EVENTS.effects))
+        + tuple((CHOICE_CHANCE / len(CHOICE_EVENTS), (), i) for i in range(len(CHOICE_EVENTS)))
+        + ((1.0 - NEGATIVE_CHANCE - POSITIVE_CHANCE - CHOICE_CHANCE, (), NO_CHOICE),)
+    )
+
+
+# Indexed by whether Imperial Bureaucracy is researched
+EVENT_OUTCOMES: Tuple[Tuple[Tuple[float, Sparse, int], ...], ...] = (_event_outcomes(False), _event_outcomes(True))
+CHOICE_COSTS: Tuple[Tuple[int, int], ...] = tuple((STAT_NAMES.index(c.cost_stat), c.cost) for c in CHOICE_EVENTS)
+CHOICE_IDS: Tuple[str, ...] = tuple(c.event_id for c in CHOICE_EVENTS)
+
+
+def _apply(stats: List[int], flags: int, effect: Tuple[int, ...]) -> None:
+    """Game._apply on a stats list (Imperial Bureaucracy mitigation, every clamped stat re-clamped)"""
+    for i, d in enumerate(effect):
+        if i == STABILITY and d < 0 and flags & IB:
+            d = math.ceil(d * 0.75)
+        stats[i] = stats[i] + d if i < STABILITY else clamp(stats[i] + d)
+
+
+def _apply_sparse(stats: List[int], effect: Sparse) -> None:
+    """_apply for a precompiled sparse effect; only the touched stats are clamped, which is
+    equivalent once every stat is in range (always true after the first full _apply of a turn)"""
+    for i, d in effect:
+        v = stats[i] + d
+        if i >= STABILITY:
+            v = 0 if v < 0 else 100 if v > 100 else v
+        stats[i] = v
+
+
+def outcome(state: Tuple[int, ...]) -> Optional[float]:
+    """1.0 for a win, 0.0 for a loss, None while the game continues (Game._check_game_end)"""
+    if state[COLLAPSE] >= 100 or state[STABILITY] <= 0 or state[MILITARY] <= 0:
+        return 0.0
+    if state[TURN] > state[MAX_TURNS]:
+        return 1.0 if state[COLLAPSE] >= 80 and state[MILITARY] >= 50 else 0.0
+    if state[COLLAPSE] == 0:
+        return 1.0
+    return None
+
+
+def state_of(game: Game) -> Tuple[int, ...]:
+    """Canonical flat state of a Game"""
+    pending = CHOICE_IDS.index(game.pending_choice.event_id) if game.pending_choice else NO_CHOICE
+    return game.stats + (game.flags, game.turn, game.max_turns, game.drift_per_turn, game.withdrawals_used,
+                         game.max_withdrawals, pending, int(game.free_harvest_used), int(game.paid_action_used))
+
+
+def resolve_choice(state: Tuple[int, ...], pick: str) -> Optional[Tuple[int, ...]]:
+    """State after answering the pending choice, or None when "a" is unaffordable"""
+    index, flags = state[PENDING], state[FLAGS]
+    stats = list(state[:9])
+    if pick == "a":
+        stat, cost = CHOICE_COSTS[index]
+        if stats[stat] < cost:
+            return None
+        stats[stat] -= cost
+        _apply(stats, flags, CHOICE_EVENTS[index].a_effect)
+    else:
+        _apply(stats, flags, CHOICE_EVENTS[index].b_effect)
+    return tuple(stats) + state[FLAGS:PENDING] + (NO_CHOICE,) + state[HARVESTED:]
+
+
+def harvest(state: Tuple[int, ...]) -> Tuple[int, ...]:
+    stats = list(state[:9])
+    _apply(stats, state[FLAGS], HARVEST)
+    return tuple(stats) + state[FLAGS:HARVESTED] + (1, state[PAID])
+
+
+def legal_actions(state: Tuple[int, ...]) -> Iterator[Tuple[str, Tuple[int, ...]]]:
+    """(code, next state) for every paid action that would succeed"""
+    if state[PAID]:
+        return
+    flags = state[FLAGS]
+    ib = 1 if flags & IB else 0
+    operands = state[:9] + (state[MAX_WITHDRAWALS] - state[WITHDRAWALS_USED],)
+    for code, requires, effects, bit, once, withdrawal in PAID_ACTIONS:
+        if once and flags & bit:
+            continue
+        for operand, minimum in requires:
+            if operands[operand] < minimum:
+                break
+        else:
+            stats = list(state[:9])
+            _apply_sparse(stats, effects[ib])
+            yield code, (tuple(stats) + (flags | bit,) + state[TURN:WITHDRAWALS_USED]
+                         + (state[WITHDRAWALS_USED] + withdrawal,) + state[MAX_WITHDRAWALS:PAID] + (1,))
+
+
+def end_turn_child(state: Tuple[int, ...], index: int) -> Tuple[int, ...]:
+    """Next start-of-turn state for one end-of-turn chance outcome (an index into EVENT_OUTCOMES)"""
+    flags = state[FLAGS]
+    stats = list(state[:9])
+    if flags & FLAG_BITS["has_bronze_mine"]:
+        stats[1] += 3
+    if flags & (FLAG_BITS["has_granary"] | FLAG_BITS["tech_granary_network"]):
+        stats[0] += 5
+    _, effect, pending = EVENT_OUTCOMES[1 if flags & IB else 0][index]
+    _apply_sparse(stats, effect)
+    stats[COLLAPSE] = clamp(stats[COLLAPSE] + state[DRIFT])
+    return (tuple(stats) + state[FLAGS:TURN] + (state[TURN] + 1,) + state[MAX_TURNS:PENDING]
+            + (pending, 0, 0))
+
+
+def end_turn(state: Tuple[int, ...]) -> Iterator[Tuple[float, Tuple[int, ...]]]:
+    """(probability, next start-of-turn state) for every end-of-turn chance outcome"""
+    flags = state[FLAGS]
+    base = list(state[:9])
+    if flags & FLAG_BITS["has_bronze_mine"]:
+        base[1] += 3
+    if flags & (FLAG_BITS["has_granary"] | FLAG_BITS["tech_granary_network"]):
+        base[0] += 5
+    rest = state[FLAGS:TURN] + (state[TURN] + 1,) + state[MAX_TURNS:PENDING]
+    drift = state[DRIFT]
+    for p, effect, pending in EVENT_OUTCOMES[1 if flags & IB else 0]:
+        stats = list(base)
+        _apply_sparse(stats, effect)
+        v = stats[COLLAPSE] + drift
+        stats[COLLAPSE] = 0 if v < 0 else 100 if v > 100 else v
+        yield p, tuple(stats) + rest + (pending, 0, 0)
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def final_turn_value(stability: int, military: int, collapse: int, drift: int, ib: bool) -> float:
+    """
+    Win probability of ending the last turn: every end_turn child is terminal and
+    only depends on these stats (income touches Grain / Bronze only)
+    """
+    total = 0.0
+    for p, effect, _ in EVENT_OUTCOMES[ib]:
+        stats = [0] * STABILITY + [stability, 0, 0, military, collapse]
+        _apply_sparse(stats, effect)
+        stats[COLLAPSE] = clamp(stats[COLLAPSE] + drift)
+        if stats[COLLAPSE] < 100 and stats[STABILITY] > 0 and stats[MILITARY] >= 50 and stats[COLLAPSE] >= 80:
+            total += p
+    return total
+
+
+# ------------------------
+# Transposition table
+# ------------------------
+class TranspositionTable:
+    """Packed start-of-turn state → win probability, capped at max_entries (LRU eviction)"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._values: "OrderedDict[bytes, float]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def get(self, key: bytes) -> Optional[float]:
+        value = self._values.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._values.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: bytes, value: float) -> None:
+        self._values[key] = value
+        if len(self._values) > self.max_entries:
+            self._values.popitem(last=False)
+
+    def save(self, path: str) -> None:
+        """Write the table (oldest first) atomically to path"""
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(_MEMO_HEADER.pack(MEMO_MAGIC, MEMO_VERSION, RULES_FINGERPRINT, len(self._values)))
+            pack = _VALUE.pack
+            f.write(b"".join(key + pack(value) for key, value in self._values.items()))
+        os.replace(tmp, path)
+
+    def load(self, path: str) -> int:
+        """Merge a saved table; returns the entries loaded (0 for a missing, stale or unreadable file)"""
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            magic, version, fingerprint, count = _MEMO_HEADER.unpack_from(data, 0)
+        except (OSError, struct.error) as e:
+            logger.info(f"No usable solver memo at {path}: {e}")
+            return 0
+        if magic != MEMO_MAGIC or version != MEMO_VERSION or fingerprint != RULES_FINGERPRINT:
+            logger.warning(f"Ignoring solver memo {path}: built for different rules or format")
+            return 0
+        size = _KEY.size + _VALUE.size
+        if len(data) != _MEMO_HEADER.size + count * size:
+            logger.warning(f"Ignoring truncated solver memo {path}")
+            return 0
+        start = _MEMO_HEADER.size + max(0, count - self.max_entries) * size
+        for pos in range(start, len(data), size):
+            self.put(data[pos:pos + _KEY.size], _VALUE.unpack_from(data, pos + _KEY.size)[0])
+        return (len(data) - start) // size
+
+
+# ------------------------
+# Solver
+# ------------------------
+class Solver:
+    """Expectimax over the exact rules: max over player decisions, expectation over events"""
+
+    def __init__(self, table: Optional[TranspositionTable] = None):
+        self.table = table if table is not None else TranspositionTable()
+        self.nodes = 0
+
+    def win_probability(self, game: Game) -> float:
+        """Chance of winning from this state with optimal play"""
+        state = state_of(game)
+        result = outcome(state)
+        return result if result is not None else self._value(state)
+
+    def action_values(self, game: Game) -> Dict[str, float]:
+        """
+        Win probability of each decision open now, with optimal play afterwards:
+        "choice:a" / "choice:b" while a choice is pending, otherwise the legal paid
+        actions (after the FREE Harvest), or "end_turn" once the paid action is used.
+        Empty when the game is over or no paid action is affordable.
+        """
+        state = state_of(game)
+        if outcome(state) is not None:
+            return {}
+        return dict(self._decisions(state))
+
+    def best_action(self, game: Game) -> Optional[str]:
+        values = self.action_values(game)
+        return max(values, key=values.get) if values else None
+
+    def _settle(self, state: Tuple[int, ...]) -> float:
+        result = outcome(state)
+        return result if result is not None else self._value(state)
+
+    def _value(self, state: Tuple[int, ...]) -> float:
+        key = None
+        if not state[HARVESTED] and not state[PAID]:
+            key = _KEY.pack(*state[:HARVESTED])
+            cached = self.table.get(key)
+            if cached is not None:
+                return cached
+        self.nodes += 1
+        best = 0.0  # no decision left means the turn cannot end ("stuck")
+        for _, value in self._decisions(state, lambda: best):
+            if value > best:
+                best = value
+                if best >= 1.0:
+                    break
+        if key is not None:
+            self.table.put(key, best)
+        return best
+
+    def _decisions(self, state: Tuple[int, ...],
+                   alpha: Callable[[], float] = lambda: -1.0) -> Iterator[Tuple[str, float]]:
+        """
+        (decision, value) pairs. alpha() is the best value found so far by the caller;
+        a decision that cannot beat it may report any value ≤ alpha() instead of its exact one.
+        """
+        if state[PENDING] != NO_CHOICE:
+            for pick in ("a", "b"):
+                child = resolve_choice(state, pick)
+                if child is not None:
+                    yield f"choice:{pick}", self._settle(child)
+            return
+        if not state[HARVESTED]:
+            state = harvest(state)
+            result = outcome(state)
+            if result is not None:
+                yield "harvest", result
+                return
+        if state[PAID]:
+            yield "end_turn", self._end_turn_value(state, alpha())
+            return
+        for code, child in legal_actions(state):
+            result = outcome(child)
+            yield code, result if result is not None else self._end_turn_value(child, alpha())
+
+    def _end_turn_value(self, state: Tuple[int, ...], alpha: float = -1.0) -> float:
+        """Expected value over the end-of-turn events; stops early (returning ≤ alpha) once it cannot exceed alpha"""
+        if state[TURN] == state[MAX_TURNS]:
+            return final_turn_value(state[STABILITY], state[MILITARY], state[COLLAPSE], state[DRIFT],
+                                    bool(state[FLAGS] & IB))
+        total, remaining = 0.0, 1.0
+        for p, child in end_turn(state):
+            result = outcome(child)
+            total += p * (result if result is not None else self._value(child))
+            remaining -= p
+            if total + remaining <= alpha:
+                return total + remaining
+        return total
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Exact BRONZE: 1177 BC win probabilities")
+    parser.add_argument("--difficulty", default="normal", choices=list(DIFFICULTY_SETTINGS))
+    parser.add_argument("--turn", type=int, default=None,
+                        help="start the new game at this turn (shorter horizon, same starting stats)")
+    parser.add_argument("--record", help="solve the state of a replay.py record (JSON file)")
+    parser.add_argument("--memo", help="transposition table file to load and save")
+    parser.add_argument("--max-entries", type=int, default=DEFAULT_MAX_ENTRIES)
+    parser.add_argument("--json", action="store_true", help="emit JSON instead of a table")
+    args = parser.parse_args(argv)
+    logging.getLogger("game_logic").setLevel(logging.WARNING)
+
+    if args.record:
+        import replay
+        with open(args.record, encoding="utf-8") as f:
+            game = replay.rebuild(json.load(f))
+    else:
+        game = new_game(args.difficulty, seed=0)
+        if args.turn is not None:
+            game.turn = args.turn
+
+    table = TranspositionTable(args.max_entries)
+    loaded = table.load(args.memo) if args.memo and os.path.exists(args.memo) else 0
+    solver = Solver(table)
+    started = time.perf_counter()
+    values = solver.action_values(game)
+    elapsed = time.perf_counter() - started
+    if args.memo:
+        table.save(args.memo)
+
+    ranked = sorted(values.items(), key=lambda kv: -kv[1])
+    if args.json:
+        print(json.dumps({"turn": game.turn, "difficulty": game.difficulty, "values": dict(ranked),
+                          "nodes": solver.nodes, "memo_entries": len(table), "memo_loaded": loaded,
+                          "elapsed_s": elapsed}, indent=2))
+    else:
+        print(f"== {game.difficulty}, turn {game.turn}/{game.max_turns}")
+        for code, value in ranked:
+            print(f"   {code:<20} {value:8.2%}")
+        print(f"\n{solver.nodes} nodes in {elapsed:.1f}s, memo {len(table)} entries "
+              f"({loaded} loaded, {table.hits} hits)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
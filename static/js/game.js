@@ -34,12 +34,38 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     });
 
-    // Add loading state to action buttons and error handling
-    const actionForms = document.querySelectorAll('form[method="POST"]');
+    // Idempotency keys: one per click, sent with the command (and with its retry),
+    // so the server applies a repeated submit only once (see _run in app.py)
+    function requestKey() {
+        if (window.crypto && window.crypto.randomUUID) {
+            return window.crypto.randomUUID();
+        }
+        return Date.now().toString(36) + Math.random().toString(36).slice(2);
+    }
+
+    function setRequestKey(form, key) {
+        let input = form.querySelector('input[name="idempotency_key"]');
+        if (!input) {
+            input = document.createElement('input');
+            input.type = 'hidden';
+            input.name = 'idempotency_key';
+            form.appendChild(input);
+        }
+        input.value = key;
+    }
+
+    // Add loading state to action buttons and error handling (AJAX forms manage their own)
+    const actionForms = document.querySelectorAll('form[method="POST"]:not([data-api])');
     actionForms.forEach(form => {
         form.addEventListener('submit', function(e) {
             try {
                 const button = this.querySelector('button[type="submit"]');
+                if (this.dataset.submitted) {
+                    e.preventDefault();  // already on its way
+                    return;
+                }
+                this.dataset.submitted = '1';
+                setRequestKey(this, requestKey());
                 if (button && !button.disabled) {
                     button.classList.add('loading');
                     button.disabled = true;
@@ -47,6 +73,7 @@ document.addEventListener('DOMContentLoaded', function() {
                     // Re-enable button after timeout in case server doesn't respond
                     setTimeout(() => {
                         try {
+                            delete form.dataset.submitted;
                             button.classList.remove('loading');
                             button.disabled = false;
                         } catch (err) {
@@ -80,66 +107,283 @@ document.addEventListener('DOMContentLoaded', function() {
         console.error('Page error:', e.error);
     });
 
-    // Optional: AJAX action handling (if you want instant updates without page reload)
-    // Uncomment to enable AJAX mode
-    /*
-    actionForms.forEach(form => {
-        form.addEventListener('submit', async function(e) {
-            e.preventDefault();
+    // AJAX mode: forms with data-api post to the JSON API and redraw in place.
+    // Any failure falls back to a normal form submit (POST-redirect-GET).
+    // The client keeps the state it was rendered with and sends its revision,
+    // so the server can answer with a patch (see state_diff.py) instead of the full state.
+    const root = document.getElementById('game-root');
+    const stateScript = document.getElementById('game-state');
+    let state = stateScript ? JSON.parse(stateScript.textContent) : null;
+    let revision = root ? root.dataset.revision : null;
 
-            const button = this.querySelector('button[type="submit"]');
-            button.classList.add('loading');
-            button.disabled = true;
+    function escapeHtml(text) {
+        const div = document.createElement('div');
+        div.textContent = text == null ? '' : String(text);
+        return div.innerHTML;
+    }
 
-            try {
-                const response = await fetch(this.action, {
-                    method: 'POST',
-                    headers: {
-                        'X-Requested-With': 'XMLHttpRequest'
-                    },
-                    body: new FormData(this)
-                });
-
-                if (!response.ok) {
-                    throw new Error(`HTTP error! status: ${response.status}`);
-                }
+    function lookup(game, path) {
+        return path.split('.').reduce((obj, key) => (obj ? obj[key] : undefined), game);
+    }
 
-                const data = await response.json();
+    function updateStats(game) {
+        document.querySelectorAll('[data-stat]').forEach(el => {
+            el.textContent = game[el.dataset.stat];
+        });
+        document.querySelectorAll('[data-bar]').forEach(el => {
+            el.style.width = game[el.dataset.bar] + '%';
+        });
+    }
 
-                if (data.game_over) {
-                    window.location.href = '/victory';
-                } else {
-                    // Update UI with new game state
-                    updateGameUI(data.game);
-                    displayMessages(data.messages);
-                }
-            } catch (error) {
-                console.error('Action failed:', error);
-                alert('Action failed. Please refresh the page.');
-                // Refresh page on error
-                window.location.reload();
-            } finally {
-                button.classList.remove('loading');
-                button.disabled = false;
+    function setBadge(button, text, className) {
+        let badge = button.querySelector('.badge');
+        if (!text) {
+            if (badge) badge.remove();
+            return;
+        }
+        if (!badge) {
+            badge = document.createElement('span');
+            button.appendChild(badge);
+        }
+        badge.className = 'badge ' + className;
+        badge.textContent = text;
+    }
+
+    function updateActions(game) {
+        document.querySelectorAll('button[data-action]').forEach(button => {
+            const code = button.dataset.action;
+            button.classList.remove('loading');
+            if (code === 'harvest') {
+                button.disabled = game.free_harvest_used;
+                setBadge(button, game.free_harvest_used ? 'USED' : 'FREE',
+                         game.free_harvest_used ? 'bg-secondary' : 'bg-warning text-dark');
+                return;
+            }
+            const done = button.dataset.done ? Boolean(lookup(game, button.dataset.done)) : false;
+            button.disabled = done || game.paid_action_used || (code === 'withdraw' && game.stability < 45);
+            // The tribute target picker is enabled and disabled with its Send button
+            button.form.querySelectorAll('select').forEach(select => {
+                select.disabled = button.disabled;
+            });
+            if (code === 'gather_timber' || code === 'fortify') {
+                setBadge(button, game.paid_action_used ? 'USED' : '', 'bg-secondary');
             }
+            const icon = button.querySelector('.action-icon');
+            if (icon) icon.textContent = done ? '✅' : icon.dataset.icon;
         });
-    });
-
-    function updateGameUI(game) {
-        // Update resources
-        document.querySelector('.card-body span:contains("Grain")').nextElementSibling.textContent = game.grain;
-        // ... (implement full UI update)
     }
 
     function displayMessages(messages) {
         const messageArea = document.getElementById('message-area');
-        messageArea.innerHTML = '';
-        messages.forEach(msg => {
-            const alert = document.createElement('div');
-            alert.className = `alert alert-${msg.type} alert-dismissible fade show`;
-            alert.innerHTML = `${msg.text} <button type="button" class="btn-close" data-bs-dismiss="alert"></button>`;
-            messageArea.appendChild(alert);
+        messageArea.innerHTML = messages.map(msg =>
+            `<div class="alert alert-${escapeHtml(msg.type)} alert-dismissible" role="alert">
+                ${escapeHtml(msg.text)}
+                <button type="button" class="btn-close" aria-label="Close"></button>
+            </div>`).join('');
+    }
+
+    function listHtml(items, className, render) {
+        return `<ul class="${className}" style="font-size: 0.85rem;">${items.map(render).join('')}</ul>`;
+    }
+
+    function updateHistory(game) {
+        let html = '';
+        if (game.current_turn_actions.length) {
+            html += `<div class="card border-primary mb-3">
+                <div class="card-header bg-primary text-white"><strong>📝 Turn ${game.turn} Actions</strong></div>
+                <div class="card-body"><ul class="mb-0">${game.current_turn_actions.map(a =>
+                    `<li>✓ <strong>${escapeHtml(a.name)}:</strong> ${escapeHtml(a.effects)}</li>`).join('')}</ul></div>
+            </div>`;
+        }
+        const summary = game.previous_turn_summary;
+        if (summary) {
+            const sections = [];
+            if (summary.actions.length) {
+                sections.push('<h6 class="text-primary">Actions:</h6>' + listHtml(summary.actions, 'mb-2', a =>
+                    `<li><strong>${escapeHtml(a.name)}:</strong> ${escapeHtml(a.effects)}</li>`));
+            }
+            if (summary.events.length) {
+                sections.push('<h6 class="text-warning">Events:</h6>' + listHtml(summary.events, 'mb-2', e =>
+                    `<li>⚠️ ${escapeHtml(e)}</li>`));
+            }
+            if (summary.income.length) {
+                sections.push('<h6 class="text-success">Income:</h6>' + listHtml(summary.income, 'mb-2', i =>
+                    `<li>💰 ${escapeHtml(i)}</li>`));
+            }
+            if (summary.drift.length) {
+                sections.push('<h6 class="text-muted">Drift:</h6>' + listHtml(summary.drift, 'mb-0', d =>
+                    `<li>📉 ${escapeHtml(d)}</li>`));
+            }
+            html += `<div class="card border-info mb-3">
+                <div class="card-header bg-info text-white"><strong>📜 Turn ${summary.turn_number} Summary</strong></div>
+                <div class="card-body">${sections.join('')}</div>
+            </div>`;
+        }
+        if (!html) {
+            html = '<div class="alert alert-info"><small>Turn history will appear here</small></div>';
+        }
+        document.getElementById('turn-history').innerHTML = html;
+    }
+
+    function choiceForm(pick, label, effects, buttonClass, extraClass) {
+        return `<form method="POST" action="${root.dataset.choice}" data-api="${root.dataset.apiChoice}"${extraClass}>
+            <input type="hidden" name="choice" value="${pick}">
+            <button type="submit" class="btn ${buttonClass} w-100 text-start">
+                <strong>${pick.toUpperCase()})</strong> ${escapeHtml(label)}
+                <br><small class="text-muted">${escapeHtml(effects)}</small>
+            </button>
+        </form>`;
+    }
+
+    function updateChoice(game) {
+        const choice = game.pending_choice;
+        document.getElementById('choice-modal').innerHTML = !choice ? '' :
+            `<div class="modal show d-block" style="background-color: rgba(0,0,0,0.5);" tabindex="-1">
+                <div class="modal-dialog modal-dialog-centered"><div class="modal-content">
+                    <div class="modal-header bg-warning text-dark">
+                        <h5 class="modal-title"><strong>⚠️ ${escapeHtml(choice.title)}</strong></h5>
+                    </div>
+                    <div class="modal-body">
+                        <p>${escapeHtml(choice.description)}</p>
+                        <hr>
+                        <div class="d-grid gap-2">
+                            ${choiceForm('a', choice.choice_a_label, choice.choice_a_effects, 'btn-outline-primary', ' class="mb-2"')}
+                            ${choiceForm('b', choice.choice_b_label, choice.choice_b_effects, 'btn-outline-secondary', '')}
+                        </div>
+                    </div>
+                </div></div>
+            </div>`;
+    }
+
+    function updateTurnStatus(game) {
+        const harvested = game.free_harvest_used, paid = game.paid_action_used;
+        let status;
+        if (!harvested && !paid) {
+            status = `<strong>⏳ Turn ${game.turn}:</strong> Take ONE free harvest/timber, then ONE paid action`;
+        } else if (harvested && !paid) {
+            status = `<strong>⏳ Turn ${game.turn}:</strong> Free harvest used! Now take your paid action`;
+        } else if (!harvested && paid) {
+            status = `<strong>⏳ Turn ${game.turn}:</strong> Paid action done! Take your free harvest to end turn`;
+        } else {
+            status = `<strong>✓ Turn ${game.turn} Complete!</strong> Ready to end turn`;
+        }
+        let html = `<div class="alert alert-info text-center">${status}</div>`;
+        if (harvested && paid) {
+            html += `<div class="text-center">
+                <form method="POST" action="${root.dataset.endTurn}" data-api="${root.dataset.apiEndTurn}">
+                    <button type="submit" class="btn btn-primary btn-lg">⏭️ End Turn ${game.turn}</button>
+                </form>
+            </div>`;
+        }
+        document.getElementById('turn-status').innerHTML = html;
+    }
+
+    // Mirrors state_diff.apply(); returns the new state and the top-level keys that changed
+    function applyPatch(before, patch) {
+        const next = Object.assign({}, before, patch.set || {});
+        Object.entries(patch.merge || {}).forEach(([key, changes]) => {
+            next[key] = Object.assign({}, before[key], changes);
         });
+        Object.entries(patch.splice || {}).forEach(([key, [drop, items]]) => {
+            next[key] = before[key].slice(drop).concat(items);
+        });
+        (patch.unset || []).forEach(key => delete next[key]);
+        const changed = new Set(['set', 'merge', 'splice'].flatMap(section => Object.keys(patch[section] || {})));
+        (patch.unset || []).forEach(key => changed.add(key));
+        return [next, changed];
     }
-    */
+
+    // Redraw the parts of the page that depend on a changed key (all of them without a key set)
+    function updateGameUI(game, changed) {
+        const any = (...keys) => !changed || keys.some(key => changed.has(key));
+        updateStats(game);
+        updateActions(game);  // also clears the loading state of the clicked action
+        if (any('message_log')) {
+            displayMessages(game.message_log);
+        }
+        if (any('turn', 'current_turn_actions', 'previous_turn_summary')) {
+            updateHistory(game);
+        }
+        if (any('pending_choice')) {
+            updateChoice(game);
+        }
+        if (any('turn', 'free_harvest_used', 'paid_action_used')) {
+            updateTurnStatus(game);
+        }
+    }
+
+    // Delegated, so redrawn choice and end-turn forms are handled too.
+    // Per-form listeners (e.g. confirmations) run first and may cancel.
+    // One command at a time: clicks while one is in flight are dropped, since
+    // they were aimed at a state that is about to change.
+    let inFlight = false;
+    document.addEventListener('submit', async function(e) {
+        const form = e.target;
+        if (!root || !form.dataset || !form.dataset.api || e.defaultPrevented) {
+            return;
+        }
+        e.preventDefault();
+        if (inFlight) {
+            return;
+        }
+        inFlight = true;
+        const key = requestKey();
+
+        const button = form.querySelector('button[type="submit"]');
+        if (button) {
+            button.classList.add('loading');
+            button.disabled = true;
+        }
+
+        const headers = {
+            'X-Requested-With': 'XMLHttpRequest',
+            'Accept': 'application/json',
+            'Idempotency-Key': key
+        };
+        if (state && revision) {
+            headers['X-Game-Revision'] = revision;
+        }
+
+        try {
+            const response = await fetch(form.dataset.api, {
+                method: 'POST',
+                headers: headers,
+                body: new FormData(form)
+            });
+
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+
+            const data = await response.json();
+
+            if (data.game_over) {
+                window.location.href = data.redirect;
+            } else if (data.patch) {
+                const [next, changed] = applyPatch(state, data.patch);
+                state = next;
+                revision = data.revision;
+                updateGameUI(state, changed);
+            } else {
+                state = data.game;
+                revision = data.revision;
+                updateGameUI(state);
+            }
+            // Why a command was refused: shown once, not part of the saved state
+            if (data.notices) {
+                displayMessages(state.message_log.concat(data.notices));
+            }
+            // A refused choice or end turn leaves its form in place
+            if (button && button.isConnected && !button.dataset.action) {
+                button.classList.remove('loading');
+                button.disabled = false;
+            }
+            inFlight = false;
+        } catch (error) {
+            console.error('Action failed, falling back to a full page submit:', error);
+            // Same key: if the command did go through, the server will not run it again
+            setRequestKey(form, key);
+            HTMLFormElement.prototype.submit.call(form);
+        }
+    });
 });
@@ -0,0 +1,259 @@
+# sweep.py — parallel difficulty/parameter sweep with sequential early stopping
+# - Varies the difficulty knobs (max_turns, starting stability and collapse,
+#   drift_per_turn) and the end-of-turn event chances over a grid, on top of a
+#   base difficulty preset
+# - Cells are simulated in rounds of chunks spread over a process pool; after
+#   each round a cell stops as soon as the Wilson interval on its win rate
+#   (preservation + vacuum) is within ±precision, or once it reaches max_games.
+#   Hopeless and certain cells settle after one chunk, which is what keeps a
+#   1000-cell grid affordable. (The interval is re-checked every round, so its
+#   coverage is nominal: treat precision as a stopping rule, not a guarantee.)
+# - Reports a win-rate matrix: one row per cell, one column per outcome
+#
+# Usage:
+#   python sweep.py --max-turns 12,16,20 --stability 50,60,70 --collapse 40,50,60 --drift 2,3,4
+#   python sweep.py --negative-chance 0.4,0.5,0.6 --precision 0.01 --json
+
+from __future__ import annotations
+import argparse
+import contextlib
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import game_logic
+from game_logic import DIFFICULTY_SETTINGS
+from simulate import POLICIES, _init_worker, load_policy, play_game
+
+# Game fields a cell may override (applied after the difficulty preset)
+GAME_KNOBS: Tuple[str, ...] = ("max_turns", "stability", "collapse", "drift_per_turn")
+# Event-chance knobs → the game_logic constants they replace
+CHANCE_KNOBS: Dict[str, str] = {
+    "negative_chance": "NEGATIVE_CHANCE",
+    "positive_chance": "POSITIVE_CHANCE",
+    "choice_chance": "CHOICE_CHANCE",
+}
+WIN_OUTCOMES = ("preservation", "vacuum")
+
+CHUNK_SIZE = 500
+DEFAULT_PRECISION = 0.02
+DEFAULT_CONFIDENCE = 0.95
+MAX_GAMES = 50_000
+
+
+# ------------------------
+# Grid and statistics
+# ------------------------
+def grid(axes: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    """Every combination of the axis values, e.g. {"max_turns": [12, 16], "collapse": [40]} → 2 cells"""
+    unknown = set(axes) - set(GAME_KNOBS) - set(CHANCE_KNOBS)
+    if unknown:
+        raise ValueError(f"Unknown sweep knob(s): {', '.join(sorted(unknown))}")
+    names = list(axes)
+    cells = [dict(zip(names, values)) for values in itertools.product(*(axes[n] for n in names))]
+    for cell in cells:
+        chances = [cell.get(knob, getattr(game_logic, const)) for knob, const in CHANCE_KNOBS.items()]
+        if min(chances) < 0 or sum(chances) > 1:
+            raise ValueError(f"Event chances must be >= 0 and sum to at most 1: {cell}")
+    return cells
+
+
+def wilson(wins: int, games: int, z: float) -> Tuple[float, float]:
+    """Wilson score interval for a binomial proportion"""
+    if games == 0:
+        return 0.0, 1.0
+    p = wins / games
+    denom = 1 + z * z / games
+    centre = (p + z * z / (2 * games)) / denom
+    half = z * math.sqrt(p * (1 - p) / games + z * z / (4 * games * games)) / denom
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+
+@contextlib.contextmanager
+def event_chances(**chances: float) -> Iterator[None]:
+    """Temporarily replace game_logic's event chances (negative_chance=..., ...) in this process"""
+    saved = {const: getattr(game_logic, const) for const in CHANCE_KNOBS.values()}
+    try:
+        for knob, value in chances.items():
+            setattr(game_logic, CHANCE_KNOBS[knob], value)
+        yield
+    finally:
+        for const, value in saved.items():
+            setattr(game_logic, const, value)
+
+
+# ------------------------
+# Worker
+# ------------------------
+def run_chunk(task: Tuple[int, str, str, Dict[str, Any], int, int]) -> Tuple[int, Dict[str, int], int]:
+    """Worker entry point: play `count` games of one cell and return (cell_index, outcomes, total_turns)"""
+    index, difficulty, policy_name, cell, count, seed = task
+    settings = {k: v for k, v in cell.items() if k in GAME_KNOBS}
+    chances = {k: v for k, v in cell.items() if k in CHANCE_KNOBS}
+    rng = random.Random(seed)
+    policy = load_policy(policy_name)
+    outcomes: Counter = Counter()
+    total_turns = 0
+    with event_chances(**chances):
+        for _ in range(count):
+            outcome, turns = play_game(difficulty, policy, rng, seed=rng.getrandbits(32), settings=settings)
+            outcomes[outcome] += 1
+            total_turns += turns
+    return index, dict(outcomes), total_turns
+
+
+# ------------------------
+# Sweep driver
+# ------------------------
+def run_sweep(cells: Sequence[Dict[str, Any]], difficulty: str = "normal", policy_name: str = "random",
+              workers: Optional[int] = None, seed: int = 0, chunk_size: int = CHUNK_SIZE,
+              precision: float = DEFAULT_PRECISION, confidence: float = DEFAULT_CONFIDENCE,
+              max_games: int = MAX_GAMES) -> List[Dict[str, Any]]:
+    """
+    Simulate every cell until its win-rate interval is within ±precision (or max_games).
+    Returns one dict per cell, in order:
+    {"params", "games", "outcomes", "rates", "win_rate", "ci", "avg_turns", "stopped"}
+    where stopped is "precision" or "max_games". Reproducible for a given seed and worker count.
+    """
+    if difficulty not in DIFFICULTY_SETTINGS:
+        raise ValueError(f"Invalid difficulty: {difficulty}")
+    load_policy(policy_name)  # fail fast on a bad name
+    workers = workers or os.cpu_count() or 1
+    z = statistics.NormalDist().inv_cdf(0.5 + confidence / 2)
+
+    totals: List[Counter] = [Counter() for _ in cells]
+    turns = [0] * len(cells)
+    chunks = [0] * len(cells)
+    stopped: List[Optional[str]] = [None] * len(cells)
+    active = list(range(len(cells)))
+
+    pool = None if workers == 1 else multiprocessing.Pool(processes=workers, initializer=_init_worker)
+    if pool is None:
+        _init_worker()
+    try:
+        while active:
+            # Keep every worker busy: few cells left → several chunks each per round
+            per_cell = max(1, workers // len(active))
+            tasks = []
+            for i in active:
+                planned = sum(totals[i].values())
+                for _ in range(per_cell):
+                    count = min(chunk_size, max_games - planned)
+                    if count <= 0:
+                        break
+                    tasks.append((i, difficulty, policy_name, cells[i], count, seed + i * 1_000_003 + chunks[i]))
+                    chunks[i] += 1
+                    planned += count
+            done = map(run_chunk, tasks) if pool is None else pool.imap_unordered(run_chunk, tasks)
+            for i, outcomes, total_turns in done:
+                totals[i].update(outcomes)
+                turns[i] += total_turns
+
+            for i in active:
+                games = sum(totals[i].values())
+                low, high = wilson(sum(totals[i][o] for o in WIN_OUTCOMES), games, z)
+                if (high - low) / 2 <= precision:
+                    stopped[i] = "precision"
+                elif games >= max_games:
+                    stopped[i] = "max_games"
+            active = [i for i in active if stopped[i] is None]
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    results: List[Dict[str, Any]] = []
+    for cell, outcomes, cell_turns, reason in zip(cells, totals, turns, stopped):
+        games = sum(outcomes.values())
+        wins = sum(outcomes[o] for o in WIN_OUTCOMES)
+        low, high = wilson(wins, games, z)
+        results.append({
+            "params": dict(cell),
+            "games": games,
+            "outcomes": dict(sorted(outcomes.items())),
+            "rates": {k: v / games for k, v in sorted(outcomes.items())},
+            "win_rate": wins / games,
+            "ci": [low, high],
+            "avg_turns": cell_turns / games,
+            "stopped": reason,
+        })
+    return results
+
+
+def format_matrix(results: Sequence[Dict[str, Any]]) -> str:
+    """One row per cell: its parameters, games played, win rate ± half-width and each outcome's rate"""
+    if not results:
+        return "(no cells)"
+    knobs = list(results[0]["params"])
+    outcomes = sorted({o for r in results for o in r["outcomes"]},
+                      key=lambda o: (o not in WIN_OUTCOMES, o))
+    header = [f"{k:>15}" for k in knobs] + [f"{'games':>7}", f"{'win':>15}"] + [f"{o:>17}" for o in outcomes]
+    lines = [" ".join(header)]
+    for r in results:
+        half = (r["ci"][1] - r["ci"][0]) / 2
+        row = [f"{r['params'][k]:>15}" for k in knobs]
+        row += [f"{r['games']:>7}", f"{r['win_rate']:>7.2%} ±{half:>6.2%}"]
+        row += [f"{r['rates'].get(o, 0.0):>17.2%}" for o in outcomes]
+        lines.append(" ".join(row))
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    def ints(text: str) -> List[int]:
+        return [int(v) for v in text.split(",")]
+
+    def floats(text: str) -> List[float]:
+        return [float(v) for v in text.split(",")]
+
+    parser = argparse.ArgumentParser(description="Sweep BRONZE: 1177 BC difficulty parameters")
+    parser.add_argument("--difficulty", default="normal", help=f"base preset: one of {', '.join(DIFFICULTY_SETTINGS)}")
+    parser.add_argument("--max-turns", type=ints, help="comma-separated values")
+    parser.add_argument("--stability", type=ints, help="starting Stability values")
+    parser.add_argument("--collapse", type=ints, help="starting Collapse values")
+    parser.add_argument("--drift", type=ints, dest="drift_per_turn", help="Collapse drift per turn values")
+    parser.add_argument("--negative-chance", type=floats)
+    parser.add_argument("--positive-chance", type=floats)
+    parser.add_argument("--choice-chance", type=floats)
+    parser.add_argument("--policy", default="random", help=f"one of {', '.join(POLICIES)} or module:attr")
+    parser.add_argument("--precision", type=float, default=DEFAULT_PRECISION,
+                        help="stop a cell once its win-rate interval is within ± this")
+    parser.add_argument("--confidence", type=float, default=DEFAULT_CONFIDENCE)
+    parser.add_argument("--max-games", type=int, default=MAX_GAMES, help="per cell")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="emit JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    axes = {k: getattr(args, k) for k in GAME_KNOBS + tuple(CHANCE_KNOBS) if getattr(args, k) is not None}
+    try:
+        cells = grid(axes)
+        started = time.perf_counter()
+        results = run_sweep(cells, args.difficulty, args.policy, args.workers, args.seed, args.chunk_size,
+                            args.precision, args.confidence, args.max_games)
+    except ValueError as e:
+        parser.error(str(e))
+    elapsed = time.perf_counter() - started
+
+    total = sum(r["games"] for r in results)
+    if args.json:
+        print(json.dumps({"difficulty": args.difficulty, "policy": args.policy, "seed": args.seed,
+                          "precision": args.precision, "confidence": args.confidence,
+                          "elapsed_s": elapsed, "games": total, "cells": results}, indent=2))
+    else:
+        print(format_matrix(results))
+        print(f"\n{len(results)} cells, {total} games in {elapsed:.1f}s "
+              f"({total / elapsed:,.0f} games/s, policy={args.policy})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
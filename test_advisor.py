@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test suite for the time-budgeted MCTS advisor
+"""
+
+import logging
+import random
+import time
+import unittest
+
+import advisor
+from game_logic import Game, new_game
+from solver import state_of
+
+logging.getLogger("game_logic").setLevel(logging.WARNING)
+
+
+class TestSearch(unittest.TestCase):
+    """Test the search itself (inline, no pool)"""
+
+    def setUp(self):
+        advisor.configure(0)
+
+    def test_respects_budget(self):
+        """Test that a search returns close to its wall-clock budget"""
+        started = time.perf_counter()
+        result = advisor.recommend(new_game("normal", seed=1), budget_ms=30, seed=1)
+        self.assertLess(time.perf_counter() - started, 0.2)
+        self.assertGreater(result["iterations"], 0)
+
+    def test_ranks_every_legal_decision(self):
+        """Test that each legal paid action gets a recommendation with a win rate"""
+        g = new_game("hard", seed=2)
+        result = advisor.recommend(g, budget_ms=20, seed=2)
+        actions = [r["action"] for r in result["recommendations"]]
+        self.assertEqual(sorted(actions), sorted(c for c in g.legal_action_codes() if c != "harvest"))
+        self.assertTrue(all(0.0 <= r["win_rate"] <= 1.0 for r in result["recommendations"]))
+        visits = [r["visits"] for r in result["recommendations"]]
+        self.assertEqual(visits, sorted(visits, reverse=True))
+
+    def test_finds_immediate_win(self):
+        """Test that an action winning on the spot (Collapse to 0) is ranked first"""
+        g = Game(collapse=3, timber=50, grain=50)
+        top = advisor.recommend(g, budget_ms=50, seed=3)["recommendations"][0]
+        self.assertEqual(top["action"], "build_lighthouse")
+        self.assertEqual(top["win_rate"], 1.0)
+
+    def test_pending_choice_is_the_decision(self):
+        """Test that a pending choice is answered before any action"""
+        g = new_game("normal", seed=4)
+        g.pending_choice = g._create_refugee_crisis_choice()
+        actions = {r["action"] for r in advisor.recommend(g, budget_ms=10, seed=4)["recommendations"]}
+        self.assertEqual(actions, {"choice:a", "choice:b"})
+
+    def test_playout_ends(self):
+        """Test that random playouts always reach a result"""
+        rng = random.Random(5)
+        for seed in range(20):
+            self.assertIn(advisor.playout(state_of(new_game("easy", seed=seed)), rng), (0.0, 1.0))
+
+
+class TestPool(unittest.TestCase):
+    """Test pooled searches"""
+
+    def tearDown(self):
+        advisor.configure(0)
+
+    def test_pooled_search_matches_shape(self):
+        """Test that a worker process returns the same result structure"""
+        advisor.configure(1)
+        advisor._pool.submit(int).result(timeout=30)  # wait for the worker to start
+        result = advisor.recommend(new_game("normal", seed=6), budget_ms=20, seed=6)
+        self.assertTrue(result["recommendations"])
+        self.assertEqual(result["budget_ms"], 20)
+
+    def test_busy_when_slots_taken(self):
+        """Test that requests beyond the in-flight limit are rejected instead of queued"""
+        advisor.configure(1)
+        while advisor._slots.acquire(blocking=False):
+            pass
+        with self.assertRaises(advisor.AdvisorBusy):
+            advisor.recommend(new_game("normal", seed=7), budget_ms=5)
+
+
+if __name__ == '__main__':
+    unittest.main()
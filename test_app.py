@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""
+Test suite for the Flask routes - session persistence and request flow
+"""
+
+import json
+import logging
+import os
+import subprocess
+import sys
+import unittest
+from unittest import mock
+from flask.sessions import SecureCookieSessionInterface
+
+import advisor
+import replay
+import state_diff
+from app import app, create_app
+from game_logic import new_game
+
+logging.getLogger().setLevel(logging.WARNING)
+
+
+class AppTestCase(unittest.TestCase):
+    """Shared Flask test client helpers"""
+
+    def setUp(self):
+        app.config["TESTING"] = True
+        self.client = app.test_client()
+        replay.clear_snapshots()
+
+    def session_data(self):
+        with self.client.session_transaction() as sess:
+            return dict(sess)
+
+    def set_victory(self, kind, reason):
+        """Record a result for the session's current game, as _victory does"""
+        with self.client.session_transaction() as sess:
+            revision = replay.record_revision(sess["game"], app.secret_key)
+            sess["victory"] = {"type": kind, "reason": reason, "revision": revision}
+
+    def cookie_size(self):
+        serializer = SecureCookieSessionInterface().get_signing_serializer(app)
+        return len(serializer.dumps(self.session_data()))
+
+
+class TestEventSourcedSession(AppTestCase):
+    """Test that the session carries only the game record"""
+
+    def test_new_game_stores_record(self):
+        self.client.get("/new_game/hard")
+        record = self.session_data()["game"]
+        self.assertEqual(record["difficulty"], "hard")
+        self.assertEqual(record["log"], "")
+        self.assertIn("id", record)
+
+    def test_cookie_does_not_reveal_the_seed(self):
+        """Test that the readable (signed, not encrypted) cookie carries no seed: only the key derives it"""
+        self.client.get("/new_game/normal")
+        record = self.session_data()["game"]
+        seed = replay.rebuild(record, app.secret_key).rng.seed
+        self.assertNotIn("seed", record)
+        self.assertNotIn(str(seed), json.dumps(record))
+        self.assertNotEqual(replay.record_seed(record, "another key"), seed)
+
+    def test_actions_persist_between_requests(self):
+        self.client.get("/new_game/normal")
+        self.client.post("/action", data={"type": "harvest"})
+        self.client.post("/action", data={"type": "send_tribute", "target": "assyria"})
+        g = replay.rebuild(self.session_data()["game"], app.secret_key)
+        self.assertTrue(g.free_harvest_used)
+        self.assertTrue(g.paid_action_used)
+        self.assertEqual(g.current_turn_actions[1]["name"], "Sent tribute to Assyria")
+
+    def test_unknown_action_is_cancelled(self):
+        self.client.get("/new_game/normal")
+        self.client.post("/action", data={"type": "summon_dragons"})
+        g = replay.rebuild(self.session_data()["game"], app.secret_key)
+        self.assertEqual(g.command_log, [])
+        self.assertFalse(g.paid_action_used)
+        self.assertIn("Action cancelled.", self.client.get("/game").get_data(as_text=True))
+
+    def test_rejected_command_notice_is_shown_once(self):
+        """Test that a refused command's reason survives the redirect once and is not saved in the game"""
+        self.client.get("/new_game/normal")
+        etag = self.client.get("/game").headers["ETag"]
+        self.client.post("/end_turn")
+        page = self.client.get("/game", headers={"If-None-Match": etag})
+        self.assertEqual(page.status_code, 200)
+        self.assertIn("Take the FREE Harvest", page.get_data(as_text=True))
+        self.assertNotIn("notices", self.session_data())
+        again = self.client.get("/game", headers={"If-None-Match": page.headers["ETag"]})
+        self.assertEqual(again.status_code, 200)
+        self.assertNotIn("Take the FREE Harvest", again.get_data(as_text=True))
+        self.assertEqual(self.client.get("/game", headers={"If-None-Match": etag}).status_code, 304)
+
+    def test_session_stays_small_over_a_long_game(self):
+        self.client.get("/new_game/easy")
+        for _ in range(12):
+            self.client.post("/action", data={"type": "harvest"})
+            self.client.post("/action", data={"type": "gather_timber"})
+            self.client.post("/choice", data={"choice": "b"})
+            self.client.post("/end_turn")
+        self.assertLess(self.cookie_size(), 500)
+
+    def test_legacy_payload_is_migrated(self):
+        legacy = new_game("hard", seed=3)
+        legacy.harvest_free()
+        with self.client.session_transaction() as sess:
+            sess["game"] = legacy.to_dict()
+        self.assertEqual(self.client.get("/game").status_code, 200)
+        self.client.post("/action", data={"type": "fortify"})
+        record = self.session_data()["game"]
+        self.assertIn("base", record)
+        self.assertNotIn("rng", record["base"])
+        self.assertNotIn("seed", record)
+        g = replay.rebuild(record, app.secret_key)
+        self.assertEqual(g.difficulty, "hard")
+        self.assertTrue(g.free_harvest_used and g.paid_action_used)
+
+    def test_new_game_drops_the_last_result(self):
+        """Test that /victory never shows an earlier game's result next to the current game"""
+        lost = new_game("normal", seed=5)
+        lost.collapse = 100
+        with self.client.session_transaction() as sess:
+            sess["game"] = lost.to_dict()
+        self.client.post("/end_turn")
+        self.assertEqual(self.client.get("/victory").status_code, 200)
+        self.client.get("/new_game/easy")
+        self.assertEqual(self.client.get("/victory").status_code, 302)
+        self.assertNotIn("victory", self.session_data())
+
+    def test_result_of_another_state_is_ignored(self):
+        self.client.get("/new_game/normal")
+        self.set_victory("defeat", "collapse")
+        self.client.post("/action", data={"type": "harvest"})
+        self.assertEqual(self.client.get("/victory").status_code, 302)
+        self.assertNotIn("victory", self.session_data())
+
+    def test_unsealed_record_is_sealed(self):
+        """Test that a record from before sealed ones keeps its state but stops showing its seed"""
+        old = new_game("normal", seed=3)
+        replay.execute(old, "harvest")
+        with self.client.session_transaction() as sess:
+            sess["game"] = replay.to_record(old)
+        self.assertEqual(self.client.get("/game").status_code, 200)
+        record = self.session_data()["game"]
+        self.assertNotIn("seed", record)
+        self.assertNotIn("rng", record["base"])
+        self.assertTrue(replay.rebuild(record, app.secret_key).free_harvest_used)
+
+    def test_victory_rebuilds_final_state(self):
+        self.client.get("/new_game/normal")
+        self.client.post("/action", data={"type": "harvest"})
+        self.set_victory("defeat", "time")
+        response = self.client.get("/victory")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"Grain", response.data)
+
+
+class TestJsonApi(AppTestCase):
+    """Test the /api/v1 endpoints used by the AJAX client"""
+
+    def test_action_returns_new_state(self):
+        self.client.get("/new_game/normal")
+        response = self.client.post("/api/v1/action", data={"type": "harvest"})
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertTrue(data["ok"])
+        self.assertIsNone(data["game_over"])
+        self.assertTrue(data["game"]["free_harvest_used"])
+        self.assertTrue(replay.rebuild(self.session_data()["game"], app.secret_key).free_harvest_used)
+
+    def test_action_accepts_json_body(self):
+        self.client.get("/new_game/normal")
+        self.client.post("/api/v1/action", json={"type": "harvest"})
+        data = self.client.post("/api/v1/action", json={"type": "send_tribute", "target": "assyria"}).get_json()
+        self.assertTrue(data["ok"])
+        self.assertEqual(data["game"]["current_turn_actions"][1]["name"], "Sent tribute to Assyria")
+
+    def test_rejected_action_is_not_ok(self):
+        self.client.get("/new_game/normal")
+        start = self.client.post("/api/v1/action", data={"type": "summon_dragons"}).get_json()
+        self.assertFalse(start["ok"])
+        self.assertEqual(start["notices"], [{"type": "secondary", "text": "Action cancelled."}])
+        self.assertEqual(start["game"]["message_log"], [])
+        # Nothing changed: the revision stays and a client holding it gets an empty patch
+        data = self.client.post("/api/v1/action", data={"type": "summon_dragons"},
+                                headers={"X-Game-Revision": start["revision"]}).get_json()
+        self.assertEqual(data["revision"], start["revision"])
+        self.assertEqual(data["patch"], {})
+
+    def test_responses_carry_no_rng(self):
+        """Test that neither full states nor patches expose the game's random stream"""
+        self.client.get("/new_game/normal")
+        first = self.client.post("/api/v1/action", data={"type": "harvest"}).get_json()
+        patched = self.client.post("/api/v1/action", data={"type": "fortify"},
+                                   headers={"X-Game-Revision": first["revision"]}).get_json()
+        self.assertNotIn("rng", first["game"])
+        self.assertFalse(first["revision"].startswith(f'{replay.record_seed(self.session_data()["game"], app.secret_key):x}.'))
+        self.assertIn("patch", patched)
+        self.assertNotIn("rng", str(patched["patch"]))
+
+    def test_end_turn_advances(self):
+        self.client.get("/new_game/normal")
+        self.client.post("/api/v1/action", data={"type": "harvest"})
+        self.client.post("/api/v1/action", data={"type": "fortify"})
+        data = self.client.post("/api/v1/end_turn").get_json()
+        self.assertTrue(data["ok"])
+        self.assertEqual(data["game"]["turn"], 2)
+        self.assertEqual(replay.rebuild(self.session_data()["game"], app.secret_key).turn, 2)
+
+    def test_end_turn_refused_mid_turn(self):
+        self.client.get("/new_game/normal")
+        data = self.client.post("/api/v1/end_turn").get_json()
+        self.assertFalse(data["ok"])
+        self.assertEqual(data["game"]["turn"], 1)
+
+    def test_invalid_choice_is_not_ok(self):
+        self.client.get("/new_game/normal")
+        data = self.client.post("/api/v1/choice", data={"choice": "z"}).get_json()
+        self.assertFalse(data["ok"])
+
+    def test_matching_revision_gets_a_patch(self):
+        """Test that a client holding the current state receives only the changes"""
+        self.client.get("/new_game/normal")
+        first = self.client.post("/api/v1/action", data={"type": "harvest"}).get_json()
+        response = self.client.post("/api/v1/action", data={"type": "fortify"},
+                                    headers={"X-Game-Revision": first["revision"]})
+        data = response.get_json()
+        self.assertNotIn("game", data)
+        self.assertNotEqual(data["revision"], first["revision"])
+        self.assertEqual(state_diff.apply(first["game"], data["patch"]),
+                         replay.rebuild(self.session_data()["game"], app.secret_key).to_dict())
+
+    def test_stale_revision_gets_full_state(self):
+        """Test that an out-of-date client is sent the whole state"""
+        self.client.get("/new_game/normal")
+        first = self.client.post("/api/v1/action", data={"type": "harvest"}).get_json()
+        self.client.post("/action", data={"type": "fortify"})
+        data = self.client.post("/api/v1/end_turn", headers={"X-Game-Revision": first["revision"]}).get_json()
+        self.assertNotIn("patch", data)
+        self.assertEqual(data["game"]["turn"], 2)
+
+    def test_game_page_embeds_state_and_revision(self):
+        """Test that the page carries the state and revision the client patches"""
+        self.client.get("/new_game/normal")
+        html = self.client.get("/game").get_data(as_text=True)
+        g = replay.rebuild(self.session_data()["game"], app.secret_key)
+        self.assertIn('id="game-state"', html)
+        self.assertIn(f'data-revision="{replay.revision(g, app.secret_key)}"', html)
+
+    def test_game_page_hides_rng(self):
+        """Test that the embedded state does not carry the game's random stream"""
+        self.client.get("/new_game/normal")
+        html = self.client.get("/game").get_data(as_text=True)
+        self.assertNotIn('"rng"', html)
+
+    def test_game_over_points_at_victory(self):
+        lost = new_game("normal", seed=5)
+        lost.collapse = 100
+        with self.client.session_transaction() as sess:
+            sess["game"] = lost.to_dict()
+        data = self.client.post("/api/v1/action", data={"type": "harvest"}).get_json()
+        self.assertEqual(data["game_over"]["type"], "defeat")
+        self.assertEqual(data["redirect"], "/victory")
+        self.assertNotIn("game", data)
+        self.assertEqual(self.session_data()["victory"]["reason"], "collapse")
+
+
+class TestDuplicateSubmits(AppTestCase):
+    """Test that a repeated idempotency key is answered without running the command again"""
+
+    def log(self):
+        return self.session_data()["game"]["log"]
+
+    def test_repeated_api_key_is_coalesced(self):
+        self.client.get("/new_game/normal")
+        headers = {"Idempotency-Key": "k1"}
+        first = self.client.post("/api/v1/action", data={"type": "harvest"}, headers=headers).get_json()
+        again = self.client.post("/api/v1/action", data={"type": "harvest"}, headers=headers).get_json()
+        self.assertEqual(len(self.log()), 1)
+        self.assertTrue(again["ok"])
+        self.assertEqual(again["game"], first["game"])
+
+    def test_repeated_form_key_is_coalesced(self):
+        """Test the fallback form submit after an API call that did go through"""
+        self.client.get("/new_game/normal")
+        self.client.post("/api/v1/action", data={"type": "harvest"}, headers={"Idempotency-Key": "k2"})
+        response = self.client.post("/action", data={"type": "harvest", "idempotency_key": "k2"})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(self.log()), 1)
+
+    def test_new_key_runs_again(self):
+        self.client.get("/new_game/normal")
+        self.client.post("/api/v1/action", data={"type": "harvest"}, headers={"Idempotency-Key": "k3"})
+        data = self.client.post("/api/v1/action", data={"type": "harvest"},
+                                headers={"Idempotency-Key": "k4"}).get_json()
+        self.assertFalse(data["ok"])
+        self.assertEqual(len(data["notices"]), 1)
+        self.assertEqual(len(self.log()), 1)
+
+
+class TestConditionalGet(AppTestCase):
+    """Test ETags and 304 responses on /game and /victory"""
+
+    def test_game_has_strong_etag(self):
+        self.client.get("/new_game/normal")
+        response = self.client.get("/game")
+        etag, weak = response.get_etag()
+        self.assertTrue(etag)
+        self.assertFalse(weak)
+        self.assertEqual(response.headers["Cache-Control"], "private, no-cache")
+        self.assertIn("Cookie", response.headers["Vary"])
+
+    def test_matching_etag_skips_rebuild_and_render(self):
+        self.client.get("/new_game/normal")
+        self.client.post("/action", data={"type": "harvest"})
+        etag = self.client.get("/game").headers["ETag"]
+        with mock.patch("replay.rebuild") as rebuild, mock.patch("app.render_template") as render:
+            response = self.client.get("/game", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b"")
+        self.assertEqual(response.headers["ETag"], etag)
+        rebuild.assert_not_called()
+        render.assert_not_called()
+
+    def test_etag_changes_with_every_command(self):
+        self.client.get("/new_game/normal")
+        first = self.client.get("/game").headers["ETag"]
+        self.client.post("/action", data={"type": "harvest"})
+        response = self.client.get("/game", headers={"If-None-Match": first})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], first)
+
+    def test_etag_differs_between_games(self):
+        self.client.get("/new_game/normal")
+        first = self.client.get("/game").headers["ETag"]
+        self.client.get("/new_game/normal")
+        self.assertEqual(self.client.get("/game", headers={"If-None-Match": first}).status_code, 200)
+
+    def test_victory_etag(self):
+        self.client.get("/new_game/normal")
+        self.set_victory("defeat", "time")
+        response = self.client.get("/victory")
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers["ETag"]
+        self.assertEqual(self.client.get("/victory", headers={"If-None-Match": etag}).status_code, 304)
+        self.set_victory("defeat", "collapse")
+        self.assertEqual(self.client.get("/victory", headers={"If-None-Match": etag}).status_code, 200)
+
+    def test_legacy_payload_is_not_cached(self):
+        with self.client.session_transaction() as sess:
+            sess["game"] = new_game("hard", seed=3).to_dict()
+        response = self.client.get("/game", headers={"If-None-Match": "*"})
+        self.assertEqual(response.status_code, 200)
+
+
+class TestAppFactory(unittest.TestCase):
+    """Test create_app"""
+
+    def test_no_search_pool_by_default(self):
+        """Test that building an app starts no process pool unless HINT_WORKERS asks for one"""
+        with mock.patch.dict(os.environ), mock.patch("app._advisor") as start:
+            os.environ.pop("HINT_WORKERS", None)
+            other = create_app({"TESTING": True})
+        self.assertEqual(other.config["HINT_WORKERS"], "0")
+        start.assert_not_called()
+
+    def test_cookie_app_skips_optional_imports(self):
+        """Test that importing the app (a cold start) loads no advisor or session backend library"""
+        code = "import sys, app; print(sorted({'advisor', 'redis', 'sqlite3'} & set(sys.modules)))"
+        env = dict(os.environ, HINT_WORKERS="0", SESSION_BACKEND="cookie")
+        out = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                             env=env, check=True, stdout=subprocess.PIPE, text=True).stdout
+        self.assertEqual(out.strip().splitlines()[-1], "[]")
+
+    def test_config_overrides_environment(self):
+        """Test that a second app gets every route and its own settings"""
+        other = create_app({"TESTING": True, "HINT_WORKERS": "0", "SECRET_KEY": "other"})
+        self.assertIsNot(other, app)
+        self.assertEqual(other.secret_key, "other")
+        self.assertEqual({r.endpoint for r in other.url_map.iter_rules()},
+                         {r.endpoint for r in app.url_map.iter_rules()})
+        client = other.test_client()
+        client.get("/new_game/hard")
+        self.assertEqual(client.get("/game").status_code, 200)
+
+
+class TestHint(AppTestCase):
+    """Test the MCTS advisor endpoint"""
+
+    def setUp(self):
+        super().setUp()
+        advisor.configure(0)
+
+    def test_hint_ranks_actions(self):
+        self.client.get("/new_game/normal")
+        response = self.client.get("/hint?budget_ms=20")
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data["turn"], 1)
+        self.assertTrue(data["recommendations"])
+        self.assertIn("win_rate", data["recommendations"][0])
+
+    def test_hint_does_not_change_the_game(self):
+        self.client.get("/new_game/hard")
+        before = self.session_data()["game"]
+        self.client.get("/hint?budget_ms=5")
+        self.assertEqual(self.session_data()["game"], before)
+
+    def test_hint_reports_busy(self):
+        with mock.patch.object(advisor, "recommend", side_effect=advisor.AdvisorBusy("busy")):
+            response = self.client.get("/hint")
+        self.assertEqual(response.status_code, 503)
+
+    def test_advisor_failure_is_a_json_error(self):
+        with mock.patch("app._advisor", side_effect=ImportError("no advisor")):
+            response = self.client.get("/hint")
+        self.assertEqual(response.status_code, 500)
+        self.assertIn("error", response.get_json())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests for the ASGI entry point: native /api/v1/me routes and the mounted Flask app
+"""
+
+import unittest
+
+import replay
+import session_store
+import state_diff
+
+try:
+    from autogpt_libs.auth import get_user_id
+    from fastapi.testclient import TestClient
+    import asgi
+except ImportError:  # FastAPI, a2wsgi and autogpt_libs are only needed for the ASGI deployment
+    asgi = None
+
+
+@unittest.skipIf(asgi is None, "ASGI dependencies not installed (requirements-asgi.txt)")
+class TestNativeApi(unittest.TestCase):
+    """Test the authenticated JSON API served by FastAPI"""
+
+    def setUp(self):
+        self.players = asgi.PlayerStore(session_store.SessionStore(session_store.MemoryBackend()))
+        self.api = asgi.create_asgi_app(players=self.players)
+        self.user = "player-1"
+        self.api.dependency_overrides[get_user_id] = lambda: self.user
+        self.client = TestClient(self.api)
+
+    def test_requires_authentication(self):
+        """Test that the native routes reject requests without a bearer token"""
+        self.api.dependency_overrides.clear()
+        self.assertEqual(self.client.get("/api/v1/me/game").status_code, 401)
+
+    def test_no_game_yet(self):
+        """Test that a player without a game gets a 404"""
+        self.assertEqual(self.client.get("/api/v1/me/game").status_code, 404)
+
+    def test_actions_persist_per_player(self):
+        """Test that commands land in the player's record and players do not share games"""
+        self.client.post("/api/v1/me/new_game/hard")
+        data = self.client.post("/api/v1/me/action", json={"type": "harvest"}).json()
+        self.assertTrue(data["ok"])
+        self.assertTrue(data["game"]["free_harvest_used"])
+        self.assertEqual(data["revision"], self.client.get("/api/v1/me/game").json()["revision"])
+        g = replay.rebuild(self.players.store.get("player:player-1")["game"])
+        self.assertEqual(g.difficulty, "hard")
+        self.assertTrue(g.free_harvest_used)
+
+        self.user = "player-2"
+        self.assertEqual(self.client.get("/api/v1/me/game").status_code, 404)
+
+    def test_patch_against_current_revision(self):
+        """Test that a matching X-Game-Revision gets a patch that rebuilds the new state"""
+        start = self.client.post("/api/v1/me/new_game/normal").json()
+        data = self.client.post("/api/v1/me/action", json={"type": "harvest"},
+                                headers={"X-Game-Revision": start["revision"]}).json()
+        self.assertNotIn("game", data)
+        state = self.client.get("/api/v1/me/game").json()["game"]
+        self.assertEqual(state_diff.apply(start["game"], data["patch"]), state)
+
+        stale = self.client.post("/api/v1/me/action", json={"type": "fortify"},
+                                 headers={"X-Game-Revision": start["revision"]}).json()
+        self.assertIn("game", stale)
+
+    def test_repeated_idempotency_key_runs_once(self):
+        """Test that a retried command with the same key is answered without running again"""
+        self.client.post("/api/v1/me/new_game/normal")
+        headers = {"Idempotency-Key": "click-1"}
+        first = self.client.post("/api/v1/me/action", json={"type": "harvest"}, headers=headers).json()
+        again = self.client.post("/api/v1/me/action", json={"type": "harvest"}, headers=headers).json()
+        self.assertTrue(again["ok"])
+        self.assertEqual(again["revision"], first["revision"])
+        self.assertEqual(len(self.players.store.get("player:player-1")["game"]["log"]), 1)
+
+    def test_choice_and_end_turn(self):
+        """Test that a turn can be played to the end through the native routes"""
+        self.client.post("/api/v1/me/new_game/easy")
+        self.client.post("/api/v1/me/action", json={"type": "harvest"})
+        self.client.post("/api/v1/me/action", json={"type": "gather_timber"})
+        state = self.client.get("/api/v1/me/game").json()["game"]
+        if state.get("pending_choice"):
+            self.client.post("/api/v1/me/choice", json={"choice": "b"})
+        else:
+            self.client.post("/api/v1/me/end_turn")
+        self.assertEqual(self.client.get("/api/v1/me/game").json()["game"]["turn"], 2)
+
+    def test_flask_routes_are_mounted(self):
+        """Test that pages and the cookie-session API are still served by the Flask app"""
+        self.assertEqual(self.client.get("/").status_code, 200)
+        self.client.get("/new_game/normal")
+        self.assertEqual(self.client.get("/game").status_code, 200)
+        data = self.client.post("/api/v1/action", json={"type": "harvest"}).json()
+        self.assertTrue(data["ok"])
+
+
+if __name__ == '__main__':
+    unittest.main()
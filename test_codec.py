@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test suite for the versioned binary Game codec
+"""
+
+import json
+import random
+import unittest
+from unittest import mock
+
+import codec
+import replay
+from game_logic import Game, new_game
+
+
+def _played(seed: int, commands: int = 30) -> Game:
+    rng = random.Random(seed)
+    g = new_game(rng.choice(["easy", "normal", "hard"]), seed=seed)
+    for _ in range(commands):
+        replay.execute(g, rng.choice(sorted(replay.COMMANDS)))
+    return g
+
+
+class TestRoundTrip(unittest.TestCase):
+    """Test that encode/decode reproduces the full game"""
+
+    def test_round_trip_random_games(self):
+        """Test that decoded games match field for field, including logs and rng"""
+        for seed in range(40):
+            g = _played(seed)
+            h = codec.decode(codec.encode(g))
+            self.assertEqual(h, g)
+            self.assertEqual(h.message_log, g.message_log)
+            self.assertEqual(h.command_log, g.command_log)
+            self.assertEqual(h.rng.to_dict(), g.rng.to_dict())
+            self.assertEqual(h.rng.random(), g.rng.random())
+
+    def test_pending_choice_and_unicode(self):
+        """Test that choice events and non-ASCII text survive"""
+        g = new_game("hard", seed=2)
+        g.pending_choice = g._create_hittite_trade_choice()
+        g._log("⚠️ Ἀχαιοί — test", "warning")
+        h = codec.decode(codec.encode(g))
+        self.assertEqual(h.pending_choice, g.pending_choice)
+        self.assertEqual(h.message_log[-1]["text"], "⚠️ Ἀχαιοί — test")
+
+    def test_decode_skips_post_init(self):
+        """Test that decoding does not run __post_init__"""
+        data = codec.encode(_played(3))
+        with mock.patch.object(Game, "__post_init__") as post_init:
+            codec.decode(data)
+        post_init.assert_not_called()
+
+    def test_smaller_than_dict_payload(self):
+        """Test that the binary form is smaller than the JSON dict even with the full log"""
+        g = codec._sample_game()
+        self.assertLess(len(codec.encode(g)), len(json.dumps(g.to_dict())))
+
+
+class TestSchemaEvolution(unittest.TestCase):
+    """Test forward / backward compatibility rules"""
+
+    def test_unknown_section_is_skipped(self):
+        """Test that sections from a newer writer are ignored"""
+        g = _played(4)
+        data = codec.encode(g) + codec._SECTION.pack(200, 3) + b"xyz"
+        self.assertEqual(codec.decode(data), g)
+
+    def test_missing_sections_use_defaults(self):
+        """Test that a payload with only the core section still decodes"""
+        g = Game(grain=99, has_palace=True)
+        out = [codec._HEADER.pack(codec.MAGIC, codec.VERSION)]
+        codec._section(out, codec.TAG_CORE, codec._CORE.pack(
+            *g.stats, g.flags, 4, 20, 3, 1, 3, True, False))
+        h = codec.decode(b"".join(out))
+        self.assertEqual((h.grain, h.has_palace, h.turn, h.withdrawals_used), (99, True, 4, 1))
+        self.assertEqual(h.difficulty, "normal")
+        self.assertEqual(h.message_log, [])
+
+    def test_grown_section_reads_known_prefix(self):
+        """Test that trailing bytes appended to a known section are ignored"""
+        out = [codec._HEADER.pack(codec.MAGIC, codec.VERSION)]
+        codec._section(out, codec.TAG_RNG, codec._RNG.pack(42, 5) + b"\x00" * 8)
+        self.assertEqual(codec.decode(b"".join(out)).rng.to_dict(), {"seed": 42, "position": 5})
+
+    def test_newer_version_rejected(self):
+        """Test that payloads from a newer codec version raise CodecError"""
+        data = bytearray(codec.encode(Game()))
+        data[2] = codec.VERSION + 1
+        with self.assertRaises(codec.CodecError):
+            codec.decode(bytes(data))
+
+    def test_corrupt_payloads_rejected(self):
+        """Test that bad magic and truncated data raise CodecError"""
+        data = codec.encode(_played(5))
+        for bad in (b"XX" + data[2:], data[:-3], data[:10], b""):
+            with self.assertRaises(codec.CodecError):
+                codec.decode(bad)
+        self.assertTrue(codec.is_encoded(data))
+        self.assertFalse(codec.is_encoded({"turn": 1}))
+
+    def test_unencodable_game_rejected(self):
+        """Test that out-of-range values raise CodecError instead of struct.error"""
+        g = Game(grain=2 ** 40)
+        with self.assertRaises(codec.CodecError):
+            codec.encode(g)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,8 +3,14 @@
 Test suite for game logic - focusing on action handling and turn advancement
 """
 
+import copy
+import random
 import unittest
-from game_logic import Game
+from unittest import mock
+from game_logic import (
+    ACTION_BITS, ACTION_SPECS, ACTIONS, CHOICE_EVENTS, FLAG_BITS, MESSAGE_LOG_CAPACITY, NEGATIVE_EVENTS,
+    POSITIVE_EVENTS, Game, GameRng, MessageLog, new_game,
+)
 
 
 class TestActionHandling(unittest.TestCase):
@@ -143,6 +149,7 @@ class TestTurnAdvancement(unittest.TestCase):
 
     def test_end_turn_applies_drift(self):
         """Test that ending turn applies collapse drift"""
+        self.game.rng = GameRng(0)  # fixed stream: no event cancels out the drift
         self.game.harvest_free()
         self.game.gather_timber()
         initial_collapse = self.game.collapse
@@ -320,5 +327,345 @@ class TestGameEndConditions(unittest.TestCase):
         self.assertEqual(result["reason"], "stability")
 
 
+
+class TestSeededRng(unittest.TestCase):
+    """Test the per-game random stream"""
+
+    def _play(self, game, turns=12):
+        for _ in range(turns):
+            game.pending_choice = None
+            game.harvest_free()
+            game.gather_timber() or game.withdraw_support() or game.host_festival()
+            game.end_turn()
+        return game
+
+    def test_same_seed_same_game(self):
+        """Test that two games with the same seed play out identically"""
+        a = self._play(new_game("normal", seed=42))
+        b = self._play(new_game("normal", seed=42))
+        self.assertEqual(a.to_dict(), b.to_dict())
+
+    def test_rng_survives_round_trip(self):
+        """Test that seed and position travel through to_storage_dict/from_dict"""
+        g = self._play(new_game("hard", seed=7), turns=5)
+        restored = Game.from_dict(g.to_storage_dict())
+        self.assertEqual(restored.rng.seed, 7)
+        self.assertEqual(restored.rng.position, g.rng.position)
+        self.assertEqual(self._play(restored).to_dict()["collapse"], self._play(g).to_dict()["collapse"])
+        self.assertEqual(restored.rng.random(), g.rng.random())
+
+    def test_bulk_mode_matches_unbuffered_stream(self):
+        """Test that pre-drawn blocks return the same values as single draws"""
+        single = GameRng(99)
+        bulk = GameRng(99, block_size=16)
+        values = [single.random() for _ in range(40)]
+        self.assertEqual([bulk.random() for _ in range(5)] + bulk.draws(30) + [bulk.random() for _ in range(5)],
+                         values)
+        self.assertEqual(bulk.position, single.position)
+
+    def test_restored_position_continues_stream(self):
+        """Test that GameRng(seed, position) resumes where the stream left off"""
+        rng = GameRng(5)
+        for _ in range(17):
+            rng.random()
+        self.assertEqual(GameRng(5, position=17).random(), rng.random())
+
+    def test_client_state_hides_rng(self):
+        """Test that the client-facing dict carries no seed or stream position"""
+        g = new_game("normal", seed=7)
+        self.assertNotIn("rng", g.to_dict())
+        self.assertEqual(g.to_storage_dict()["rng"], {"seed": 7, "position": 0})
+
+    def test_missing_rng_gets_fresh_seed(self):
+        """Test that payloads from before seeded games still load"""
+        data = Game().to_storage_dict()
+        del data["rng"]
+        g = Game.from_dict(data)
+        self.assertIsNotNone(g.rng.seed)
+        self.assertEqual(g.rng.position, 0)
+
+
+class TestActionRegistry(unittest.TestCase):
+    """Test the table-driven action registry and legality mask"""
+
+    def test_mask_predicts_perform(self):
+        """Test that legal_actions() agrees with perform() on random states"""
+        rng = random.Random(1177)
+        for _ in range(200):
+            g = new_game("normal", seed=rng.getrandbits(32))
+            for stat in ("grain", "bronze", "timber", "prestige", "stability", "knowledge", "military"):
+                setattr(g, stat, rng.randint(0, 50))
+            g.withdrawals_used = rng.randint(0, 3)
+            g.has_granary = rng.random() < 0.5
+            g.free_harvest_used = rng.random() < 0.3
+            g.paid_action_used = rng.random() < 0.2
+            mask = g.legal_actions()
+            for spec in ACTION_SPECS:
+                self.assertEqual(bool(mask & ACTION_BITS[spec.code]), copy.deepcopy(g).perform(spec.code), spec.code)
+
+    def test_wrapper_uses_registry(self):
+        """Test that the named methods behave like perform()"""
+        a, b = new_game("normal", seed=4), new_game("normal", seed=4)
+        self.assertTrue(a.build_granary())
+        self.assertTrue(b.perform("build_granary"))
+        self.assertEqual(a.to_dict(), b.to_dict())
+        self.assertEqual(a.message_log, b.message_log)
+
+    def test_once_only_action_leaves_mask(self):
+        """Test that a built Granary is no longer legal"""
+        g = Game(timber=100, grain=100)
+        self.assertTrue(g.legal_actions() & ACTION_BITS["build_granary"])
+        g.build_granary()
+        g.paid_action_used = False
+        self.assertFalse(g.legal_actions() & ACTION_BITS["build_granary"])
+        self.assertFalse(g.build_granary())
+        self.assertEqual(g.message_log[-1]["text"], ACTIONS["build_granary"].once)
+
+    def test_tribute_target_in_messages(self):
+        """Test that the tribute target is formatted into the summary and log"""
+        g = Game()
+        self.assertTrue(g.perform("send_tribute", "hittites"))
+        self.assertEqual(g.current_turn_actions[-1]["name"], "Sent tribute to Hittites")
+        self.assertIn("Tribute sent to Hittites!", g.message_log[-1]["text"])
+
+    def test_unknown_action_raises(self):
+        """Test that unknown codes raise KeyError"""
+        with self.assertRaises(KeyError):
+            Game().perform("summon_dragons")
+
+
+class TestEventTables(unittest.TestCase):
+    """Test the precompiled random-event tables"""
+
+    def test_weight_boundaries(self):
+        """Test that a pick on a cumulative boundary selects the entry ending there"""
+        self.assertEqual(NEGATIVE_EVENTS.cumulative, (6, 11, 15, 19, 22))
+        self.assertEqual(NEGATIVE_EVENTS.index(0), 0)
+        self.assertEqual(NEGATIVE_EVENTS.index(6), 0)
+        self.assertEqual(NEGATIVE_EVENTS.index(6.0001), 1)
+        self.assertEqual(NEGATIVE_EVENTS.index(22), 4)
+        self.assertEqual(POSITIVE_EVENTS.index(POSITIVE_EVENTS.total), 3)
+
+    def test_sampled_event_applies_effect_vector(self):
+        """Test that a sampled crisis applies its table entry"""
+        g = Game()
+        with mock.patch.object(g.rng, "random", side_effect=[0.1, 0.0]):
+            g.resolve_random_event()
+        self.assertEqual((g.military, g.stability, g.collapse), (18, 56, 53))
+        self.assertIn("Sea Peoples Raid", g.message_log[-1]["text"])
+
+    def test_choice_events_resolve_from_table(self):
+        """Test that every choice event resolves through its outcome entry"""
+        for outcome in CHOICE_EVENTS:
+            g = Game()
+            g.pending_choice = getattr(g, outcome.factory)()
+            before = getattr(g, outcome.cost_stat)
+            self.assertTrue(g.resolve_choice("a"))
+            self.assertIn(outcome.a_result, g.previous_turn_summary.events[-1])
+            self.assertEqual(getattr(g, outcome.cost_stat), before - outcome.cost)
+
+
+class TestCompactGame(unittest.TestCase):
+    """Test the slotted, packed Game layout"""
+
+    def test_no_instance_dict(self):
+        """Test that games carry no per-instance __dict__"""
+        g = Game()
+        self.assertFalse(hasattr(g, "__dict__"))
+        with self.assertRaises(AttributeError):
+            g.not_a_field = 1
+
+    def test_flags_pack_into_bitmask(self):
+        """Test that flag attributes read and write the bitmask"""
+        g = Game(has_granary=True)
+        self.assertEqual(g.flags, FLAG_BITS["has_granary"])
+        g.tech_imperial_bureaucracy = True
+        g.has_granary = False
+        self.assertEqual(g.flags, FLAG_BITS["tech_imperial_bureaucracy"])
+        self.assertTrue(g.tech_imperial_bureaucracy)
+        self.assertFalse(g.has_granary)
+
+    def test_stats_share_array(self):
+        """Test that stat attributes are views onto the stats array"""
+        g = Game(grain=7, collapse=90)
+        g.bronze += 5
+        self.assertEqual(g.stats, (7, 35, 20, 10, 65, 40, 50, 30, 90))
+
+    def test_equality_and_repr(self):
+        """Test that equality ignores rng / command log and repr lists the fields"""
+        a, b = Game(rng=GameRng(1)), Game(rng=GameRng(2))
+        self.assertEqual(a, b)
+        b.has_palace = True
+        self.assertNotEqual(a, b)
+        self.assertTrue(repr(a).startswith("Game(grain=50, bronze=30,"))
+        self.assertIn("has_palace=False", repr(a))
+
+    def test_deepcopy_is_independent(self):
+        """Test that a copied game shares no mutable state with the original"""
+        g = new_game("normal", seed=6)
+        g.harvest_free()
+        g.gather_timber()
+        clone = copy.deepcopy(g)
+        self.assertEqual(clone, g)
+        clone.grain = 0
+        clone.has_granary = True
+        clone.message_log[-1]["text"] = "changed"
+        clone.previous_turn_summary.actions.append({"name": "x", "effects": ""})
+        self.assertNotEqual(g.grain, 0)
+        self.assertFalse(g.has_granary)
+        self.assertNotEqual(g.message_log[-1]["text"], "changed")
+        self.assertEqual(clone.rng.random(), g.rng.random())
+
+
+class TestMessageLog(unittest.TestCase):
+    """Test the ring-buffer message log"""
+
+    def test_log_is_bounded(self):
+        """Test that a long game keeps only the newest MESSAGE_LOG_CAPACITY messages"""
+        g = Game()
+        for i in range(MESSAGE_LOG_CAPACITY + 10):
+            g._log(f"message {i}")
+        self.assertEqual(len(g.message_log), MESSAGE_LOG_CAPACITY)
+        self.assertEqual(g.message_log[0]["text"], "message 10")
+        self.assertEqual(g.message_log[-1]["text"], f"message {MESSAGE_LOG_CAPACITY + 9}")
+
+    def test_records_render_on_read(self):
+        """Test that coded messages store args and render to the old text"""
+        g = Game()
+        g.perform("send_tribute", "mycenae")
+        code, args = g.message_log.records()[-1]
+        self.assertEqual(args, ("Mycenae", 3))
+        self.assertEqual(g.message_log[-1], {"type": "success",
+                                             "text": "✓ Tribute sent to Mycenae! +5 Prestige, -3 Collapse."})
+        g = Game(stability=40)
+        g.withdraw_support()
+        self.assertEqual(g.message_log[-1], {"type": "warning",
+                                             "text": "✗ Withdraw locked — requires Stability ≥ 45."})
+
+    def test_slices_and_equality(self):
+        """Test that the log slices and compares like a list of dicts"""
+        log = MessageLog([{"type": "info", "text": str(i)} for i in range(5)], capacity=3)
+        self.assertEqual(log, [{"type": "info", "text": t} for t in ("2", "3", "4")])
+        self.assertEqual(log[-2:], [{"type": "info", "text": "3"}, {"type": "info", "text": "4"}])
+        self.assertEqual(Game().to_dict()["message_log"], [])
+
+    def test_zero_capacity_keeps_nothing(self):
+        """Test that simulation games skip messages but play identically"""
+        quiet, loud = new_game("hard", seed=9, message_capacity=0), new_game("hard", seed=9)
+        for g in (quiet, loud):
+            for _ in range(6):
+                g.harvest_free()
+                g.fortify() or g.gather_timber()
+                g.resolve_choice("b")
+                g.end_turn()
+        self.assertEqual(len(quiet.message_log), 0)
+        self.assertTrue(loud.message_log)
+        self.assertEqual(quiet.stats, loud.stats)
+
+
+class TestClone(unittest.TestCase):
+    """Test copy-on-write clones"""
+
+    def _played(self, **kwargs):
+        g = new_game("normal", seed=12, **kwargs)
+        g.command_log.extend([1, 2])
+        g.harvest_free()
+        g.fortify()
+        g.end_turn()
+        g.harvest_free()
+        return g
+
+    def test_clone_is_exact(self):
+        """Test that a clone compares equal, keeps the command log and draws the same stream"""
+        g = self._played()
+        c = g.clone()
+        self.assertEqual(c, g)
+        self.assertEqual(c.to_dict(), g.to_dict())
+        self.assertEqual(c.command_log, g.command_log)
+        self.assertEqual([c.rng.random() for _ in range(5)], [g.rng.random() for _ in range(5)])
+
+    def test_clone_and_original_are_independent(self):
+        """Test that playing on either side leaves the other untouched"""
+        for block_size in (0, 16):
+            g = self._played(block_size=block_size)
+            before = g.to_storage_dict()
+            c = g.clone()
+            c.command_log.append(9)
+            c.fortify() or c.gather_timber()
+            c.end_turn()
+            self.assertEqual(g.to_storage_dict(), before)
+            self.assertNotIn(9, g.command_log)
+            g.end_turn()
+            d = Game.from_dict(before)
+            d.end_turn()
+            self.assertEqual(g.stats, d.stats)
+            self.assertEqual(g.message_log, d.message_log)
+
+    def test_version_counts_commands_per_copy(self):
+        """Test that the state version follows the command log and is not shared with clones"""
+        g = self._played()
+        self.assertEqual(g.version, len(g.command_log))
+        c = g.clone()
+        c.command_log.append(9)
+        self.assertEqual(c.version, g.version + 1)
+
+    def test_clone_of_clone(self):
+        """Test that clones of clones stay independent"""
+        g = self._played()
+        a = g.clone()
+        b = a.clone()
+        b._log("only b")
+        a.current_turn_actions.append({"name": "x", "effects": ""})
+        self.assertNotEqual(g.message_log[-1]["text"], "only b")
+        self.assertEqual(b.message_log[-1]["text"], "only b")
+        self.assertEqual(len(g.current_turn_actions), len(b.current_turn_actions))
+
+
+class TestQuietMode(unittest.TestCase):
+    """Test sim mode (quiet=True)"""
+
+    def _play(self, g, rng):
+        for _ in range(g.max_turns):
+            if g.pending_choice:
+                g.resolve_choice(rng.choice("ab")) or g.resolve_choice("b")
+            g.harvest_free()
+            codes = g.legal_action_codes()
+            for code in rng.sample(codes, min(3, len(codes))):
+                if g.perform(code, "hatti"):
+                    break
+            g.end_turn()
+            if g._check_game_end():
+                break
+
+    def test_same_numbers_as_a_loud_game(self):
+        """Test that quiet games reach the same stats, flags and rng position as normal ones"""
+        for seed in range(20):
+            quiet, loud = new_game("normal", seed=seed, quiet=True), new_game("normal", seed=seed)
+            self._play(quiet, random.Random(seed))
+            self._play(loud, random.Random(seed))
+            self.assertEqual((quiet.stats, quiet.flags, quiet.turn, quiet.withdrawals_used, quiet.rng.position),
+                             (loud.stats, loud.flags, loud.turn, loud.withdrawals_used, loud.rng.position))
+            self.assertEqual(quiet._check_game_end(), loud._check_game_end())
+
+    def test_no_narrative(self):
+        """Test that a quiet game keeps no messages or summaries and logs nothing"""
+        with self.assertNoLogs("game_logic", level="INFO"):
+            g = new_game("hard", seed=3, quiet=True)
+            g.harvest_free()
+            g.fortify()
+            g.end_turn()
+        self.assertEqual(len(g.message_log), 0)
+        self.assertEqual(g.current_turn_actions, [])
+        self.assertEqual(g.previous_turn_summary.actions, [])
+        self.assertTrue(g.clone().quiet and copy.deepcopy(g).quiet)
+
+    def test_game_end_check_logs_nothing(self):
+        """Test that the per-step game end check stays silent in sim mode"""
+        g = new_game("normal", seed=1, quiet=True)
+        g.collapse = 100
+        with self.assertNoLogs("game_logic", level="INFO"):
+            self.assertEqual(g._check_game_end(), {"type": "defeat", "reason": "collapse"})
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test suite for per-request phase timing and the /metrics endpoint
+"""
+
+import logging
+import unittest
+
+import metrics
+import replay
+from app import app
+from metrics import BUCKETS, Histogram, Registry
+
+logging.getLogger().setLevel(logging.WARNING)
+
+
+class TestHistogram(unittest.TestCase):
+    """Test bucketing and the Prometheus text format"""
+
+    def test_observe_buckets_by_upper_bound(self):
+        """Test that a value lands in the first bucket whose bound is >= it"""
+        h = Histogram()
+        for seconds in (BUCKETS[0], BUCKETS[0] * 1.5, 99.0):
+            h.observe(seconds)
+        self.assertEqual(h.counts[0], 1)
+        self.assertEqual(h.counts[1], 1)
+        self.assertEqual(h.counts[-1], 1)
+        self.assertEqual(h.count, 3)
+
+    def test_render_is_cumulative(self):
+        """Test that bucket lines are cumulative and end with +Inf, sum and count"""
+        r = Registry()
+        r.observe("/game", {"render": 0.003, "total": 0.004})
+        r.observe("/game", {"render": 0.2})
+        text = r.render()
+        self.assertIn("# TYPE bronze_request_phase_seconds histogram", text)
+        self.assertIn('bronze_request_phase_seconds_bucket{route="/game",phase="render",le="0.005"} 1', text)
+        self.assertIn('bronze_request_phase_seconds_bucket{route="/game",phase="render",le="0.25"} 2', text)
+        self.assertIn('bronze_request_phase_seconds_bucket{route="/game",phase="render",le="+Inf"} 2', text)
+        self.assertIn('bronze_request_phase_seconds_count{route="/game",phase="total"} 1', text)
+
+
+class TestRequestTiming(unittest.TestCase):
+    """Test the Flask wiring"""
+
+    def setUp(self):
+        app.config["TESTING"] = True
+        self.client = app.test_client()
+        replay.clear_snapshots()
+        metrics.registry.clear()
+        self.addCleanup(metrics.configure, 0.0)
+
+    def test_sampled_requests_record_every_phase(self):
+        """Test that an action request records session, engine and total phases"""
+        metrics.configure(1.0)
+        self.client.get("/new_game/normal")
+        self.client.post("/action", data={"type": "harvest"})
+        self.client.get("/game")
+        for phase in ("session_open", "load", "action", "encode", "session_save", "total"):
+            self.assertIsNotNone(metrics.registry.get("/action", phase), phase)
+        for phase in ("to_dict", "render"):
+            self.assertIsNotNone(metrics.registry.get("/game", phase), phase)
+
+    def test_metrics_endpoint(self):
+        """Test that /metrics serves the text format and does not time itself"""
+        metrics.configure(1.0)
+        self.client.get("/game")
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith("text/plain"))
+        self.assertIn('route="/game",phase="total"', response.get_data(as_text=True))
+        self.assertNotIn('route="/metrics"', response.get_data(as_text=True))
+
+    def test_sampling_off_records_nothing(self):
+        """Test that with sampling off no request is timed and phase() is a shared no-op"""
+        metrics.configure(0.0)
+        self.client.get("/new_game/normal")
+        self.client.post("/action", data={"type": "harvest"})
+        self.assertNotIn("route=", metrics.registry.render())
+        self.assertIs(metrics.phase("render"), metrics._NO_PHASE)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test suite for the fragment render cache and the Jinja bytecode cache
+"""
+
+import json
+import logging
+import os
+import tempfile
+import unittest
+
+from flask import Flask
+
+import render_cache
+import replay
+from app import app
+
+logging.getLogger().setLevel(logging.WARNING)
+
+
+class TestFragmentCache(unittest.TestCase):
+    """Test that cached panels render exactly like uncached ones"""
+
+    def setUp(self):
+        app.config["TESTING"] = True
+        self.client = app.test_client()
+        self.cache = app.extensions["render_cache"]
+        self.cache.clear()
+        self.size = self.cache.size
+        replay.clear_snapshots()
+
+    def tearDown(self):
+        self.cache.size = self.size
+        self.cache.clear()
+
+    def page(self) -> bytes:
+        return self.client.get("/game").data
+
+    def test_cached_page_matches_uncached(self):
+        """Test that /game is byte-identical with and without the cache, across a turn"""
+        self.client.get("/new_game/normal")
+        for path, data in (("/action", {"type": "harvest"}), ("/action", {"type": "fortify"}), ("/end_turn", {})):
+            self.client.post(path, data=data)
+            self.cache.size = 0
+            plain = self.page()
+            self.cache.size = self.size
+            self.assertEqual(self.page(), plain)
+            self.assertEqual(self.page(), plain)
+        self.assertIn(b"Summary</strong>", plain)
+
+    def test_unchanged_inputs_hit(self):
+        """Test that re-rendering the same state reuses the panels"""
+        self.client.get("/new_game/normal")
+        self.page()
+        misses = self.cache.misses
+        self.page()
+        self.assertEqual(self.cache.misses, misses)
+        self.assertGreater(self.cache.hits, 0)
+
+    def test_changed_flags_miss(self):
+        """Test that an action using the paid slot re-renders the action panels"""
+        self.client.get("/new_game/normal")
+        self.page()
+        self.client.post("/action", data={"type": "fortify"})
+        misses = self.cache.misses
+        html = self.page()
+        self.assertGreater(self.cache.misses, misses)
+        self.assertIn(b'data-action="gather_timber" class="btn btn-outline-success btn-sm w-100 mb-2" disabled', html)
+
+    def test_lru_limit(self):
+        """Test that the oldest fragments are evicted beyond the size limit"""
+        self.cache.size = 2
+        with app.test_request_context():
+            for turn in range(1, 5):
+                self.cache.render("_turn_summary.html", summary={"turn_number": turn, "actions": [],
+                                                                  "events": [], "income": [], "drift": []})
+        self.assertEqual(len(self.cache), 2)
+
+
+class TestBytecodeCache(unittest.TestCase):
+    """Test that compiled templates are written to JINJA_CACHE_DIR"""
+
+    def test_compiled_template_is_stored(self):
+        """Test that loading a template leaves bytecode in the cache directory"""
+        with tempfile.TemporaryDirectory() as directory:
+            fresh = Flask("app", root_path=os.path.dirname(os.path.abspath(__file__)))
+            fresh.config["JINJA_PREBUILT_DIR"] = None  # a built checkout has jinja_bytecode/ to read instead
+            render_cache.init_app(fresh, cache_dir=os.path.join(directory, "jinja"))
+            fresh.jinja_env.get_template("_turn_summary.html")
+            self.assertTrue(os.listdir(os.path.join(directory, "jinja")))
+
+    def test_prebuilt_bytecode_is_found_from_another_path(self):
+        """Test that templates precompiled at build time load where the app runs from"""
+        with tempfile.TemporaryDirectory() as prebuilt, tempfile.TemporaryDirectory() as runtime:
+            names = render_cache.precompile_templates(app, prebuilt)
+            self.assertIn("game.html", names)
+            cache = render_cache.TemplateBytecodeCache(runtime, prebuilt)
+            source = app.jinja_env.loader.get_source(app.jinja_env, "game.html")[0]
+            bucket = cache.get_bucket(app.jinja_env, "game.html", "/var/task/templates/game.html", source)
+            self.assertIsNotNone(bucket.code)
+            stale = cache.get_bucket(app.jinja_env, "game.html", "/var/task/templates/game.html", source + " ")
+            self.assertIsNone(stale.code)
+
+    def test_deploy_build_runs_precompile(self):
+        """Test that the Vercel build step prebuilds the bytecode (the directory itself is not committed)"""
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "vercel.json")) as f:
+            config = json.load(f)
+        self.assertIn("precompile.py", config["buildCommand"])
+        self.assertNotIn("builds", config)  # legacy builds skip the build command
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Test suite for event-sourced game records - replay must rebuild the exact state
+"""
+
+import json
+import random
+import threading
+import unittest
+from collections import OrderedDict
+from unittest import mock
+
+import replay
+from game_logic import new_game
+
+KEY = "test-secret"
+
+
+def _execute(game, command):
+    """replay.execute as the routes use it: a rejected command's message is taken out again"""
+    log = game.message_log.copy()
+    ok = replay.execute(game, command)
+    if not ok:
+        replay.take_unrecorded_messages(game, log)
+    return ok
+
+
+def _play(game, rng, commands=60):
+    """Drive a game with random (sometimes failing) commands through replay.execute"""
+    for _ in range(commands):
+        if game.pending_choice:
+            _execute(game, rng.choice(["choice:a", "choice:b"]))
+        _execute(game, rng.choice(["harvest", "harvest", "cancel"]))
+        _execute(game, rng.choice(sorted(replay.ACTION_COMMANDS)))
+        _execute(game, "end_turn")
+    return game
+
+
+class TestReplay(unittest.TestCase):
+    """Test rebuilding games from seed + difficulty + command log"""
+
+    def setUp(self):
+        replay.clear_snapshots()
+
+    def test_rebuild_matches_live_game(self):
+        """Test that replaying the record reproduces the full state"""
+        for seed in range(5):
+            live = _play(new_game("hard", seed=seed), random.Random(seed), commands=8)
+            rebuilt = replay.rebuild(replay.to_record(live))
+            self.assertEqual(rebuilt.to_dict(), live.to_dict())
+            self.assertEqual(rebuilt.message_log, live.message_log)
+            self.assertEqual(rebuilt.command_log, live.command_log)
+
+    def test_rejected_commands_are_not_recorded(self):
+        """Test that a refused command leaves the log and version alone and hands back its message"""
+        g = new_game("normal", seed=1)
+        self.assertTrue(replay.execute(g, "harvest"))
+        log, version = g.message_log.copy(), g.version
+        self.assertFalse(replay.execute(g, "end_turn"))
+        self.assertFalse(replay.execute(g, "cancel"))
+        self.assertEqual(g.version, version)
+        self.assertEqual(g.command_log, [replay.COMMAND_CODES["harvest"]])
+        messages = replay.take_unrecorded_messages(g, log)
+        self.assertEqual([m["text"] for m in messages][-1], "Action cancelled.")
+        self.assertEqual(len(messages), 2)
+        self.assertEqual(g.message_log, replay.rebuild(replay.to_record(g)).message_log)
+
+    def test_rebuild_from_snapshot(self):
+        """Test that a cached snapshot gives the same result as a full replay"""
+        live = _play(new_game("easy", seed=11), random.Random(3), commands=12)
+        record = replay.to_record(live)
+        first = replay.rebuild(record)
+        self.assertTrue(replay._snapshots)
+        second = replay.rebuild(record)  # resumes from the latest snapshot
+        self.assertEqual(second.to_dict(), first.to_dict())
+        self.assertEqual(second.to_dict(), live.to_dict())
+
+    def test_eviction_during_lookup_is_harmless(self):
+        """Test that another thread evicting the snapshot being looked up cannot break the rebuild"""
+        live = _play(new_game("easy", seed=11), random.Random(3), commands=12)
+        record = replay.to_record(live)
+        replay.rebuild(record)
+        evictors = []
+
+        class RacingCache(OrderedDict):
+            def get(self, key, default=None):
+                value = super().get(key, default)
+                evictor = threading.Thread(target=replay.clear_snapshots)  # another request's eviction
+                evictor.start()
+                evictor.join(0.1)
+                evictors.append(evictor)
+                return value
+
+        with mock.patch.object(replay, "_snapshots", RacingCache(replay._snapshots)):
+            self.assertEqual(replay.rebuild(record).to_dict(), live.to_dict())
+            for evictor in evictors:
+                evictor.join()
+
+    def test_snapshot_is_not_shared_with_rebuilt_game(self):
+        """Test that mutating a rebuilt game does not corrupt the cache"""
+        live = _play(new_game("easy", seed=12), random.Random(4), commands=12)
+        record = replay.to_record(live)
+        g = replay.rebuild(record)
+        g.grain = -999
+        g.message_log.append({"type": "info", "text": "mutated"})
+        self.assertEqual(replay.rebuild(record).to_dict(), live.to_dict())
+
+    def test_revision_tracks_seed_and_commands(self):
+        """Test that the revision changes with every command and survives a rebuild"""
+        g = new_game("normal", seed=21)
+        first = replay.revision(g, KEY)
+        replay.execute(g, "harvest")
+        self.assertNotEqual(replay.revision(g, KEY), first)
+        self.assertEqual(replay.revision(replay.rebuild(replay.to_record(g)), KEY), replay.revision(g, KEY))
+        self.assertNotEqual(replay.revision(new_game("normal", seed=22), KEY), first)
+
+    def test_revision_hides_the_seed(self):
+        """Test that a revision is keyed and does not carry the seed"""
+        g = new_game("normal", seed=0xBEEF)
+        tag = replay.revision(g, KEY).split(".")[0]
+        self.assertNotIn("beef", tag)
+        self.assertNotIn(str(0xBEEF), tag)
+        self.assertNotEqual(replay.revision(g, "other-secret"), replay.revision(g, KEY))
+
+    def test_record_revision_matches_rebuilt_game(self):
+        """Test that record_revision gives the rebuilt game's revision without rebuilding it"""
+        g = new_game("hard", seed=8)
+        for command in ("harvest", "fortify"):
+            replay.execute(g, command)
+            record = replay.to_record(g)
+            self.assertEqual(replay.record_revision(record, KEY), replay.revision(g, KEY))
+            self.assertEqual(replay.record_revision(record, KEY), replay.revision(replay.rebuild(record), KEY))
+
+    def test_record_is_small(self):
+        """Test that a full game record stays a few hundred bytes"""
+        live = _play(new_game("easy", seed=5), random.Random(5), commands=30)
+        record = replay.to_record(live)
+        self.assertLess(len(json.dumps(record)), 400)
+        self.assertGreater(len(json.dumps(live.to_dict())), 2 * len(json.dumps(record)))
+
+    def test_migrated_base_record(self):
+        """Test that a record starting from a stored full state replays on top of it"""
+        start = _play(new_game("normal", seed=8), random.Random(8), commands=3)
+        base = start.to_storage_dict()
+        start.command_log = []
+        live = _play(start, random.Random(9), commands=3)
+        rebuilt = replay.rebuild(replay.to_record(live, base=base))
+        self.assertEqual(rebuilt.to_dict(), live.to_dict())
+
+    def test_sealed_record_round_trip(self):
+        """Test that a sealed record carries no seed and rebuilds (and revises) only with its key"""
+        start, game_id = replay.new_sealed_game("hard", KEY)
+        live = _play(start, random.Random(4), commands=12)
+        record = replay.to_record(live, game_id=game_id)
+        self.assertNotIn("seed", record)
+        self.assertNotIn(str(live.rng.seed), json.dumps(record))
+        self.assertEqual(replay.rebuild(record, KEY).to_dict(), live.to_dict())
+        self.assertEqual(replay.record_revision(record, KEY), replay.revision(live, KEY))
+        self.assertEqual(len(replay.audit(record, KEY)), len(live.command_log))
+        with self.assertRaises(ValueError):
+            replay.rebuild(record)
+
+    def test_sealed_migrated_base_record(self):
+        """Test that a reseeded full state replays from its sealed id (the base carries no rng)"""
+        start = _play(new_game("normal", seed=8), random.Random(8), commands=3)
+        game_id = replay.reseed(start, KEY)
+        base = start.to_dict()
+        start.command_log = []
+        live = _play(start, random.Random(9), commands=6)
+        rebuilt = replay.rebuild(replay.to_record(live, base=base, game_id=game_id), KEY)
+        self.assertEqual(rebuilt.to_dict(), live.to_dict())
+
+    def test_audit_trail(self):
+        """Test that the audit trail has one entry per command"""
+        live = _play(new_game("normal", seed=2), random.Random(2), commands=4)
+        trail = replay.audit(replay.to_record(live))
+        self.assertEqual(len(trail), len(live.command_log))
+        self.assertEqual([t["command"] for t in trail], [replay.COMMANDS[c] for c in live.command_log])
+        self.assertEqual(trail[-1]["collapse"], live.collapse)
+
+    def test_unknown_command_rejected(self):
+        """Test that commands outside the table raise KeyError and are not logged"""
+        g = new_game("normal", seed=1)
+        with self.assertRaises(KeyError):
+            replay.execute(g, "summon_dragons")
+        self.assertEqual(g.command_log, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
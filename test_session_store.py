@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Test suite for server-side sessions - backends, LRU cache and Flask wiring
+"""
+
+import logging
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import replay
+import session_store
+from app import app, create_app
+from session_store import (
+    Backend, FakeRedis, MemoryBackend, RedisBackend, SessionStore, SQLiteBackend, ServerSessionInterface, WatchError,
+)
+
+logging.getLogger().setLevel(logging.WARNING)
+
+
+class BackendContract:
+    """Shared checks every backend must pass"""
+
+    def make_backend(self):
+        raise NotImplementedError
+
+    def test_round_trip(self):
+        backend = self.make_backend()
+        backend.set("abc", b"payload", 60)
+        self.assertEqual(backend.get("abc"), b"payload")
+        backend.delete("abc")
+        self.assertIsNone(backend.get("abc"))
+
+    def test_expired_entry_is_gone(self):
+        backend = self.make_backend()
+        backend.set("old", b"x", -1)
+        self.assertIsNone(backend.get("old"))
+
+    def test_missing_key(self):
+        self.assertIsNone(self.make_backend().get("nope"))
+
+    def test_compare_and_set(self):
+        backend = self.make_backend()
+        self.assertTrue(backend.compare_and_set("abc", None, b"v1", 60))
+        self.assertFalse(backend.compare_and_set("abc", None, b"v2", 60))
+        self.assertTrue(backend.compare_and_set("abc", b"v1", b"v2", 60))
+        self.assertFalse(backend.compare_and_set("abc", b"v1", b"v3", 60))
+        self.assertEqual(backend.get("abc"), b"v2")
+
+    def test_compare_and_set_loses_no_updates(self):
+        backend = self.make_backend()
+        backend.set("n", b"0", 60)
+
+        def increment():
+            for _ in range(25):
+                while True:
+                    current = backend.get("n")
+                    if backend.compare_and_set("n", current, str(int(current) + 1).encode(), 60):
+                        break
+
+        threads = [threading.Thread(target=increment) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(backend.get("n"), b"200")
+
+
+class TestBackendInterface(unittest.TestCase):
+    def test_incomplete_backend_cannot_be_created(self):
+        """Test that a backend missing compare_and_set fails when built, not on its first commit"""
+        class NoSwap(Backend):
+            def get(self, sid):
+                return None
+
+            def set(self, sid, data, ttl):
+                pass
+
+            def delete(self, sid):
+                pass
+
+        with self.assertRaises(TypeError):
+            NoSwap()
+
+
+class TestMemoryBackend(BackendContract, unittest.TestCase):
+    def make_backend(self):
+        return MemoryBackend()
+
+    def test_size_cap_evicts_oldest(self):
+        backend = MemoryBackend(max_entries=2)
+        for sid in ("a", "b", "c"):
+            backend.set(sid, sid.encode(), 60)
+        self.assertIsNone(backend.get("a"))
+        self.assertEqual(backend.get("c"), b"c")
+
+
+class TestSQLiteBackend(BackendContract, unittest.TestCase):
+    def make_backend(self):
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        return SQLiteBackend(path)
+
+    def test_shared_between_connections(self):
+        backend = self.make_backend()
+        backend.set("abc", b"payload", 60)
+        self.assertEqual(SQLiteBackend(backend.path).get("abc"), b"payload")
+
+
+class TestRedisBackend(BackendContract, unittest.TestCase):
+    def make_backend(self):
+        return RedisBackend(FakeRedis())
+
+    def test_watched_write_aborts_transaction(self):
+        client = FakeRedis()
+        with client.pipeline() as pipe:
+            pipe.watch("k")
+            client.set("k", b"theirs")
+            pipe.multi()
+            pipe.set("k", b"ours")
+            with self.assertRaises(WatchError):
+                pipe.execute()
+        self.assertEqual(client.get("k"), b"theirs")
+
+
+class TestSessionStore(unittest.TestCase):
+    """Test the LRU cache in front of the backend"""
+
+    def test_cache_hit_skips_decoding(self):
+        store = SessionStore(MemoryBackend(), cache_size=4)
+        store.set("s1", {"game": {"seed": 1}})
+        with mock.patch.object(session_store, "_loads", side_effect=AssertionError("decoded")):
+            self.assertEqual(store.get("s1"), {"game": {"seed": 1}})
+        self.assertEqual(store.hits, 1)
+
+    def test_cache_follows_other_stores(self):
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        mine, theirs = SessionStore(SQLiteBackend(path)), SessionStore(SQLiteBackend(path))  # two workers
+        mine.set("s1", {"n": 1})
+        self.assertEqual(mine.get("s1"), {"n": 1})
+        theirs.set("s1", {"n": 2})
+        self.assertEqual(mine.get("s1"), {"n": 2})
+        theirs.delete("s1")
+        self.assertIsNone(mine.get("s1"))
+
+    def test_lru_eviction_falls_back_to_backend(self):
+        store = SessionStore(MemoryBackend(), cache_size=2)
+        for sid in ("a", "b", "c"):
+            store.set(sid, {"n": sid})
+        self.assertNotIn("a", store._cache)
+        self.assertEqual(store.get("a"), {"n": "a"})
+        self.assertEqual(store.misses, 1)
+
+    def test_get_returns_a_copy(self):
+        store = SessionStore(MemoryBackend())
+        store.set("s1", {"n": 1})
+        store.get("s1")["n"] = 2
+        self.assertEqual(store.get("s1"), {"n": 1})
+
+    def test_unreadable_payload_is_dropped(self):
+        store = SessionStore(MemoryBackend())
+        store.backend.set("bad", b"{not json", 60)
+        self.assertIsNone(store.get("bad"))
+
+    def test_stale_cache_fails_compare_and_set(self):
+        backend = MemoryBackend()
+        mine, theirs = SessionStore(backend), SessionStore(backend)  # two worker processes
+        mine.set("s1", {"n": 1})
+        data, raw = mine.load("s1")
+        theirs.set("s1", {"n": 2})
+        self.assertIsNone(mine.compare_and_set("s1", raw, {"n": 3}))
+        data, raw = mine.load("s1")
+        self.assertEqual(data, {"n": 2})
+        self.assertIsNotNone(mine.compare_and_set("s1", raw, {"n": 3}))
+        self.assertEqual(theirs.load("s1")[0], {"n": 3})
+
+    def test_store_from_url(self):
+        self.assertIsNone(session_store.store_from_url("cookie"))
+        self.assertIsInstance(session_store.store_from_url("memory").backend, MemoryBackend)
+        with self.assertRaises(ValueError):
+            session_store.store_from_url("ftp://nowhere")
+
+
+class TestServerSideFlaskSession(unittest.TestCase):
+    """Test that the app keeps game state server-side and the cookie holds only the id"""
+
+    def setUp(self):
+        self.store = SessionStore(RedisBackend(FakeRedis()))
+        self.previous = app.session_interface
+        app.session_interface = ServerSessionInterface(self.store)
+        self.addCleanup(setattr, app, "session_interface", self.previous)
+        app.config["TESTING"] = True
+        self.client = app.test_client()
+        replay.clear_snapshots()
+
+    def sid(self):
+        cookie = self.client.get_cookie(app.config["SESSION_COOKIE_NAME"])
+        return cookie.value if cookie else None
+
+    def test_cookie_carries_only_the_id(self):
+        self.client.get("/new_game/hard")
+        sid = self.sid()
+        self.assertLess(len(sid), 64)
+        self.assertEqual(self.store.get(sid)["game"]["difficulty"], "hard")
+
+    def test_actions_persist_between_requests(self):
+        self.client.get("/new_game/normal")
+        self.client.post("/action", data={"type": "harvest"})
+        self.client.post("/action", data={"type": "fortify"})
+        g = replay.rebuild(self.store.get(self.sid())["game"], app.secret_key)
+        self.assertTrue(g.free_harvest_used and g.paid_action_used)
+
+    def test_concurrent_commands_are_all_applied(self):
+        self.client.get("/new_game/normal")
+        sid = self.sid()
+        clients = [app.test_client() for _ in range(8)]
+        for client in clients:
+            client.set_cookie(app.config["SESSION_COOKIE_NAME"], sid)
+        barrier = threading.Barrier(len(clients))
+
+        applied = []
+
+        def post(client):
+            barrier.wait()
+            for _ in range(3):
+                for path, body in (("action", {"type": "harvest"}), ("action", {"type": "gather_timber"}),
+                                   ("end_turn", None)):
+                    applied.append(client.post(f"/api/v1/{path}", json=body).get_json()["ok"])
+
+        threads = [threading.Thread(target=post, args=(c,)) for c in clients]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        # Only accepted commands are recorded, and every one of them must be
+        self.assertGreater(sum(applied), 3)
+        self.assertEqual(len(self.store.get(sid)["game"]["log"]), sum(applied))
+
+    def test_repeated_idempotency_key_runs_once(self):
+        self.client.get("/new_game/normal")
+        headers = {"Idempotency-Key": "click-1"}
+        first = self.client.post("/api/v1/action", json={"type": "harvest"}, headers=headers).get_json()
+        again = self.client.post("/api/v1/action", json={"type": "harvest"}, headers=headers).get_json()
+        self.assertTrue(first["ok"] and again["ok"])
+        self.assertEqual(again["revision"], first["revision"])
+        self.assertEqual(self.store.get(self.sid())["game"]["log"], replay.encode_log([replay.COMMAND_CODES["harvest"]]))
+
+    def test_persistent_conflict_is_409(self):
+        self.client.get("/new_game/normal")
+        with mock.patch.object(session_store.ServerSession, "commit", return_value=False):
+            response = self.client.post("/api/v1/action", json={"type": "harvest"})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.store.get(self.sid())["game"]["log"], "")
+
+    def test_workers_sharing_a_backend_see_each_others_writes(self):
+        """Test that a worker's cached session does not hide a game another worker moved on"""
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        workers = [create_app({"SESSION_BACKEND": f"sqlite:///{path}", "TESTING": True}) for _ in range(2)]
+        first, second = (worker.test_client() for worker in workers)
+        first.get("/new_game/normal")
+        page = first.get("/game")
+        second.set_cookie(app.config["SESSION_COOKIE_NAME"],
+                          first.get_cookie(app.config["SESSION_COOKIE_NAME"]).value)
+        data = second.post("/api/v1/action", json={"type": "harvest"}).get_json()
+        again = first.get("/game", headers={"If-None-Match": page.headers["ETag"]})
+        self.assertEqual(again.status_code, 200)
+        self.assertIn(f'data-revision="{data["revision"]}"', again.get_data(as_text=True))
+
+    def test_unknown_id_starts_a_new_game(self):
+        self.client.set_cookie(app.config["SESSION_COOKIE_NAME"], "forged")
+        self.assertEqual(self.client.get("/game").status_code, 200)
+        self.assertNotEqual(self.sid(), "forged")
+
+
+if __name__ == '__main__':
+    unittest.main()
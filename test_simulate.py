@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Test suite for the headless batch simulator
+"""
+
+import random
+import unittest
+from game_logic import DIFFICULTY_SETTINGS, new_game
+from simulate import PAID_ACTIONS, Policy, load_policy, play_game, run_batch
+
+
+class TestNewGame(unittest.TestCase):
+    """Test difficulty presets"""
+
+    def test_hard_settings_applied(self):
+        """Test that hard difficulty applies its presets"""
+        g = new_game("hard")
+        self.assertEqual(g.difficulty, "hard")
+        self.assertEqual(g.max_turns, 16)
+        self.assertEqual(g.stability, 60)
+        self.assertEqual(g.collapse, 50)
+
+    def test_normal_uses_defaults(self):
+        """Test that normal difficulty keeps the Game defaults"""
+        g = new_game("normal")
+        self.assertEqual(g.max_turns, 20)
+        self.assertEqual(g.stability, 65)
+
+
+class TestPlayGame(unittest.TestCase):
+    """Test single-game simulation"""
+
+    def test_every_paid_action_code_is_callable(self):
+        """Test that each paid action code maps to a working Game method"""
+        for code, fn in PAID_ACTIONS.items():
+            g = new_game("normal")
+            g.grain = g.bronze = g.timber = g.prestige = 100
+            self.assertTrue(fn(g), code)
+            self.assertTrue(g.paid_action_used, code)
+
+    def test_game_reaches_an_outcome(self):
+        """Test that a simulated game ends with a known outcome"""
+        for name in ("random", "preservation", "vacuum"):
+            outcome, turns = play_game("normal", load_policy(name), random.Random(1), seed=1)
+            self.assertTrue(outcome in ("preservation", "vacuum", "stuck") or outcome.startswith("defeat:"))
+            self.assertGreaterEqual(turns, 0)
+
+    def test_unknown_policy_rejected(self):
+        """Test that an unknown policy name raises ValueError"""
+        with self.assertRaises(ValueError):
+            load_policy("no_such_policy")
+
+    def test_policy_must_rank_actions(self):
+        """Test that a policy without rank_actions cannot be instantiated"""
+        with self.assertRaises(TypeError):
+            Policy()
+
+
+class TestRunBatch(unittest.TestCase):
+    """Test aggregate batch statistics"""
+
+    def test_batch_counts_every_game(self):
+        """Test that outcome counts add up to the games played"""
+        stats = run_batch(50, list(DIFFICULTY_SETTINGS), "random", workers=1, seed=3, chunk_size=20)
+        for difficulty in DIFFICULTY_SETTINGS:
+            self.assertEqual(stats[difficulty]["games"], 50)
+            self.assertEqual(sum(stats[difficulty]["outcomes"].values()), 50)
+            self.assertAlmostEqual(sum(stats[difficulty]["rates"].values()), 1.0)
+
+    def test_batch_is_reproducible_with_seed(self):
+        """Test that the same seed gives the same statistics"""
+        a = run_batch(40, ["hard"], "random", workers=1, seed=7)
+        b = run_batch(40, ["hard"], "random", workers=1, seed=7)
+        self.assertEqual(a, b)
+
+
+if __name__ == '__main__':
+    unittest.main()
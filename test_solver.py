@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Test suite for the exact expectimax solver - rule parity with Game and the transposition table
+"""
+
+import copy
+import logging
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+import solver
+from game_logic import CHOICE_EVENTS, NEGATIVE_EVENTS, POSITIVE_EVENTS, Game, new_game
+from solver import Solver, TranspositionTable, state_of
+
+logging.getLogger("game_logic").setLevel(logging.WARNING)
+
+
+def _random_game(rng: random.Random) -> Game:
+    g = new_game(rng.choice(["easy", "normal", "hard"]), seed=rng.getrandbits(32))
+    for stat in ("grain", "bronze", "timber", "prestige", "stability", "knowledge", "military", "collapse"):
+        setattr(g, stat, rng.randint(1, 60))
+    g.withdrawals_used = rng.randint(0, 3)
+    g.tech_imperial_bureaucracy = rng.random() < 0.5
+    g.has_granary = rng.random() < 0.5
+    g.has_bronze_mine = rng.random() < 0.5
+    return g
+
+
+class TestRuleParity(unittest.TestCase):
+    """Test that the compiled transitions match the Game methods"""
+
+    def test_actions_match_game(self):
+        """Test that legal actions and their successor states match Game.perform"""
+        rng = random.Random(1177)
+        for _ in range(100):
+            g = _random_game(rng)
+            g.harvest_free()
+            children = dict(solver.legal_actions(state_of(g)))
+            self.assertEqual(sorted(children), sorted(c for c in g.legal_action_codes() if c != "harvest"))
+            for code, child in children.items():
+                h = copy.deepcopy(g)
+                self.assertTrue(h.perform(code))
+                self.assertEqual(child, state_of(h), code)
+
+    def test_end_turn_matches_game(self):
+        """Test that every chance outcome matches end_turn with the rng forced onto it"""
+        rng = random.Random(7)
+        draws = ([(0.1, NEGATIVE_EVENTS.cumulative[i] - 0.5, None) for i in range(len(NEGATIVE_EVENTS.names))]
+                 + [(0.6, POSITIVE_EVENTS.cumulative[i] - 0.5, None) for i in range(len(POSITIVE_EVENTS.names))]
+                 + [(0.85, None, c.factory) for c in CHOICE_EVENTS]
+                 + [(0.95, None, None)])
+        for _ in range(30):
+            g = _random_game(rng)
+            g.harvest_free()
+            g.fortify() or g.gather_timber() or g.host_festival()
+            g.paid_action_used = True
+            outcomes = list(solver.end_turn(state_of(g)))
+            self.assertAlmostEqual(sum(p for p, _ in outcomes), 1.0)
+            for (_, child), (r, pick, factory) in zip(outcomes, draws):
+                h = copy.deepcopy(g)
+                with mock.patch.object(h.rng, "random", return_value=r), \
+                        mock.patch.object(h.rng, "uniform", return_value=pick), \
+                        mock.patch.object(h.rng, "choice", return_value=factory):
+                    self.assertTrue(h.end_turn())
+                self.assertEqual(child, state_of(h))
+
+    def test_choices_match_game(self):
+        """Test that both answers to every choice event match Game.resolve_choice"""
+        for event in CHOICE_EVENTS:
+            for grain in (5, 50):
+                g = Game(grain=grain, timber=grain, tech_imperial_bureaucracy=True)
+                g.pending_choice = getattr(g, event.factory)()
+                for pick in ("a", "b"):
+                    h = copy.deepcopy(g)
+                    child = solver.resolve_choice(state_of(h), pick)
+                    if h.resolve_choice(pick):
+                        self.assertEqual(child, state_of(h))
+                    else:
+                        self.assertIsNone(child)
+
+
+class TestSolver(unittest.TestCase):
+    """Test expectimax values"""
+
+    def test_final_turn_shortcut_matches_enumeration(self):
+        """Test that the closed-form last-turn value equals enumerating end_turn"""
+        rng = random.Random(3)
+        for _ in range(50):
+            g = _random_game(rng)
+            g.turn = g.max_turns
+            g.military, g.collapse = rng.randint(40, 70), rng.randint(70, 99)
+            g.free_harvest_used = g.paid_action_used = True
+            state = state_of(g)
+            expected = sum(p * solver.outcome(child) for p, child in solver.end_turn(state))
+            self.assertAlmostEqual(Solver()._end_turn_value(state), expected)
+
+    def test_values_are_probabilities_and_consistent(self):
+        """Test that action values lie in [0, 1] and their max is the win probability"""
+        g = new_game("hard", seed=0)
+        g.turn = g.max_turns - 1
+        s = Solver()
+        values = s.action_values(g)
+        self.assertIn("withdraw", values)
+        self.assertTrue(all(0.0 <= v <= 1.0 for v in values.values()))
+        self.assertAlmostEqual(s.win_probability(g), max(values.values()))
+        self.assertEqual(s.best_action(g), max(values, key=values.get))
+
+    def test_pending_choice_offers_affordable_answers(self):
+        """Test that an unaffordable choice "a" is not offered"""
+        g = new_game("normal", seed=1)
+        g.turn = g.max_turns
+        g.grain = 0
+        g.pending_choice = g._create_vassal_aid_choice()
+        self.assertEqual(list(Solver().action_values(g)), ["choice:b"])
+
+    def test_finished_game_has_no_decisions(self):
+        """Test that a lost game has nothing to decide and zero win probability"""
+        g = Game(collapse=100)
+        self.assertEqual(Solver().action_values(g), {})
+        self.assertEqual(Solver().win_probability(g), 0.0)
+
+
+class TestTranspositionTable(unittest.TestCase):
+    """Test memo capping and persistence"""
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".memo")
+        os.close(fd)
+        self.addCleanup(os.remove, self.path)
+
+    def _solved(self):
+        g = new_game("hard", seed=0)
+        g.turn = g.max_turns - 1
+        s = Solver()
+        return g, s, s.action_values(g)
+
+    def test_warm_start_skips_search(self):
+        """Test that a saved table answers a repeated query without new nodes"""
+        g, s, values = self._solved()
+        s.table.save(self.path)
+        warm = TranspositionTable()
+        self.assertEqual(warm.load(self.path), len(s.table))
+        again = Solver(warm)
+        self.assertEqual(again.action_values(g), values)
+        self.assertEqual(again.nodes, 0)
+
+    def test_stale_fingerprint_is_ignored(self):
+        """Test that a table built for different rules starts cold"""
+        _, s, _ = self._solved()
+        s.table.save(self.path)
+        with mock.patch.object(solver, "RULES_FINGERPRINT", b"\0" * 16):
+            self.assertEqual(TranspositionTable().load(self.path), 0)
+
+    def test_cap_evicts_least_recent(self):
+        """Test that the table never exceeds max_entries, in memory or when loading"""
+        table = TranspositionTable(max_entries=2)
+        for key in (b"a", b"b", b"c"):
+            table.put(key, 0.5)
+        self.assertEqual(len(table), 2)
+        self.assertIsNone(table.get(b"a"))
+        _, s, _ = self._solved()
+        s.table.save(self.path)
+        small = TranspositionTable(max_entries=10)
+        self.assertEqual(small.load(self.path), 10)
+        self.assertEqual(len(small), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test suite for the to_dict state patches sent by the JSON API
+"""
+
+import copy
+import json
+import logging
+import random
+import unittest
+
+import replay
+import state_diff
+from game_logic import new_game
+
+logging.getLogger("game_logic").setLevel(logging.WARNING)
+
+
+class TestDiff(unittest.TestCase):
+    """Test patch sections on hand-made states"""
+
+    def test_equal_states_give_empty_patch(self):
+        """Test that nothing changed means an empty patch"""
+        state = new_game("normal", seed=1).to_dict()
+        self.assertEqual(state_diff.diff(state, copy.deepcopy(state)), {})
+        self.assertEqual(state_diff.apply(state, {}), state)
+
+    def test_sections(self):
+        """Test set / merge / splice / unset for each kind of change"""
+        before = {"grain": 50, "tech": {"a": False, "b": False}, "log": [1, 2, 3], "choice": None, "gone": 1}
+        after = {"grain": 42, "tech": {"a": False, "b": True}, "log": [2, 3, 4], "choice": {"id": "x"}}
+        patch = state_diff.diff(before, after)
+        self.assertEqual(patch["set"], {"grain": 42, "choice": {"id": "x"}})
+        self.assertEqual(patch["merge"], {"tech": {"b": True}})
+        self.assertEqual(patch["splice"], {"log": [1, [4]]})
+        self.assertEqual(patch["unset"], ["gone"])
+        self.assertEqual(state_diff.apply(before, patch), after)
+
+    def test_unrelated_list_is_replaced(self):
+        """Test that a list with no overlap is sent whole, including an emptied one"""
+        patch = state_diff.diff({"actions": [1, 2]}, {"actions": []})
+        self.assertEqual(patch, {"set": {"actions": []}})
+
+    def test_apply_leaves_before_alone(self):
+        """Test that apply builds a new state"""
+        before = {"log": [1], "tech": {"a": False}}
+        state_diff.apply(before, {"splice": {"log": [0, [2]]}, "merge": {"tech": {"a": True}}})
+        self.assertEqual(before, {"log": [1], "tech": {"a": False}})
+
+
+class TestGamePatches(unittest.TestCase):
+    """Test patches between consecutive states of played games"""
+
+    def test_random_play_round_trips(self):
+        """Test apply(before, diff(before, after)) == after through JSON, one command at a time"""
+        rng = random.Random(7)
+        commands = sorted(replay.COMMANDS)
+        for seed in range(12):
+            g = new_game(rng.choice(["easy", "normal", "hard"]), seed=seed)
+            for _ in range(40):
+                before = g.clone().to_dict()
+                snapshot = copy.deepcopy(before)
+                replay.execute(g, rng.choice(commands))
+                after = g.to_dict()
+                self.assertEqual(before, snapshot)
+                patch = json.loads(json.dumps(state_diff.diff(before, after)))
+                self.assertEqual(state_diff.apply(json.loads(json.dumps(snapshot)), patch),
+                                 json.loads(json.dumps(after)))
+
+    def test_action_patch_is_small(self):
+        """Test that one action ships its stats, flag and log line, not the whole state"""
+        g = new_game("normal", seed=3)
+        g.harvest_free()
+        before = g.clone().to_dict()
+        replay.execute(g, "fortify")
+        after = g.to_dict()
+        patch = state_diff.diff(before, after)
+        self.assertEqual(patch["set"]["paid_action_used"], True)
+        self.assertIn("bronze", patch["set"])
+        self.assertNotIn("difficulty", patch.get("set", {}))
+        self.assertEqual(len(patch["splice"]["current_turn_actions"][1]), 1)
+        self.assertLess(len(json.dumps(patch)), len(json.dumps(after)) / 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test suite for the parameter sweep - grid, stopping rule and event-chance overrides
+"""
+
+import unittest
+
+import game_logic
+from sweep import event_chances, grid, run_sweep, wilson
+
+
+class TestGrid(unittest.TestCase):
+    """Test grid construction and validation"""
+
+    def test_cartesian_product(self):
+        """Test that every combination becomes one cell"""
+        cells = grid({"max_turns": [12, 16], "collapse": [40, 50, 60]})
+        self.assertEqual(len(cells), 6)
+        self.assertIn({"max_turns": 16, "collapse": 50}, cells)
+        self.assertEqual(grid({}), [{}])
+
+    def test_rejects_bad_knobs(self):
+        """Test that unknown knobs and impossible event chances raise ValueError"""
+        with self.assertRaises(ValueError):
+            grid({"grain": [10]})
+        with self.assertRaises(ValueError):
+            grid({"negative_chance": [0.8]})  # + positive 0.3 > 1
+
+
+class TestStatistics(unittest.TestCase):
+    """Test the Wilson interval"""
+
+    def test_interval_narrows_with_games(self):
+        """Test that the interval contains the estimate and shrinks as games grow"""
+        low, high = wilson(30, 100, 1.96)
+        self.assertLess(low, 0.3)
+        self.assertGreater(high, 0.3)
+        low2, high2 = wilson(300, 1000, 1.96)
+        self.assertLess(high2 - low2, high - low)
+        self.assertEqual(wilson(0, 0, 1.96), (0.0, 1.0))
+
+
+class TestEventChances(unittest.TestCase):
+    """Test the event-chance override"""
+
+    def test_overrides_and_restores(self):
+        """Test that chances are replaced inside the block and restored after"""
+        before = game_logic.NEGATIVE_CHANCE
+        with event_chances(negative_chance=1.0, positive_chance=0.0):
+            self.assertEqual(game_logic.NEGATIVE_CHANCE, 1.0)
+            g = game_logic.new_game("normal", seed=1, quiet=True)
+            g.harvest_free()
+            g.fortify()
+            g.end_turn()
+            self.assertIsNone(g.pending_choice)
+        self.assertEqual(game_logic.NEGATIVE_CHANCE, before)
+
+
+class TestRunSweep(unittest.TestCase):
+    """Test the sequential stopping rule"""
+
+    def test_hopeless_cell_stops_after_one_chunk(self):
+        """Test that a cell with a clear-cut win rate stops early and a noisy one runs to max_games"""
+        results = run_sweep([{"collapse": 98}, {"max_turns": 12, "collapse": 30}], "normal", workers=1,
+                            chunk_size=100, precision=0.05, max_games=300)
+        hopeless, noisy = results
+        self.assertEqual((hopeless["games"], hopeless["stopped"]), (100, "precision"))
+        self.assertEqual(hopeless["win_rate"], 0.0)
+        self.assertGreater(noisy["games"], 100)
+        self.assertEqual(sum(noisy["outcomes"].values()), noisy["games"])
+        self.assertAlmostEqual(sum(noisy["rates"].values()), 1.0)
+        self.assertLessEqual(noisy["ci"][0], noisy["win_rate"])
+
+    def test_reproducible_with_seed(self):
+        """Test that the same seed and worker count give the same results"""
+        cells = grid({"drift_per_turn": [2, 4]})
+        a = run_sweep(cells, "hard", workers=1, seed=5, chunk_size=50, max_games=100)
+        b = run_sweep(cells, "hard", workers=1, seed=5, chunk_size=50, max_games=100)
+        self.assertEqual(a, b)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Parity tests: the vectorized engine must match the reference Game methods
+"""
+
+import random
+import unittest
+from unittest import mock
+
+from game_logic import Game
+
+try:
+    import numpy as np
+    import vector_engine as ve
+except ImportError:  # numpy is only needed for the batch engine
+    np = None
+
+from simulate import PAID_ACTIONS
+
+
+def _random_game(rng: random.Random) -> Game:
+    """A reference Game in an arbitrary (but valid) mid-game state"""
+    g = Game()
+    for stat in ("grain", "bronze", "timber", "prestige"):
+        setattr(g, stat, rng.randint(-5, 60))
+    for stat in ("stability", "knowledge", "elasticity", "military", "collapse"):
+        setattr(g, stat, rng.randint(0, 100))
+    for flag in ve.FLAGS:
+        setattr(g, flag, rng.random() < 0.3)
+    g.turn = rng.randint(1, 25)
+    g.withdrawals_used = rng.randint(0, 3)
+    g.free_harvest_used = rng.random() < 0.3
+    g.paid_action_used = rng.random() < 0.2
+    if rng.random() < 0.3:
+        g.pending_choice = rng.choice([
+            g._create_vassal_aid_choice, g._create_hittite_trade_choice, g._create_refugee_crisis_choice,
+        ])()
+    return g
+
+
+def _state(g: Game) -> dict:
+    state = {name: getattr(g, name) for name in ve.STATS + ve.FLAGS}
+    state.update(
+        turn=g.turn, max_turns=g.max_turns, drift_per_turn=g.drift_per_turn,
+        withdrawals_used=g.withdrawals_used, max_withdrawals=g.max_withdrawals,
+        free_harvest_used=g.free_harvest_used, paid_action_used=g.paid_action_used,
+        pending_choice=g.pending_choice.event_id if g.pending_choice else None,
+    )
+    return state
+
+
+def _patched_random(g: Game, r: float, u: float):
+    """Make the game's own stream return r (event kind) then u (entry / choice event)"""
+    return mock.patch.object(g.rng, "random", side_effect=[r, u])
+
+
+@unittest.skipIf(np is None, "numpy not installed")
+class TestVectorParity(unittest.TestCase):
+    """Compare every batched rule against the reference engine on random states"""
+
+    N = 300
+
+    def setUp(self):
+        rng = random.Random(1177)
+        self.games = [_random_game(rng) for _ in range(self.N)]
+        self.vg = ve.VectorGames.from_games(self.games, seed=0)
+
+    def assertParity(self):
+        for i, g in enumerate(self.games):
+            self.assertEqual(self.vg.state_of(i), _state(g), f"game {i}")
+
+    def test_action_codes_match_simulator(self):
+        """Test that the vector action order matches the simulator's codes"""
+        self.assertEqual(ve.ACTION_CODES, tuple(PAID_ACTIONS))
+
+    def test_harvest(self):
+        ok = self.vg.harvest()
+        for i, g in enumerate(self.games):
+            self.assertEqual(bool(ok[i]), g.harvest_free())
+        self.assertParity()
+
+    def test_every_paid_action(self):
+        for k, code in enumerate(ve.ACTION_CODES):
+            games = [_random_game(random.Random(k * 1000 + i)) for i in range(self.N)]
+            vg = ve.VectorGames.from_games(games)
+            legal = vg.legal_actions()
+            ok = vg.act(np.full(len(games), k))
+            for i, g in enumerate(games):
+                expected = PAID_ACTIONS[code](g)
+                self.assertEqual(bool(ok[i]), expected, f"{code} game {i}")
+                self.assertEqual(bool(legal[i, k]), expected, f"{code} legal game {i}")
+                self.assertEqual(vg.state_of(i), _state(g), f"{code} game {i}")
+
+    def test_apply_income_and_drift(self):
+        self.vg.apply_income()
+        self.vg.apply_drift()
+        for g in self.games:
+            g.apply_income()
+            g.apply_drift()
+        self.assertParity()
+
+    def test_resolve_random_event(self):
+        draws = np.random.default_rng(5).random((self.N, 2))
+        self.vg.resolve_random_event(draws=draws)
+        for i, g in enumerate(self.games):
+            with _patched_random(g, *draws[i]):
+                g.resolve_random_event()
+        self.assertParity()
+
+    def test_event_boundaries(self):
+        """Test draws that land exactly on the kind / weight boundaries"""
+        for r in (0.0, 0.5, 0.8, 0.9, 0.999):
+            for u in (0.0, 6 / 22, 11 / 22, 1 / 3, 0.5, 0.999999):
+                games = [_random_game(random.Random(i)) for i in range(20)]
+                vg = ve.VectorGames.from_games(games)
+                vg.resolve_random_event(draws=np.tile([r, u], (len(games), 1)))
+                for i, g in enumerate(games):
+                    with _patched_random(g, r, u):
+                        g.resolve_random_event()
+                    self.assertEqual(vg.state_of(i), _state(g), f"r={r} u={u} game {i}")
+
+    def test_resolve_choice(self):
+        picks = np.random.default_rng(9).integers(0, 2, self.N)
+        ok = self.vg.resolve_choice(picks)
+        for i, g in enumerate(self.games):
+            expected = g.resolve_choice("ab"[picks[i]]) if g.pending_choice else False
+            self.assertEqual(bool(ok[i]), expected, f"game {i}")
+        self.assertParity()
+
+    def test_end_turn(self):
+        draws = np.random.default_rng(11).random((self.N, 2))
+        ok = self.vg.end_turn(draws)
+        for i, g in enumerate(self.games):
+            with _patched_random(g, *draws[i]):
+                with mock.patch.object(Game, "_log"):  # can_end_turn warnings are irrelevant here
+                    self.assertEqual(bool(ok[i]), g.end_turn(), f"game {i}")
+        self.assertParity()
+
+    def test_check_game_end(self):
+        outcome = self.vg.check_game_end()
+        for i, g in enumerate(self.games):
+            result = g._check_game_end()
+            if result is None:
+                expected = "ongoing"
+            elif result["type"] == "defeat":
+                expected = f"defeat:{result['reason']}"
+            else:
+                expected = result["type"]
+            self.assertEqual(ve.OUTCOME_NAMES[outcome[i]], expected, f"game {i}")
+
+
+@unittest.skipIf(np is None, "numpy not installed")
+class TestVectorDriver(unittest.TestCase):
+    """Test the lockstep random-policy driver"""
+
+    def test_play_random_finishes_every_game(self):
+        vg = ve.VectorGames(500, "hard", seed=3)
+        outcomes, turns = vg.play_random()
+        self.assertEqual(sum(outcomes.values()), 500)
+        self.assertNotIn("ongoing", outcomes)
+        self.assertGreater(turns, 0)
+        self.assertEqual(vg.n, 0)
+
+    def test_play_random_is_reproducible(self):
+        a = ve.VectorGames(200, "normal", seed=4).play_random()
+        b = ve.VectorGames(200, "normal", seed=4).play_random()
+        self.assertEqual(a, b)
+
+
+if __name__ == '__main__':
+    unittest.main()
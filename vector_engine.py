@@ -0,0 +1,370 @@
+# vector_engine.py — struct-of-arrays engine that advances N games in lockstep
+# - Mirrors the rules in game_logic.Game (actions, income, events, drift, clamp)
+# - Every stat / flag is a NumPy column; each rule is one batched array op
+# - Parity with the reference Game methods is covered by test_vector_engine.py
+# - Requires numpy (the Flask app does not)
+#
+# Usage:
+#   vg = VectorGames(100_000, difficulty="hard", seed=1)
+#   outcomes, turns = vg.play_random()
+
+from __future__ import annotations
+import logging
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from game_logic import (
+    ACTIONS, CHOICE_CHANCE, CHOICE_EVENTS, DIFFICULTY_SETTINGS, FLAG_NAMES, NEGATIVE_CHANCE, NEGATIVE_EVENTS,
+    PAID_ACTION_CODES, POSITIVE_CHANCE, POSITIVE_EVENTS, STAT_NAMES, Game, new_game,
+)
+
+logger = logging.getLogger(__name__)
+
+# Stat columns, in the same order as the Game._apply keyword arguments
+STATS: Tuple[str, ...] = STAT_NAMES
+GRAIN, BRONZE, TIMBER, PRESTIGE, STABILITY, KNOWLEDGE, ELASTICITY, MILITARY, COLLAPSE = range(9)
+CLAMPED = slice(STABILITY, COLLAPSE + 1)  # stability..collapse are clamped to 0-100
+
+FLAGS: Tuple[str, ...] = FLAG_NAMES
+FLAG_INDEX: Dict[str, int] = {name: i for i, name in enumerate(FLAGS)}
+
+
+# Paid actions compiled from the game_logic.ACTIONS registry (same order as simulate.PAID_ACTIONS):
+# code → (requirements {stat: minimum}, effect vector, flag set, once-only).
+# The withdrawal allowance is not a stat column; legal_actions() checks it separately.
+PAID_ACTIONS: Tuple[Tuple[str, Dict[str, int], np.ndarray, Optional[str], bool], ...] = tuple(
+    (spec.code,
+     {stat: minimum for requires, _, _ in spec.checks for stat, minimum in requires if stat in STATS},
+     np.array(spec.effect, dtype=np.int64), spec.flag, bool(spec.once))
+    for spec in (ACTIONS[code] for code in PAID_ACTION_CODES)
+)
+ACTION_CODES: Tuple[str, ...] = tuple(a[0] for a in PAID_ACTIONS)
+WITHDRAW = ACTION_CODES.index("withdraw")
+NO_ACTION = -1
+
+# Compiled forms of PAID_ACTIONS: (column, minimum) requirements, effect matrix, flag columns
+ACTION_REQUIRES: Tuple[Tuple[Tuple[int, int], ...], ...] = tuple(
+    tuple((STATS.index(stat), minimum) for stat, minimum in a[1].items()) for a in PAID_ACTIONS
+)
+ACTION_EFFECTS = np.stack([a[2] for a in PAID_ACTIONS])
+ACTION_FLAG = np.array([FLAG_INDEX[a[3]] if a[3] else -1 for a in PAID_ACTIONS], dtype=np.int64)
+ONCE_ACTIONS = np.array([k for k, a in enumerate(PAID_ACTIONS) if a[4]], dtype=np.int64)
+ONCE_FLAGS = ACTION_FLAG[ONCE_ACTIONS]
+
+HARVEST = np.array(ACTIONS["harvest"].effect, dtype=np.int64)
+IB = FLAG_INDEX["tech_imperial_bureaucracy"]
+
+# Random events, shared with Game.resolve_random_event (game_logic event tables)
+NEG_WEIGHTS = np.array(NEGATIVE_EVENTS.weights, dtype=np.float64)
+NEG_EFFECTS = np.array(NEGATIVE_EVENTS.effects, dtype=np.int64)
+POS_WEIGHTS = np.array(POSITIVE_EVENTS.weights, dtype=np.float64)
+POS_EFFECTS = np.array(POSITIVE_EVENTS.effects, dtype=np.int64)
+NEG_CUM = np.array(NEGATIVE_EVENTS.cumulative, dtype=np.float64)
+POS_CUM = np.array(POSITIVE_EVENTS.cumulative, dtype=np.float64)
+
+# Choice events, in the order Game._trigger_choice_event draws them
+CHOICE_IDS: Tuple[str, ...] = tuple(c.event_id for c in CHOICE_EVENTS)
+NO_CHOICE = -1
+# Choice A: (stat paid, amount) paid outside _apply, then the effect vector
+CHOICE_A_COST = np.array([[STATS.index(c.cost_stat), c.cost] for c in CHOICE_EVENTS], dtype=np.int64)
+CHOICE_A_EFFECTS = np.array([c.a_effect for c in CHOICE_EVENTS], dtype=np.int64)
+CHOICE_B_EFFECTS = np.array([c.b_effect for c in CHOICE_EVENTS], dtype=np.int64)
+
+# Outcome codes (see Game._check_game_end)
+ONGOING, PRESERVATION, VACUUM = 0, 1, 2
+DEFEAT_COLLAPSE, DEFEAT_STABILITY, DEFEAT_MILITARY, DEFEAT_TIME = 3, 4, 5, 6
+STUCK = 7
+OUTCOME_NAMES: Tuple[str, ...] = (
+    "ongoing", "preservation", "vacuum",
+    "defeat:collapse", "defeat:stability", "defeat:military", "defeat:time", "stuck",
+)
+
+
+class VectorGames:
+    """N games stored column-wise; every method operates on all (or a masked subset) at once"""
+
+    # Per-game columns (everything compact() has to subset)
+    COLUMNS: Tuple[str, ...] = (
+        "stats", "flags", "turn", "max_turns", "drift_per_turn", "withdrawals_used",
+        "max_withdrawals", "free_harvest_used", "paid_action_used", "pending_choice", "outcome",
+    )
+
+    def __init__(self, n: int, difficulty: str = "normal", seed: Optional[int] = None):
+        template = new_game(difficulty)
+        self.n = n
+        self.rng = np.random.default_rng(seed)
+        self.stats = np.tile(np.array([getattr(template, s) for s in STATS], dtype=np.int64), (n, 1))
+        self.flags = np.zeros((n, len(FLAGS)), dtype=bool)
+        self.turn = np.full(n, template.turn, dtype=np.int64)
+        self.max_turns = np.full(n, template.max_turns, dtype=np.int64)
+        self.drift_per_turn = np.full(n, template.drift_per_turn, dtype=np.int64)
+        self.withdrawals_used = np.zeros(n, dtype=np.int64)
+        self.max_withdrawals = np.full(n, template.max_withdrawals, dtype=np.int64)
+        self.free_harvest_used = np.zeros(n, dtype=bool)
+        self.paid_action_used = np.zeros(n, dtype=bool)
+        self.pending_choice = np.full(n, NO_CHOICE, dtype=np.int64)
+        self.outcome = np.zeros(n, dtype=np.int64)
+
+    # ------------------------
+    # Conversion to/from the reference engine
+    # ------------------------
+    @classmethod
+    def from_games(cls, games: Sequence[Game], seed: Optional[int] = None) -> VectorGames:
+        vg = cls(len(games), seed=seed)
+        for i, g in enumerate(games):
+            vg.stats[i] = [getattr(g, s) for s in STATS]
+            vg.flags[i] = [getattr(g, f) for f in FLAGS]
+            vg.turn[i] = g.turn
+            vg.max_turns[i] = g.max_turns
+            vg.drift_per_turn[i] = g.drift_per_turn
+            vg.withdrawals_used[i] = g.withdrawals_used
+            vg.max_withdrawals[i] = g.max_withdrawals
+            vg.free_harvest_used[i] = g.free_harvest_used
+            vg.paid_action_used[i] = g.paid_action_used
+            vg.pending_choice[i] = CHOICE_IDS.index(g.pending_choice.event_id) if g.pending_choice else NO_CHOICE
+        return vg
+
+    def state_of(self, i: int) -> Dict[str, object]:
+        """Numeric state of game i, keyed like the Game attributes (for parity checks)"""
+        state: Dict[str, object] = {s: int(self.stats[i, k]) for k, s in enumerate(STATS)}
+        state.update({f: bool(self.flags[i, k]) for k, f in enumerate(FLAGS)})
+        state.update(
+            turn=int(self.turn[i]),
+            max_turns=int(self.max_turns[i]),
+            drift_per_turn=int(self.drift_per_turn[i]),
+            withdrawals_used=int(self.withdrawals_used[i]),
+            max_withdrawals=int(self.max_withdrawals[i]),
+            free_harvest_used=bool(self.free_harvest_used[i]),
+            paid_action_used=bool(self.paid_action_used[i]),
+            pending_choice=CHOICE_IDS[self.pending_choice[i]] if self.pending_choice[i] != NO_CHOICE else None,
+        )
+        return state
+
+    # ------------------------
+    # Core arithmetic
+    # ------------------------
+    def _mask(self, mask: Optional[np.ndarray]) -> np.ndarray:
+        active = self.outcome == ONGOING
+        return active if mask is None else (mask & active)
+
+    def apply(self, delta: np.ndarray, mask: np.ndarray) -> None:
+        """Batched Game._apply: delta is (9,) or (n, 9); rows outside mask are untouched"""
+        rows = np.flatnonzero(mask)
+        if rows.size == 0:
+            return
+        if delta.ndim == 2:
+            d = delta[rows]
+        else:
+            d = np.tile(delta, (rows.size, 1))
+        # ceil(d * 0.75) rounds negative values towards zero, as in Game._apply
+        ib = self.flags[rows, IB] & (d[:, STABILITY] < 0)
+        d[ib, STABILITY] = np.ceil(d[ib, STABILITY] * 0.75).astype(np.int64)
+        stats = self.stats[rows] + d
+        np.clip(stats[:, CLAMPED], 0, 100, out=stats[:, CLAMPED])
+        self.stats[rows] = stats
+
+    # ------------------------
+    # Actions
+    # ------------------------
+    def harvest(self, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        ok = self._mask(mask) & ~self.free_harvest_used
+        self.apply(HARVEST, ok)
+        self.free_harvest_used |= ok
+        return ok
+
+    def legal_actions(self) -> np.ndarray:
+        """(n, len(ACTION_CODES)) bool matrix of paid actions that would succeed"""
+        # Built action-major so every comparison runs on a contiguous column
+        cols = np.ascontiguousarray(self.stats.T)
+        base = (self.outcome == ONGOING) & ~self.paid_action_used
+        legal = np.empty((len(PAID_ACTIONS), self.n), dtype=bool)
+        for k, requires in enumerate(ACTION_REQUIRES):
+            row = legal[k]
+            row[:] = base
+            for col, minimum in requires:
+                row &= cols[col] >= minimum
+        legal[ONCE_ACTIONS] &= ~self.flags.T[ONCE_FLAGS]
+        legal[WITHDRAW] &= self.withdrawals_used < self.max_withdrawals
+        return legal.T
+
+    def act(self, codes: np.ndarray, legal: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Perform one paid action per game (index into ACTION_CODES, NO_ACTION to skip).
+        Pass `legal` when it was already computed for the current state.
+        """
+        if legal is None:
+            legal = self.legal_actions()
+        rows = np.flatnonzero(codes >= 0)
+        rows = rows[legal[rows, codes[rows]]]
+        k = codes[rows]
+        ok = np.zeros(self.n, dtype=bool)
+        ok[rows] = True
+
+        self.apply(ACTION_EFFECTS[np.where(ok, codes, 0)], ok)
+        flagged = ACTION_FLAG[k] >= 0
+        self.flags[rows[flagged], ACTION_FLAG[k[flagged]]] = True
+        self.withdrawals_used[rows[k == WITHDRAW]] += 1
+        self.paid_action_used |= ok
+        return ok
+
+    def resolve_choice(self, picks: np.ndarray) -> np.ndarray:
+        """Resolve pending choices: picks is 0 for "a", 1 for "b". Returns success mask."""
+        pending = self._mask(self.pending_choice != NO_CHOICE)
+        idx = np.where(pending, self.pending_choice, 0)
+        want_a = pending & (picks == 0)
+        stat, cost = CHOICE_A_COST[idx, 0], CHOICE_A_COST[idx, 1]
+        have = self.stats[np.arange(self.n), stat]
+        ok_a = want_a & (have >= cost)
+        ok_b = pending & (picks != 0)
+
+        rows = np.nonzero(ok_a)[0]
+        self.stats[rows, stat[rows]] -= cost[rows]
+        self.apply(CHOICE_A_EFFECTS[idx], ok_a)
+        self.apply(CHOICE_B_EFFECTS[idx], ok_b)
+
+        ok = ok_a | ok_b
+        self.pending_choice[ok] = NO_CHOICE
+        return ok
+
+    # ------------------------
+    # End-of-turn / economy / events
+    # ------------------------
+    def apply_income(self, mask: Optional[np.ndarray] = None) -> None:
+        mask = self._mask(mask)
+        self.stats[:, BRONZE] += 3 * (mask & self.flags[:, FLAG_INDEX["has_bronze_mine"]])
+        granary = self.flags[:, FLAG_INDEX["has_granary"]] | self.flags[:, FLAG_INDEX["tech_granary_network"]]
+        self.stats[:, GRAIN] += 5 * (mask & granary)
+
+    def apply_drift(self, mask: Optional[np.ndarray] = None) -> None:
+        mask = self._mask(mask)
+        col = self.stats[:, COLLAPSE] + self.drift_per_turn
+        self.stats[:, COLLAPSE] = np.where(mask, np.clip(col, 0, 100), self.stats[:, COLLAPSE])
+
+    def resolve_random_event(self, mask: Optional[np.ndarray] = None,
+                             draws: Optional[np.ndarray] = None) -> None:
+        """
+        Batched Game.resolve_random_event. `draws` is an (n, 2) array of uniforms in
+        [0, 1): column 0 picks the event kind, column 1 the weighted entry / choice event.
+        """
+        mask = self._mask(mask)
+        if draws is None:
+            draws = self.rng.random((self.n, 2))
+        r, u = draws[:, 0], draws[:, 1]
+
+        neg = mask & (r < NEGATIVE_CHANCE)
+        pos = mask & ~neg & (r < NEGATIVE_CHANCE + POSITIVE_CHANCE)
+        cho = mask & ~neg & ~pos & (r < NEGATIVE_CHANCE + POSITIVE_CHANCE + CHOICE_CHANCE)
+
+        # First entry whose cumulative weight reaches the pick (as in Game._weighted_apply)
+        neg_idx = np.minimum(np.searchsorted(NEG_CUM, u * NEG_CUM[-1], side="left"), len(NEG_CUM) - 1)
+        pos_idx = np.minimum(np.searchsorted(POS_CUM, u * POS_CUM[-1], side="left"), len(POS_CUM) - 1)
+        self.apply(NEG_EFFECTS[neg_idx], neg)
+        self.apply(POS_EFFECTS[pos_idx], pos)
+        self.pending_choice[cho] = np.minimum((u[cho] * len(CHOICE_IDS)).astype(np.int64), len(CHOICE_IDS) - 1)
+
+    def can_end_turn(self) -> np.ndarray:
+        return self._mask(None) & self.free_harvest_used & self.paid_action_used
+
+    def end_turn(self, draws: Optional[np.ndarray] = None) -> np.ndarray:
+        """Advance every game that used both actions; returns the mask of advanced games"""
+        ok = self.can_end_turn()
+        self.apply_income(ok)
+        self.resolve_random_event(ok, draws)
+        self.apply_drift(ok)
+        self.turn += ok
+        self.free_harvest_used &= ~ok
+        self.paid_action_used &= ~ok
+        return ok
+
+    def check_game_end(self) -> np.ndarray:
+        """Record outcomes for games that just ended (same precedence as Game._check_game_end)"""
+        s = self.stats
+        live = self.outcome == ONGOING
+        timed_out = self.turn > self.max_turns
+        vacuum = (s[:, COLLAPSE] >= 80) & (s[:, MILITARY] >= 50)
+        conditions = [
+            (s[:, COLLAPSE] >= 100, DEFEAT_COLLAPSE),
+            (s[:, STABILITY] <= 0, DEFEAT_STABILITY),
+            (s[:, MILITARY] <= 0, DEFEAT_MILITARY),
+            (timed_out & vacuum, VACUUM),
+            (timed_out, DEFEAT_TIME),
+            (s[:, COLLAPSE] == 0, PRESERVATION),
+        ]
+        result = np.select([c for c, _ in conditions], [code for _, code in conditions], ONGOING)
+        self.outcome = np.where(live, result, self.outcome)
+        return self.outcome
+
+    # ------------------------
+    # Lockstep driver
+    # ------------------------
+    def compact(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Drop finished games so later turns only touch live rows.
+        Returns (outcome, turns_played) of the dropped games.
+        """
+        done = self.outcome != ONGOING
+        finished = (self.outcome[done], self.turn[done] - 1)
+        keep = np.flatnonzero(~done)
+        for name in self.COLUMNS:
+            setattr(self, name, getattr(self, name)[keep])
+        self.n = keep.size
+        return finished
+
+    def play_random(self, max_turns: int = 500) -> Tuple[Dict[str, int], int]:
+        """
+        Play every game to completion with a uniformly random legal paid action,
+        answering choice events at random. Finished games are compacted away as
+        they end, so afterwards the instance is empty.
+        Returns (outcome counts, total turns played).
+        """
+        counts = np.zeros(len(OUTCOME_NAMES), dtype=np.int64)
+        total_turns = 0
+
+        def collect() -> None:
+            nonlocal total_turns
+            outcome, turns = self.compact()
+            counts[:] += np.bincount(outcome, minlength=len(OUTCOME_NAMES))
+            total_turns += int(turns.sum())
+
+        for _ in range(max_turns):
+            if self.n == 0:
+                break
+            self.resolve_choice(self.rng.integers(0, 2, self.n))
+            self.resolve_choice(np.ones(self.n, dtype=np.int64))  # "a" unaffordable → "b"
+            self.check_game_end()
+            self.harvest()
+            self.check_game_end()
+
+            legal = self.legal_actions()
+            any_legal = legal.any(axis=1)
+            self.outcome[(self.outcome == ONGOING) & ~any_legal] = STUCK
+            scores = np.where(legal, self.rng.random(legal.shape), -1.0)
+            self.act(np.where(any_legal, scores.argmax(axis=1), NO_ACTION), legal)
+            self.check_game_end()
+
+            self.end_turn()
+            self.check_game_end()
+            collect()
+
+        self.outcome[:] = STUCK
+        collect()
+        return {OUTCOME_NAMES[c]: int(k) for c, k in enumerate(counts) if k}, total_turns
+
+
+def benchmark(n: int = 100_000, difficulty: str = "normal", seed: int = 0) -> Dict[str, float]:
+    """Game-turns per second for the vector engine on a random policy"""
+    import time
+    vg = VectorGames(n, difficulty, seed)
+    started = time.perf_counter()
+    outcomes, turns = vg.play_random()
+    elapsed = time.perf_counter() - started
+    logger.info(f"{n} games, outcomes {outcomes}")
+    return {"games": n, "elapsed_s": elapsed, "turns_per_s": turns / elapsed}
+
+
+if __name__ == "__main__":
+    import sys
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    for difficulty in DIFFICULTY_SETTINGS:
+        print(difficulty, benchmark(n, difficulty))